@@ -1,69 +1,213 @@
+import argparse
+import json
 import os
 import sys
-import shutil
-import json
-import uuid
-from datetime import datetime
-
-# 실행 인자 확인
-if len(sys.argv) < 2:
-    print("사용법: python add_user_gifs.py <user_id>")
-    sys.exit(1)
-
-user_id = sys.argv[1].strip()
-gifs_src_dir = user_id  # 입력받은 사용자 이름 폴더
-dest_gifs_dir = "/opt/mattermost/client/gifs"
-# dest_thumbs_dir = "/opt/mattermost/client/gifs/thumbnails"
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from gif_blobs import BLOB_DIRNAME, BlobStore
+from gif_records import new_gif_id
+from gif_storage import create_storage, ensure_initialized
+from gif_thumbnails import generate_thumbnails, thumbnail_fields, thumbnail_paths, thumbnails_available
+from gif_transcode import available_formats, transcode_gif, variant_paths, variant_records
+
+dest_gifs_dir = os.environ.get("GIF_BASE_DIRECTORY", "/opt/mattermost/client/gifs")
+# GIF 는 dest_gifs_dir/blobs/ 아래에 내용 해시로, 썸네일은 그 옆 thumbnails/ (변형은 variants/) 에 생성됨
 json_file = "users_gifs.json"
+storage_backend = os.environ.get("GIF_STORAGE_BACKEND", "json")
+shard_dir = os.environ.get("GIF_SHARD_DIRECTORY", "users_gifs")
+sqlite_path = os.environ.get("GIF_SQLITE_PATH", "users_gifs.db")
+
+DEFAULT_TAGS = ["uploaded", "custom"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="사용자 폴더(또는 manifest)의 GIF 를 한 번에 등록합니다."
+    )
+    parser.add_argument("user_ids", nargs="*",
+                        help="등록할 사용자 ID (같은 이름의 폴더에서 GIF 를 읽음)")
+    parser.add_argument("--manifest",
+                        help='JSON 목록 파일: [{"userId": ..., "path": 폴더 또는 .gif, "tags": [...]}]')
+    parser.add_argument("--workers", type=int, default=min(32, (os.cpu_count() or 1) * 4),
+                        help="파일 배치 스레드 수")
+    placement = parser.add_mutually_exclusive_group()
+    placement.add_argument("--copy", action="store_true",
+                           help="reflink 도 시도하지 않고 항상 복사")
+    placement.add_argument("--hardlink", action="store_true",
+                           help="reflink 가 안 되면 복사 대신 하드링크 (등록 후 원본 GIF 를 수정하지 않을 때만)")
+    parser.add_argument("--no-thumbnails", action="store_true",
+                        help="썸네일 생성 생략")
+    parser.add_argument("--variants", default="",
+                        help="전송용 변형도 생성 (예: gif,webp,mp4 — blobs/variants/ 에 원본보다 작은 것만 저장)")
+    return parser.parse_args()
+
+
+def list_gif_files(path):
+    """폴더면 안의 .gif 파일들, 파일이면 그 파일 하나"""
+    if os.path.isdir(path):
+        return sorted(
+            os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith(".gif")
+        )
+    return [path]
+
+
+def collect_tasks(args):
+    """(user_id, 원본 경로, tags) 작업 목록 생성"""
+    sources = [{"userId": user_id.strip(), "path": user_id.strip()} for user_id in args.user_ids]
+    if args.manifest:
+        with open(args.manifest, "r", encoding="utf-8") as f:
+            sources.extend(json.load(f))
+
+    tasks = []
+    for index, source in enumerate(sources):
+        if not isinstance(source, dict) or not source.get("userId") or not source.get("path"):
+            print(f"❌ manifest 항목 {index} 에 userId 와 path 가 필요합니다: {source!r}")
+            sys.exit(1)
+        path = source["path"]
+        if not os.path.exists(path):
+            print(f"❌ GIF 소스 '{path}' 가 존재하지 않습니다.")
+            sys.exit(1)
+        tags = source.get("tags", DEFAULT_TAGS)
+        for src_path in list_gif_files(path):
+            tasks.append((source["userId"], src_path, tags))
+    return tasks
+
+
+def file_gif_id(src_path):
+    """충돌 없는 GIF ID (파일명 + 시각 + 무작위 접미사)"""
+    return new_gif_id(os.path.splitext(os.path.basename(src_path))[0])
+
+
+class Progress:
+    """진행률과 처리량 출력"""
+
+    def __init__(self, total, interval=1.0):
+        self.total = total
+        self.interval = interval
+        self.done = 0
+        self.bytes = 0
+        self.started = time.monotonic()
+        self._last_report = 0.0
+
+    def update(self, size):
+        self.done += 1
+        self.bytes += size
+        now = time.monotonic()
+        if now - self._last_report >= self.interval or self.done == self.total:
+            self._last_report = now
+            self.report(now)
+
+    def report(self, now=None):
+        elapsed = max((now or time.monotonic()) - self.started, 1e-9)
+        percent = self.done * 100 / self.total if self.total else 100
+        print(f"  {self.done}/{self.total} ({percent:.0f}%) "
+              f"{self.done / elapsed:.1f} files/s, {self.bytes / elapsed / 1e6:.1f} MB/s")
+
+
+def main():
+    args = parse_args()
+    if not args.user_ids and not args.manifest:
+        print("사용법: python add_user_gifs.py <user_id> [<user_id> ...] [--manifest manifest.json]")
+        sys.exit(1)
+
+    tasks = collect_tasks(args)
+    os.makedirs(dest_gifs_dir, exist_ok=True)
+    blobs = BlobStore(os.path.join(dest_gifs_dir, BLOB_DIRNAME), url_root=f"/static/gifs/{BLOB_DIRNAME}")
+
+    # 1) 파일 배치: 스레드 풀에서 해시 계산 후 blob 으로 reflink (또는 --hardlink 면 하드링크) / 복사
+    print(f"📦 {len(tasks)}개 GIF 배치 중 (스레드 {args.workers}개)...")
+    progress = Progress(len(tasks))
+    placed = [None] * len(tasks)
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        futures = {
+            pool.submit(blobs.put_file, src_path, not args.copy, args.hardlink): i
+            for i, (_, src_path, _) in enumerate(tasks)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            digest, dest_path = future.result()
+            blobs.unpin(digest)
+            placed[i] = (digest, dest_path)
+            progress.update(os.path.getsize(dest_path))
+
+    # 2) 레코드 생성
+    new_entries = {}
+    copied = []
+    for (user_id, src_path, tags), (digest, dest_path) in zip(tasks, placed):
+        gif_url = blobs.url_for(digest)
+        gif_entry = {
+            "id": file_gif_id(src_path),
+            "title": os.path.splitext(os.path.basename(src_path))[0],
+            "url": gif_url,
+            "thumbnailUrl": gif_url,
+            "tags": list(tags),
+            "userId": user_id,
+            "blob": digest
+        }
+        new_entries.setdefault(user_id, []).append(gif_entry)
+        copied.append((dest_path, gif_entry))
+
+    # 3) 썸네일 생성 (프로세스 풀에서 병렬 처리, blob 마다 한 번)
+    if copied and not args.no_thumbnails and thumbnails_available():
+        print("🖼  썸네일 생성 중...")
+        with ProcessPoolExecutor() as pool:
+            futures = {}
+            for path, entry in copied:
+                if path not in futures and not all(os.path.exists(p) for p in thumbnail_paths(path)):
+                    futures[path] = pool.submit(generate_thumbnails, path)
+            for path, entry in copied:
+                try:
+                    if path in futures:
+                        futures[path].result()
+                    entry.update(thumbnail_fields(entry["url"]))
+                except Exception as e:
+                    print(f"⚠️ 썸네일 생성 실패 ({entry['id']}): {e}")
+    elif copied and not args.no_thumbnails:
+        print("⚠️ Pillow 가 없어 썸네일 생성을 건너뜁니다.")
+
+    # 3-1) 전송용 변형 생성 (요청한 경우만, blob 마다 한 번)
+    formats = available_formats([fmt.strip() for fmt in args.variants.split(",") if fmt.strip()])
+    if copied and formats:
+        print(f"🗜  변형 생성 중 ({', '.join(formats)})...")
+        with ProcessPoolExecutor() as pool:
+            futures = {}
+            for path, entry in copied:
+                if path not in futures and not any(os.path.exists(p) for p in variant_paths(path).values()):
+                    futures[path] = pool.submit(transcode_gif, path, formats)
+            for path, entry in copied:
+                try:
+                    if path in futures:
+                        futures[path].result()
+                    variants = variant_records(path, entry["url"])
+                    if variants:
+                        entry["variants"] = variants
+                except Exception as e:
+                    print(f"⚠️ 변형 생성 실패 ({entry['id']}): {e}")
+    elif copied and args.variants:
+        print("⚠️ 요청한 변형을 만들 수 없는 환경이라 건너뜁니다 (Pillow/ffmpeg 확인).")
+
+    # 4) 메타데이터를 한 번에 저장 (json: 단일 원자적 rename, sqlite: 새 행만 단일 트랜잭션으로 추가)
+    #    실행 중인 서버 워커와 같은 파일 잠금 안에서 읽고 합쳐 쓰므로 서로의 변경을 덮어쓰지 않음
+    storage = create_storage(storage_backend, json_file, shard_dir, sqlite_path)
+    # 서버보다 먼저 실행돼도 기존 users_gifs.json 을 새 저장소로 변환해 둔다
+    ensure_initialized(storage, json_file)
+    with storage.lock():
+        if hasattr(storage, "apply_operations"):
+            storage.apply_operations([(user_id, ("add_many", entries)) for user_id, entries in new_entries.items()])
+        else:
+            existing = storage.load_users(new_entries.keys())
+            users_gifs = {
+                user_id: existing.get(user_id, []) + entries
+                for user_id, entries in new_entries.items()
+            }
+            storage.save_users(users_gifs)
+
+    elapsed = time.monotonic() - progress.started
+    for user_id, entries in new_entries.items():
+        print(f"✅ {len(entries)}개의 GIF가 '{user_id}' 사용자로 등록되었습니다.")
+    print(f"⏱  총 {len(tasks)}개, {elapsed:.1f}초 ({len(tasks) / max(elapsed, 1e-9):.1f} files/s)")
+
 
-# 폴더 확인
-if not os.path.isdir(gifs_src_dir):
-    print(f"❌ GIF 소스 폴더 '{gifs_src_dir}' 가 존재하지 않습니다.")
-    sys.exit(1)
-
-os.makedirs(dest_gifs_dir, exist_ok=True)
-# os.makedirs(dest_thumbs_dir, exist_ok=True)
-
-# 기존 JSON 불러오기
-if os.path.exists(json_file):
-    with open(json_file, "r", encoding="utf-8") as f:
-        users_data = json.load(f)
-else:
-    users_data = {}
-
-# 사용자 항목 초기화
-if user_id not in users_data:
-    users_data[user_id] = []
-
-# GIF 파일 목록
-gif_files = [f for f in os.listdir(gifs_src_dir) if f.lower().endswith(".gif")]
-
-for gif_file in gif_files:
-    src_path = os.path.join(gifs_src_dir, gif_file)
-
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    gif_id = f"{os.path.splitext(gif_file)[0]}_{timestamp}"
-
-    new_filename = f"{user_id}_{gif_id}.gif"
-    new_thumb_filename = f"{user_id}_{gif_id}.gif"
-
-    # 복사
-    shutil.copy2(src_path, os.path.join(dest_gifs_dir, new_filename))
-    # shutil.copy2(src_path, os.path.join(dest_gifs_dir, new_thumb_filename))
-
-    # JSON 데이터 생성
-    gif_entry = {
-        "id": gif_id,
-        "title": os.path.splitext(gif_file)[0],
-        "url": f"/static/gifs/{new_filename}",
-        "thumbnailUrl": f"/static/gifs/thumbnails/{new_thumb_filename}",
-        "tags": ["uploaded", "custom"],
-        "userId": user_id
-    }
-    users_data[user_id].append(gif_entry)
-
-# JSON 저장
-with open(json_file, "w", encoding="utf-8") as f:
-    json.dump(users_data, f, ensure_ascii=False, indent=2)
-
-print(f"✅ {len(gif_files)}개의 GIF가 '{user_id}' 사용자로 등록되었습니다.")
+if __name__ == "__main__":
+    main()
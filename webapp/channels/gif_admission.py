@@ -0,0 +1,129 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from werkzeug.exceptions import RequestEntityTooLarge
+
+
+class RateLimiter:
+    """키(사용자)별 토큰 버킷
+
+    버킷마다 최대 burst 개의 토큰이 있고 초당 rate 개씩 다시 채워진다. 요청마다 cost 개를 쓰고,
+    모자라면 토큰이 찰 때까지 기다려야 하는 시간(초)을 돌려준다. 오래 쓰지 않은 버킷은
+    max_keys 를 넘을 때 버린다 (가득 찬 버킷과 같으므로 버려도 결과가 같다).
+    rate 가 0 이하이면 꺼져 있다.
+    """
+
+    def __init__(self, rate: float, burst: float, max_keys: int = 100000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        # 키 -> [남은 토큰, 마지막 갱신 시각]
+        self._buckets: 'OrderedDict[str, List[float]]' = OrderedDict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def _bucket(self, key: str) -> List[float]:
+        # 잠금 안에서 호출: 키의 버킷을 지금 시각까지 채워 반환
+        now = self._clock()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = [self.burst, now]
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        return bucket
+
+    def acquire(self, key: str, cost: float = 1.0) -> float:
+        """토큰을 쓰고 0 반환, 모자라면 쓰지 않고 다시 시도할 때까지의 대기 시간(초) 반환"""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            bucket = self._bucket(key)
+            if bucket[0] >= cost:
+                bucket[0] -= cost
+                return 0.0
+            return (cost - bucket[0]) / self.rate
+
+    def charge(self, key: str, cost: float) -> None:
+        """이미 받아들인 요청의 추가 비용(배치 항목 수 등)을 토큰에서 뺀다
+
+        모자라면 음수가 되어 이후 요청이 그만큼 더 기다린다 (burst 보다 큰 배치도 한 번은 처리).
+        """
+        if not self.enabled or cost <= 0:
+            return
+        with self._lock:
+            self._bucket(key)[0] -= cost
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+def admission_key(path_user_id: Optional[str], query_user_id: Optional[str],
+                  authorization: Optional[str], remote_addr: Optional[str]) -> str:
+    """요청 수 제한 키: 경로의 사용자 ID > 쿼리 userId > Bearer 토큰 > 클라이언트 주소
+
+    본문을 읽기 전에 정해야 하므로 본문의 userId 는 쓰지 않는다.
+    """
+    if authorization and authorization.startswith('Bearer '):
+        token = authorization[len('Bearer '):]
+    else:
+        token = None
+    return path_user_id or query_user_id or token or remote_addr or ''
+
+
+class UploadGate:
+    """동시에 처리하는 업로드 수 제한 (limit 이 0 이하이면 무제한)
+
+    자리가 없으면 timeout 초까지만 기다리고 포기한다. 기다리는 요청이 워커 스레드를 오래 잡지 않도록
+    timeout 은 짧게 두고, 나머지는 클라이언트가 Retry-After 후 다시 보내게 한다.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit) if limit > 0 else None
+        self._lock = threading.Lock()
+        self.active = 0
+
+    def try_acquire(self, timeout: float = 0.0) -> bool:
+        if self._slots is not None:
+            acquired = self._slots.acquire(timeout=timeout) if timeout > 0 else self._slots.acquire(blocking=False)
+            if not acquired:
+                return False
+        with self._lock:
+            self.active += 1
+        return True
+
+    def release(self) -> None:
+        with self._lock:
+            self.active -= 1
+        if self._slots is not None:
+            self._slots.release()
+
+
+def retry_after(seconds: float) -> str:
+    """Retry-After 헤더 값 (정수 초, 최소 1)"""
+    return str(max(1, math.ceil(seconds)))
+
+
+def limit_chunks(chunks: Iterable[bytes], max_size: Optional[int]) -> Iterator[bytes]:
+    """누적 크기가 max_size 를 넘으면 RequestEntityTooLarge 를 내는 청크 반복자
+
+    Content-Length 없이(chunked) 들어오는 업로드 본문처럼 미리 크기를 알 수 없을 때 쓴다.
+    """
+    total = 0
+    for chunk in chunks:
+        total += len(chunk)
+        if max_size is not None and total > max_size:
+            raise RequestEntityTooLarge()
+        yield chunk
@@ -0,0 +1,888 @@
+"""GIF 서비스 부하 테스트 / 마이크로 벤치마크
+
+    python gif_bench.py generate --out bench_data --users 200 --gifs-per-user 100
+    python gif_bench.py client   [--workdir bench_data] [--requests 500]
+    python gif_bench.py http     [--workdir bench_data] [--server wsgi|async | --url URL] [--concurrency 16]
+    python gif_bench.py micro    [--users 200 --gifs-per-user 100 --search-gifs 5000]
+    python gif_bench.py import   [--files 500]
+    python gif_bench.py transcode [GIF 파일/폴더 ...] [--formats gif,webp,mp4] [--synthetic 8]
+
+같은 --seed 면 같은 합성 카탈로그(사용자 수, 사용자별 GIF 수, Zipf 분포 태그, 파일 크기)가 만들어진다.
+transcode 는 GIF 마다 전송용 변형(gif_transcode.py)을 만들어 형식별 크기, 줄어든 비율, 인코딩 시간을 보고한다.
+client 는 Flask 테스트 클라이언트로 프로세스 안에서, http 는 실제 서버(gunicorn 또는 aiohttp)를 띄워
+스레드 여러 개로 동시에 요청을 보낸다. 결과는 엔드포인트별 처리량과 p50/p95/p99 지연 시간이며
+--json 으로 저장해 두면 이후 실행과 비교할 수 있다.
+
+서버는 작업 디렉토리(--workdir) 안의 저장소와 GIF 디렉토리(GIF_BASE_DIRECTORY)를 쓰므로 운영 데이터에는 영향이 없다.
+"""
+import argparse
+import atexit
+import base64
+import hashlib
+import http.client
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote, urlsplit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 1x1 GIF. 주석 확장 블록을 채워 원하는 크기를 만든다 (썸네일 생성기가 열 수 있는 올바른 GIF)
+_GIF_HEAD = (b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff'
+             b'!\xf9\x04\x01\x00\x00\x00\x00,\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00')
+_GIF_TRAILER = b';'
+
+TITLE_WORDS = ('cat', 'dog', 'party', 'happy', 'sad', 'dance', 'wow', 'lol', 'facepalm', 'thumbs',
+               'clap', 'fire', 'coffee', 'monday', 'friday', 'deploy', 'bug', 'ship', 'review', 'merge')
+
+# 작업 디렉토리 안의 설정 (서버 프로세스 환경 변수로도 전달)
+CATALOG_INFO = 'bench_catalog.json'
+GIF_DIRNAME = 'gifs'
+# 워밍업하지 않는 시나리오 (카탈로그를 바꾸거나 add 결과를 소비)
+WRITE_SCENARIOS = ('add', 'add_query', 'upload', 'delete', 'delete_query')
+
+
+# ----------------------------------------------------------------------
+# 합성 데이터
+# ----------------------------------------------------------------------
+def make_gif_bytes(size: int, rng: random.Random) -> bytes:
+    """size 바이트 안팎의 올바른 GIF (내용은 무작위라 blob 이 서로 다르다)"""
+    filler = max(0, size - len(_GIF_HEAD) - len(_GIF_TRAILER) - 3)
+    blocks = [b'!\xfe']
+    while filler > 0:
+        length = min(255, filler)
+        blocks.append(bytes([length]) + rng.randbytes(length))
+        filler -= length + 1
+    blocks.append(b'\x00')
+    return _GIF_HEAD + b''.join(blocks) + _GIF_TRAILER
+
+
+def zipf_weights(count: int, exponent: float) -> List[float]:
+    return [1.0 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def file_size_for(rng: random.Random, args) -> int:
+    if args.file_size_max and args.file_size_max > args.file_size:
+        return rng.randint(args.file_size, args.file_size_max)
+    return args.file_size
+
+
+def generate_catalog(args, gif_directory: Optional[str] = None) -> Tuple[Dict[str, List[Dict[str, Any]]], Dict[str, Any]]:
+    """(사용자별 GIF 목록, 부가 정보) 생성
+
+    사용자별 GIF 수는 uniform 이면 모두 gifs_per_user, zipf 면 같은 총량을 Zipf 분포로 나눈다.
+    태그는 tag_vocabulary 개 중에서 Zipf(tag_skew) 가중치로 고른다. gif_directory 가 있으면
+    distinct_files 개의 GIF 파일을 blobs/ 아래에 실제로 만들고 레코드가 나눠 참조한다.
+    """
+    from gif_blobs import BLOB_DIRNAME
+
+    rng = random.Random(args.seed)
+    users = [f'bench{i:05d}' for i in range(args.users)]
+    if args.gifs_distribution == 'zipf':
+        weights = zipf_weights(len(users), 1.0)
+        total = args.users * args.gifs_per_user
+        scale = total / sum(weights)
+        counts = [max(1, round(w * scale)) for w in weights]
+        rng.shuffle(counts)
+    else:
+        counts = [args.gifs_per_user] * len(users)
+
+    vocabulary = [f'tag{i:04d}' for i in range(args.tag_vocabulary)]
+    tag_weights = zipf_weights(len(vocabulary), args.tag_skew)
+
+    files = []
+    if gif_directory is not None:
+        blob_root = os.path.join(gif_directory, BLOB_DIRNAME)
+        for _ in range(args.distinct_files):
+            data = make_gif_bytes(file_size_for(rng, args), rng)
+            digest = hashlib.sha256(data).hexdigest()
+            path = os.path.join(blob_root, digest[:2], digest + '.gif')
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+            files.append((digest, f'{args.url_prefix}/{BLOB_DIRNAME}/{digest[:2]}/{digest}.gif'))
+
+    catalog = {}
+    for user_id, count in zip(users, counts):
+        gifs = []
+        for i in range(count):
+            tags = list(dict.fromkeys(rng.choices(vocabulary, tag_weights, k=args.tags_per_gif)))
+            title = f'{rng.choice(TITLE_WORDS)} {rng.choice(TITLE_WORDS)} {i}'
+            gif = {
+                'id': f'{user_id}_{i:06d}_20241201_123456',
+                'title': title,
+                'url': f'https://media.example.com/{user_id}/{i}.gif',
+                'thumbnailUrl': f'https://media.example.com/{user_id}/{i}.gif',
+                'tags': tags,
+                'userId': user_id,
+            }
+            if files:
+                digest, url = files[rng.randrange(len(files))]
+                gif.update(url=url, thumbnailUrl=url, blob=digest)
+            gifs.append(gif)
+        catalog[user_id] = gifs
+
+    info = {
+        'seed': args.seed,
+        'users': users,
+        # 모든 사용자에게 있는 GIF 번호 범위 (send 시나리오용)
+        'min_gifs': min(counts) if counts else 0,
+        'queries': vocabulary[:20] + [word[:3] for word in TITLE_WORDS[:10]] + list(TITLE_WORDS[:10]),
+        'tags': vocabulary[:20],
+        'files': [url for _, url in files],
+        'file_size': args.file_size,
+        'file_size_max': args.file_size_max,
+        'backend': args.backend,
+    }
+    return catalog, info
+
+
+def storage_paths(workdir: str) -> Dict[str, str]:
+    return {
+        'json': os.path.join(workdir, 'users_gifs.json'),
+        'sharded': os.path.join(workdir, 'users_gifs'),
+        'sqlite': os.path.join(workdir, 'users_gifs.db'),
+    }
+
+
+def server_env(workdir: str, backend: str) -> Dict[str, str]:
+    """작업 디렉토리를 가리키는 서버 환경 변수"""
+    paths = storage_paths(workdir)
+    return {
+        'GIF_BASE_DIRECTORY': os.path.join(workdir, GIF_DIRNAME),
+        'GIF_STORAGE_BACKEND': backend,
+        'GIF_SHARD_DIRECTORY': paths['sharded'],
+        'GIF_SQLITE_PATH': paths['sqlite'],
+        'GIF_TRENDING_PATH': os.path.join(workdir, 'gif_trending.json'),
+        'GIF_PROFILE_DIR': os.path.join(workdir, 'profiles'),
+    }
+
+
+def write_workdir(args, workdir: str) -> Dict[str, Any]:
+    """작업 디렉토리에 합성 카탈로그를 저장하고 부가 정보 반환"""
+    from gif_storage import create_storage
+
+    os.makedirs(workdir, exist_ok=True)
+    started = time.perf_counter()
+    catalog, info = generate_catalog(args, os.path.join(workdir, GIF_DIRNAME))
+    paths = storage_paths(workdir)
+    create_storage(args.backend, paths['json'], paths['sharded'], paths['sqlite']).save(catalog)
+    with open(os.path.join(workdir, CATALOG_INFO), 'w', encoding='utf-8') as f:
+        json.dump(info, f)
+    total = sum(len(gifs) for gifs in catalog.values())
+    print(f"📦 합성 카탈로그: 사용자 {len(catalog)}명, GIF {total}개, 파일 {len(info['files'])}개 "
+          f"({args.backend}, {time.perf_counter() - started:.1f}s) -> {workdir}")
+    return info
+
+
+def prepare_workdir(args) -> Tuple[str, Dict[str, Any], bool]:
+    """(작업 디렉토리, 부가 정보, 임시 디렉토리 여부). 없으면 새로 생성"""
+    workdir = args.workdir
+    temporary = workdir is None
+    if temporary:
+        workdir = tempfile.mkdtemp(prefix='gif-bench-')
+    workdir = os.path.abspath(workdir)
+    info_path = os.path.join(workdir, CATALOG_INFO)
+    if os.path.exists(info_path):
+        with open(info_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        print(f"📂 기존 카탈로그 사용: {workdir} ({info['backend']}, 사용자 {len(info['users'])}명)")
+    else:
+        info = write_workdir(args, workdir)
+    return workdir, info, temporary
+
+
+# ----------------------------------------------------------------------
+# 통계 / 출력
+# ----------------------------------------------------------------------
+def percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    """nearest-rank 백분위수"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def summarize(name: str, latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        'name': name,
+        'count': count,
+        'errors': errors,
+        'throughput': count / elapsed if elapsed > 0 else 0.0,
+        'mean_ms': sum(values) / count * 1000 if count else 0.0,
+        'p50_ms': percentile(values, 0.50) * 1000,
+        'p95_ms': percentile(values, 0.95) * 1000,
+        'p99_ms': percentile(values, 0.99) * 1000,
+        'max_ms': values[-1] * 1000 if values else 0.0,
+    }
+
+
+def print_table(title: str, rows: List[Dict[str, Any]]) -> None:
+    print(f"\n{title}")
+    print(f"  {'name':<26} {'count':>7} {'err':>5} {'ops/s':>10} {'mean':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}")
+    for row in rows:
+        print(f"  {row['name']:<26} {row['count']:>7} {row['errors']:>5} {row['throughput']:>10.1f} "
+              f"{row['mean_ms']:>8.3f}m {row['p50_ms']:>8.3f}m {row['p95_ms']:>8.3f}m "
+              f"{row['p99_ms']:>8.3f}m {row['max_ms']:>8.3f}m")
+
+
+def save_results(path: Optional[str], mode: str, args, rows: List[Dict[str, Any]]) -> None:
+    if not path:
+        return
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'mode': mode, 'args': vars(args), 'results': rows}, f, ensure_ascii=False, indent=2)
+    print(f"\n💾 결과 저장: {path}")
+
+
+# ----------------------------------------------------------------------
+# 엔드포인트 시나리오 (client / http 공통)
+# ----------------------------------------------------------------------
+class Request:
+    __slots__ = ('method', 'path', 'body', 'headers', 'on_response')
+
+    def __init__(self, method: str, path: str, body: Optional[bytes] = None,
+                 headers: Optional[Dict[str, str]] = None,
+                 on_response: Optional[Callable[[int, bytes], None]] = None):
+        self.method = method
+        self.path = path
+        self.body = body
+        self.headers = headers or {}
+        self.on_response = on_response
+
+
+class Scenarios:
+    """엔드포인트별 요청 생성기
+
+    add/upload 로 만든 GIF 는 added 에 모였다가 delete 단계에서 지워지므로 실행 전후 카탈로그 크기가 같다.
+    """
+
+    def __init__(self, info: Dict[str, Any], args):
+        self.info = info
+        self.users = info['users']
+        self.queries = info['queries']
+        self.tags = info['tags']
+        self.files = info['files']
+        self.added: deque = deque()
+        self._counter = 0
+        self._lock = threading.Lock()
+        rng = random.Random(args.seed + 1)
+        payloads = max(1, min(args.payloads, args.requests))
+        raws = [make_gif_bytes(file_size_for(rng, args), rng) for _ in range(payloads)]
+        self._raw_bodies = raws
+        # 제목만 바꿔 붙일 수 있도록 base64 본문을 미리 인코딩
+        self._json_tails = [
+            b',"tags":["bench","uploaded"],"base64_data":"' + base64.b64encode(raw) + b'"}' for raw in raws
+        ]
+
+    def names(self) -> List[str]:
+        return ['health', 'list', 'list_query', 'list_page', 'count', 'search', 'search_query',
+                'send', 'trending', 'trending_tag', 'static', 'static_range',
+                'add', 'add_query', 'upload', 'delete', 'delete_query', 'metrics']
+
+    def _next(self) -> int:
+        with self._lock:
+            self._counter += 1
+            return self._counter
+
+    def _remember(self, user_id: str) -> Callable[[int, bytes], None]:
+        def on_response(status: int, body: bytes) -> None:
+            if status == 200:
+                self.added.append((user_id, json.loads(body)['data']['id']))
+        return on_response
+
+    def build(self, name: str, rng: random.Random) -> Optional[Request]:
+        """요청 하나 생성 (지울 GIF 가 없는 delete 등 만들 수 없으면 None)"""
+        user_id = rng.choice(self.users)
+        if name == 'health':
+            return Request('GET', '/health')
+        if name == 'list':
+            return Request('GET', f'/users/{user_id}/gifs')
+        if name == 'list_query':
+            return Request('GET', f'/gifs?userId={user_id}')
+        if name == 'list_page':
+            return Request('GET', f'/users/{user_id}/gifs?limit=20&fields=id,title,thumbnailUrl')
+        if name == 'count':
+            return Request('GET', f'/users/{user_id}/gifs?count=1')
+        if name == 'search':
+            return Request('GET', f'/users/{user_id}/gifs/search?q={rng.choice(self.queries)}')
+        if name == 'search_query':
+            return Request('GET', f'/gifs/search?userId={user_id}&q={rng.choice(self.queries)}')
+        if name == 'send':
+            index = rng.randrange(max(1, self.info['min_gifs']))
+            return Request('POST', f'/users/{user_id}/gifs/{user_id}_{index:06d}_20241201_123456/sends')
+        if name == 'trending':
+            return Request('GET', '/gifs/trending?limit=20')
+        if name == 'trending_tag':
+            return Request('GET', f'/gifs/trending?tag={rng.choice(self.tags)}&limit=20')
+        if name in ('static', 'static_range'):
+            if not self.files:
+                return None
+            headers = {'Range': 'bytes=0-1023'} if name == 'static_range' else None
+            return Request('GET', rng.choice(self.files), headers=headers)
+        if name in ('add', 'add_query'):
+            title = f'{{"title":"bench {self._next()}"'.encode('utf-8')
+            body = title + rng.choice(self._json_tails)
+            path = f'/users/{user_id}/gifs' if name == 'add' else f'/gifs?userId={user_id}'
+            return Request('POST', path, body, {'Content-Type': 'application/json'}, self._remember(user_id))
+        if name == 'upload':
+            path = f'/users/{user_id}/gifs/upload?title=bench%20upload%20{self._next()}&tags=bench,upload'
+            return Request('POST', path, rng.choice(self._raw_bodies),
+                           {'Content-Type': 'application/octet-stream'}, self._remember(user_id))
+        if name in ('delete', 'delete_query'):
+            try:
+                owner, gif_id = self.added.popleft()
+            except IndexError:
+                return None
+            if name == 'delete':
+                return Request('DELETE', f'/users/{owner}/gifs/{quote(gif_id)}')
+            return Request('DELETE', f'/gifs/{quote(gif_id)}?userId={owner}')
+        if name == 'metrics':
+            return Request('GET', '/metrics')
+        raise ValueError(f'알 수 없는 시나리오: {name}')
+
+
+def selected_scenarios(scenarios: Scenarios, only: Optional[str]) -> List[str]:
+    names = scenarios.names()
+    if not only:
+        return names
+    wanted = [name.strip() for name in only.split(',') if name.strip()]
+    unknown = [name for name in wanted if name not in names]
+    if unknown:
+        raise SystemExit(f"알 수 없는 시나리오: {', '.join(unknown)} (가능: {', '.join(names)})")
+    # add 없이 delete 만 고르면 지울 것이 없으므로 순서는 기본 순서를 따른다
+    return [name for name in names if name in wanted]
+
+
+# ----------------------------------------------------------------------
+# Flask 테스트 클라이언트
+# ----------------------------------------------------------------------
+def run_client(args) -> None:
+    workdir, info, temporary = prepare_workdir(args)
+    os.environ.update(server_env(workdir, info['backend']))
+    os.environ.setdefault('GIF_THUMBNAIL_WORKERS', str(args.thumbnail_workers))
+    # 몇 안 되는 사용자로 쓰기 요청을 몰아 보내므로 사용자별 요청 수 제한은 기본으로 끔
+    os.environ.setdefault('GIF_RATE_LIMIT_PER_SECOND', '0')
+    os.chdir(workdir)
+    if temporary and not args.keep:
+        # server 의 atexit 정리(카탈로그/인기 순위 저장)가 끝난 뒤에 지우도록 먼저 등록
+        atexit.register(shutil.rmtree, workdir, True)
+    import server  # 환경 변수 설정 후 import
+
+    scenarios = Scenarios(info, args)
+    client = server.app.test_client()
+    rng = random.Random(args.seed + 2)
+    rows = []
+    try:
+        for name in selected_scenarios(scenarios, args.only):
+            latencies, errors = [], 0
+            for _ in range(args.warmup if name not in WRITE_SCENARIOS else 0):
+                request = scenarios.build(name, rng)
+                if request is not None:
+                    client.open(request.path, method=request.method, data=request.body, headers=request.headers).close()
+            started = time.perf_counter()
+            for _ in range(args.requests):
+                request = scenarios.build(name, rng)
+                if request is None:
+                    break
+                t0 = time.perf_counter()
+                response = client.open(request.path, method=request.method, data=request.body, headers=request.headers)
+                body = response.get_data()
+                latencies.append(time.perf_counter() - t0)
+                response.close()
+                if response.status_code >= 400:
+                    errors += 1
+                if request.on_response is not None:
+                    request.on_response(response.status_code, body)
+            rows.append(summarize(name, latencies, errors, time.perf_counter() - started))
+    finally:
+        server.catalog.stop()
+        server.trending.stop()
+    print_table(f"🧪 Flask 테스트 클라이언트 ({info['backend']}, 단일 스레드)", rows)
+    save_results(args.json, 'client', args, rows)
+
+
+# ----------------------------------------------------------------------
+# 실제 HTTP 부하
+# ----------------------------------------------------------------------
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, workdir: str, backend: str) -> Tuple[subprocess.Popen, str]:
+    port = free_port()
+    env = {**os.environ, **server_env(workdir, backend), 'PYTHONUNBUFFERED': '1'}
+    env.setdefault('GIF_THUMBNAIL_WORKERS', str(args.thumbnail_workers))
+    env.setdefault('GIF_RATE_LIMIT_PER_SECOND', '0')
+    if args.server == 'wsgi':
+        command = [sys.executable, os.path.join(HERE, 'wsgi.py'), '--bind', f'127.0.0.1:{port}',
+                   '--workers', str(args.workers), '--threads', str(args.threads)]
+    else:
+        command = [sys.executable, os.path.join(HERE, 'server_async.py'), '--host', '127.0.0.1', '--port', str(port)]
+    log = open(os.path.join(workdir, f'server-{args.server}.log'), 'wb')
+    process = subprocess.Popen(command, cwd=workdir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + args.startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"❌ 서버 시작 실패 (로그: {log.name})")
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/health')
+            if connection.getresponse().status == 200:
+                connection.close()
+                print(f"🚀 {args.server} 서버 시작: {url} (로그: {log.name})")
+                return process, url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"❌ 서버가 {args.startup_timeout}초 안에 응답하지 않습니다 (로그: {log.name})")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+class HttpWorker:
+    """스레드별 keep-alive 연결"""
+
+    def __init__(self, host: str, port: int, timeout: float):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.connection: Optional[http.client.HTTPConnection] = None
+
+    def send(self, request: Request) -> Tuple[int, bytes]:
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self.connection.request(request.method, request.path, body=request.body, headers=request.headers)
+                response = self.connection.getresponse()
+                return response.status, response.read()
+            except (http.client.HTTPException, OSError):
+                # 서버가 keep-alive 연결을 닫았으면 한 번 다시 연결
+                self.connection.close()
+                self.connection = None
+                if attempt:
+                    raise
+        raise RuntimeError('unreachable')
+
+    def close(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+
+
+def run_load(url: str, scenarios: Scenarios, name: str, args) -> Dict[str, Any]:
+    """concurrency 개 스레드가 requests 개 요청을 나눠 보내고 통계 반환"""
+    target = urlsplit(url)
+    host, port = target.hostname, target.port or 80
+    remaining = [args.requests]
+    lock = threading.Lock()
+    results: List[Tuple[List[float], int]] = []
+
+    def take() -> bool:
+        with lock:
+            if remaining[0] <= 0:
+                return False
+            remaining[0] -= 1
+            return True
+
+    def worker(index: int) -> None:
+        rng = random.Random(args.seed * 1000 + index)
+        client = HttpWorker(host, port, args.timeout)
+        latencies, errors = [], 0
+        try:
+            while take():
+                request = scenarios.build(name, rng)
+                if request is None:
+                    break
+                t0 = time.perf_counter()
+                try:
+                    status, body = client.send(request)
+                except (http.client.HTTPException, OSError):
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - t0)
+                if status >= 400:
+                    errors += 1
+                if request.on_response is not None:
+                    request.on_response(status, body)
+        finally:
+            client.close()
+            with lock:
+                results.append((latencies, errors))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies = [value for values, _ in results for value in values]
+    return summarize(name, latencies, sum(errors for _, errors in results), elapsed)
+
+
+def run_http(args) -> None:
+    workdir, info, temporary = prepare_workdir(args)
+    process = None
+    url = args.url
+    if url is None:
+        process, url = start_server(args, workdir, info['backend'])
+    scenarios = Scenarios(info, args)
+    rows = []
+    try:
+        for name in selected_scenarios(scenarios, args.only):
+            if args.warmup and name not in WRITE_SCENARIOS:
+                warmup = argparse.Namespace(**{**vars(args), 'requests': args.warmup})
+                run_load(url, scenarios, name, warmup)
+            rows.append(run_load(url, scenarios, name, args))
+    finally:
+        if process is not None:
+            stop_server(process)
+    target = url if process is None else f"{args.server}, {info['backend']}"
+    print_table(f"🌐 HTTP 부하 ({target}, 동시 {args.concurrency})", rows)
+    save_results(args.json, 'http', args, rows)
+    if temporary and not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ----------------------------------------------------------------------
+# 마이크로 벤치마크 (저장소, 검색, 직렬화, 페이지)
+# ----------------------------------------------------------------------
+def measure(name: str, fn: Callable[[], Any], repeat: int) -> Dict[str, Any]:
+    fn()  # 준비 실행
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    return summarize(name, latencies, 0, time.perf_counter() - started)
+
+
+def naive_search(gifs: List[Dict[str, Any]], query: str) -> List[Dict[str, Any]]:
+    """색인 도입 전 방식의 선형 검색 (비교 기준)"""
+    return [
+        gif for gif in gifs
+        if query in gif['title'].lower() or any(query in tag.lower() for tag in gif['tags'])
+    ]
+
+
+def run_micro(args) -> None:
+    from gif_catalog import GifCatalog
+    from gif_paging import page
+    from gif_records import pack, unpack
+    from gif_search import GifSearchIndex
+    from gif_serialization import FragmentCache, encode_payload, serializer
+    from gif_storage import create_storage
+
+    catalog, info = generate_catalog(args)
+    users = info['users']
+    rng = random.Random(args.seed + 3)
+    rows = []
+    repeat = args.repeat
+
+    # 저장소 백엔드
+    workdir = tempfile.mkdtemp(prefix='gif-bench-micro-')
+    try:
+        for backend in args.backends.split(','):
+            paths = storage_paths(workdir)
+            storage = create_storage(backend, paths['json'], paths['sharded'], paths['sqlite'])
+            storage.save(catalog)
+            user_id = users[0]
+            one_user = {user_id: catalog[user_id]}
+            rows.append(measure(f'{backend}.save_all', lambda: storage.save(catalog), max(1, repeat // 20)))
+            rows.append(measure(f'{backend}.load_all', storage.load_all, max(1, repeat // 20)))
+            rows.append(measure(f'{backend}.load_users(1)', lambda: storage.load_users([rng.choice(users)]), repeat))
+            rows.append(measure(f'{backend}.save_users(1)', lambda: storage.save_users(one_user), repeat))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    # 검색: 한 사용자 search_gifs 개 GIF
+    search_args = argparse.Namespace(**{**vars(args), 'users': 1, 'gifs_per_user': args.search_gifs,
+                                        'gifs_distribution': 'uniform'})
+    search_catalog, search_info = generate_catalog(search_args)
+    search_user = search_info['users'][0]
+    search_gifs = search_catalog[search_user]
+    packed = [pack(gif) for gif in search_gifs]
+    memory = GifCatalog(load_fn=lambda: {search_user: search_gifs}, load_users_fn=lambda ids: {},
+                        save_fn=lambda users: True, flush_interval=0, pack=pack, unpack=unpack)
+    memory.load()
+    queries = search_info['queries']
+
+    def build_index():
+        GifSearchIndex(memory).search(search_user, 'cat')
+
+    rows.append(measure(f'search.build({len(search_gifs)})', build_index, max(1, repeat // 50)))
+    index = GifSearchIndex(memory)
+    for label, length in (('1ch', 1), ('3ch', 3), ('long', 8)):
+        candidates = [q[:length] for q in queries if len(q) >= length] or queries
+        rows.append(measure(f'search.index.{label}',
+                            lambda: index.search(search_user, rng.choice(candidates)), repeat))
+        rows.append(measure(f'search.naive.{label}',
+                            lambda: naive_search(search_gifs, rng.choice(candidates)), max(1, repeat // 10)))
+
+    # 직렬화 / 페이지
+    payload = {'success': True, 'data': packed, 'count': len(packed), 'userId': search_user}
+    fragments = FragmentCache(len(packed) * 2)
+    encode_payload(payload, fragments)
+    rows.append(measure('json.dumps(list)', lambda: serializer.dumps(payload), max(1, repeat // 10)))
+    rows.append(measure('json.encode_payload(warm)', lambda: encode_payload(payload, fragments), max(1, repeat // 10)))
+    encoded = serializer.dumps(payload)
+    rows.append(measure('json.loads(list)', lambda: serializer.loads(encoded), max(1, repeat // 10)))
+    rows.append(measure('records.pack', lambda: [pack(gif) for gif in search_gifs], max(1, repeat // 50)))
+    cursor = page(packed, 20)[1]
+    rows.append(measure('paging.cursor(20)', lambda: page(packed, 20, cursor=cursor), repeat))
+
+    print_table(f"🔬 마이크로 벤치마크 (사용자 {len(users)}명 x {args.gifs_per_user}, 검색 {len(search_gifs)}개)", rows)
+    save_results(args.json, 'micro', args, rows)
+
+
+# ----------------------------------------------------------------------
+# add_user_gifs.py 일괄 등록
+# ----------------------------------------------------------------------
+def run_import(args) -> None:
+    workdir, info, temporary = prepare_workdir(args)
+    rng = random.Random(args.seed + 4)
+    source = os.path.join(workdir, 'import')
+    manifest = []
+    for index in range(args.import_users):
+        user_dir = os.path.join(source, f'import{index:03d}')
+        os.makedirs(user_dir, exist_ok=True)
+        manifest.append({'userId': f'import{index:03d}', 'path': user_dir, 'tags': ['bench', 'import']})
+    for index in range(args.files):
+        user_dir = manifest[index % len(manifest)]['path']
+        with open(os.path.join(user_dir, f'import_{index:06d}.gif'), 'wb') as f:
+            f.write(make_gif_bytes(file_size_for(rng, args), rng))
+    manifest_path = os.path.join(workdir, 'import_manifest.json')
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+
+    env = {**os.environ, **server_env(workdir, info['backend'])}
+    command = [sys.executable, os.path.join(HERE, 'add_user_gifs.py'), '--manifest', manifest_path]
+    if args.no_thumbnails:
+        command.append('--no-thumbnails')
+    started = time.perf_counter()
+    result = subprocess.run(command, cwd=workdir, env=env, capture_output=True, text=True)
+    elapsed = time.perf_counter() - started
+    if result.returncode != 0:
+        print(result.stdout + result.stderr)
+        raise SystemExit("❌ add_user_gifs.py 실패")
+    rows = [{**summarize('add_user_gifs', [elapsed], 0, elapsed),
+             'count': args.files, 'throughput': args.files / elapsed}]
+    print_table(f"📥 add_user_gifs.py ({info['backend']}, 파일 {args.files}개)", rows)
+    save_results(args.json, 'import', args, rows)
+    if temporary and not args.keep:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ----------------------------------------------------------------------
+# 전송용 변형 인코딩 (gif_transcode.py)
+# ----------------------------------------------------------------------
+def make_animated_gif(path: str, rng: random.Random, width: int, height: int, frames: int) -> None:
+    """그라데이션 배경 위로 도형이 움직이는 애니메이션 GIF (동영상에서 뽑은 GIF 처럼 디더링된 비최적화 원본)"""
+    from PIL import Image, ImageDraw
+
+    start, end = [tuple(rng.randrange(256) for _ in range(3)) for _ in range(2)]
+    background = Image.new('RGB', (width, height))
+    draw = ImageDraw.Draw(background)
+    for y in range(height):
+        draw.line((0, y, width, y), fill=tuple(s + (e - s) * y // max(1, height - 1) for s, e in zip(start, end)))
+    shapes = [(rng.randrange(width), rng.randrange(height), rng.randrange(8, max(9, width // 4)),
+               tuple(rng.randrange(256) for _ in range(3)), rng.uniform(-6, 6), rng.uniform(-6, 6))
+              for _ in range(rng.randrange(3, 9))]
+    images = []
+    for index in range(frames):
+        image = background.copy()
+        draw = ImageDraw.Draw(image)
+        for x, y, radius, color, dx, dy in shapes:
+            cx, cy = (x + dx * index) % width, (y + dy * index) % height
+            draw.ellipse((cx - radius, cy - radius, cx + radius, cy + radius), fill=color)
+        images.append(image.convert('P', palette=Image.Palette.ADAPTIVE, colors=256, dither=Image.Dither.FLOYDSTEINBERG))
+    images[0].save(path, format='GIF', save_all=True, append_images=images[1:],
+                   duration=80, loop=0, optimize=False)
+
+
+def run_transcode(args) -> None:
+    from gif_transcode import available_formats, transcode_gif
+
+    formats = available_formats([fmt.strip() for fmt in args.formats.split(',') if fmt.strip()])
+    if not formats:
+        raise SystemExit("❌ 만들 수 있는 형식이 없습니다 (Pillow/ffmpeg 확인)")
+    sources = []
+    for path in args.paths:
+        if os.path.isdir(path):
+            sources.extend(sorted(os.path.join(path, f) for f in os.listdir(path) if f.lower().endswith('.gif')))
+        else:
+            sources.append(path)
+
+    workdir = tempfile.mkdtemp(prefix='gif-bench-transcode-')
+    try:
+        if not sources:
+            rng = random.Random(args.seed + 5)
+            for index in range(args.synthetic):
+                path = os.path.join(workdir, 'source', f'synthetic_{index:03d}.gif')
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                make_animated_gif(path, rng, args.width, args.height, args.frames)
+                sources.append(path)
+
+        rows = []
+        for index, source in enumerate(sources):
+            # 변형은 원본 옆 variants/ 에 생기므로 복사본으로 인코딩
+            path = os.path.join(workdir, f'{index:04d}.gif')
+            shutil.copyfile(source, path)
+            started = time.perf_counter()
+            result = transcode_gif(path, formats, webp_quality=args.webp_quality, mp4_crf=args.mp4_crf)
+            row = {'name': os.path.basename(source), 'original': result['original'],
+                   'seconds': time.perf_counter() - started, 'variants': result['variants']}
+            rows.append(row)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"\n🗜  전송용 변형 (GIF {len(rows)}개, 형식 {', '.join(formats)})")
+    header = ''.join(f" {fmt + ' bytes':>12} {'saved':>7} {'ms':>8}" for fmt in formats)
+    print(f"  {'name':<26} {'original':>10}{header}")
+    totals = {fmt: [0, 0.0] for fmt in formats}
+    total_original = sum(row['original'] for row in rows)
+    for row in rows:
+        line = f"  {row['name'][:26]:<26} {row['original']:>10}"
+        for fmt in formats:
+            outcome = row['variants'].get(fmt, {})
+            if 'bytes' not in outcome:
+                line += f" {'error':>12} {'-':>7} {'-':>8}"
+                totals[fmt][0] += row['original']
+                continue
+            saved = 1 - outcome['bytes'] / row['original'] if row['original'] else 0.0
+            # 원본보다 크면 버려지므로 (*) 표시
+            line += (f" {outcome['bytes']:>11}{' ' if outcome['kept'] else '*'} {saved:>6.1%} "
+                     f"{outcome['seconds'] * 1000:>8.1f}")
+            totals[fmt][0] += outcome['bytes'] if outcome['kept'] else row['original']
+            totals[fmt][1] += outcome['seconds']
+        print(line)
+    print(f"\n  합계: 원본 {total_original} 바이트")
+    for fmt, (size, seconds) in totals.items():
+        saved = total_original - size
+        print(f"    {fmt:<5} {size:>12} 바이트 (절감 {saved} 바이트, {saved / total_original if total_original else 0:.1%}), "
+              f"인코딩 {seconds:.2f}초 (GIF 당 {seconds / len(rows) * 1000 if rows else 0:.1f}ms)")
+    print("  (* 원본보다 커서 버려진 변형 — 합계에는 원본 크기로 계산)")
+    save_results(args.json, 'transcode', args, rows)
+
+
+# ----------------------------------------------------------------------
+# CLI
+# ----------------------------------------------------------------------
+def add_catalog_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=200, help="사용자 수")
+    parser.add_argument("--gifs-per-user", type=int, default=100, help="사용자당 평균 GIF 수")
+    parser.add_argument("--gifs-distribution", choices=('uniform', 'zipf'), default='uniform',
+                        help="사용자별 GIF 수 분포")
+    parser.add_argument("--tag-vocabulary", type=int, default=500, help="태그 종류 수")
+    parser.add_argument("--tag-skew", type=float, default=1.1, help="태그 Zipf 지수 (클수록 인기 태그 편중)")
+    parser.add_argument("--tags-per-gif", type=int, default=3)
+    parser.add_argument("--file-size", type=int, default=256 * 1024, help="GIF 파일 크기 (바이트)")
+    parser.add_argument("--file-size-max", type=int, default=0, help="지정하면 file-size~이 값 사이 균등 분포")
+    parser.add_argument("--distinct-files", type=int, default=50, help="실제로 만들 GIF 파일 수 (레코드가 나눠 참조)")
+    parser.add_argument("--backend", choices=('json', 'sharded', 'sqlite'),
+                        default=os.environ.get('GIF_STORAGE_BACKEND', 'json'))
+    parser.add_argument("--url-prefix", default='/static/gifs')
+
+
+def add_run_args(parser: argparse.ArgumentParser) -> None:
+    add_catalog_args(parser)
+    parser.add_argument("--workdir", help="합성 카탈로그 디렉토리 (없으면 임시 디렉토리에 생성)")
+    parser.add_argument("--keep", action="store_true", help="임시 작업 디렉토리를 지우지 않음")
+    parser.add_argument("--json", help="결과를 저장할 JSON 파일")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="GIF 서비스 부하 테스트 / 마이크로 벤치마크")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help="합성 카탈로그 생성")
+    add_catalog_args(generate)
+    generate.add_argument("--out", required=True, help="작업 디렉토리")
+
+    for name, help_text in (('client', "Flask 테스트 클라이언트로 모든 엔드포인트 측정"),
+                            ('http', "실제 서버에 동시 HTTP 부하")):
+        sub = commands.add_parser(name, help=help_text)
+        add_run_args(sub)
+        sub.add_argument("--requests", type=int, default=500, help="엔드포인트별 요청 수")
+        sub.add_argument("--warmup", type=int, default=20, help="읽기 엔드포인트 워밍업 요청 수")
+        sub.add_argument("--payloads", type=int, default=16, help="add/upload 에 돌려 쓸 서로 다른 GIF 수")
+        sub.add_argument("--only", help="측정할 시나리오 (쉼표 구분)")
+        sub.add_argument("--thumbnail-workers", type=int, default=0,
+                         help="서버 썸네일 프로세스 수 (기본 0: 요청 경로만 측정)")
+    http_parser = commands.choices['http']
+    http_parser.add_argument("--url", help="이미 실행 중인 서버 (지정하면 서버를 띄우지 않음)")
+    http_parser.add_argument("--server", choices=('wsgi', 'async'), default='wsgi',
+                             help="띄울 서버 (wsgi: gunicorn 멀티 워커, async: aiohttp)")
+    http_parser.add_argument("--workers", type=int, default=4, help="gunicorn 워커 수")
+    http_parser.add_argument("--threads", type=int, default=8, help="gunicorn 워커당 스레드 수")
+    http_parser.add_argument("--concurrency", type=int, default=16, help="동시 요청 스레드 수")
+    http_parser.add_argument("--timeout", type=float, default=30.0, help="요청 제한 시간 (초)")
+    http_parser.add_argument("--startup-timeout", type=float, default=60.0)
+
+    micro = commands.add_parser('micro', help="저장소/검색/직렬화 마이크로 벤치마크")
+    add_catalog_args(micro)
+    micro.add_argument("--backends", default='json,sharded,sqlite')
+    micro.add_argument("--search-gifs", type=int, default=5000, help="검색 벤치마크 사용자의 GIF 수")
+    micro.add_argument("--repeat", type=int, default=200)
+    micro.add_argument("--json", help="결과를 저장할 JSON 파일")
+
+    importer = commands.add_parser('import', help="add_user_gifs.py 일괄 등록 처리량")
+    add_run_args(importer)
+    importer.add_argument("--files", type=int, default=500, help="등록할 GIF 파일 수")
+    importer.add_argument("--import-users", type=int, default=10)
+    importer.add_argument("--no-thumbnails", action="store_true")
+
+    transcode = commands.add_parser('transcode', help="전송용 변형 크기 절감 / 인코딩 시간")
+    transcode.add_argument("paths", nargs='*', help="측정할 GIF 파일 또는 폴더 (없으면 합성 GIF)")
+    transcode.add_argument("--formats", default='gif,webp,mp4')
+    transcode.add_argument("--webp-quality", type=int, default=80)
+    transcode.add_argument("--mp4-crf", type=int, default=28)
+    transcode.add_argument("--seed", type=int, default=42)
+    transcode.add_argument("--synthetic", type=int, default=8, help="합성 GIF 수")
+    transcode.add_argument("--width", type=int, default=320)
+    transcode.add_argument("--height", type=int, default=240)
+    transcode.add_argument("--frames", type=int, default=24)
+    transcode.add_argument("--json", help="결과를 저장할 JSON 파일")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.command == 'generate':
+        write_workdir(args, os.path.abspath(args.out))
+    elif args.command == 'client':
+        run_client(args)
+    elif args.command == 'http':
+        run_http(args)
+    elif args.command == 'micro':
+        run_micro(args)
+    elif args.command == 'import':
+        run_import(args)
+    elif args.command == 'transcode':
+        run_transcode(args)
+
+
+if __name__ == '__main__':
+    main()
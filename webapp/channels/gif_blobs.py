@@ -0,0 +1,411 @@
+import hashlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows 등에서는 reflink 를 시도하지 않는다
+    fcntl = None
+
+BLOB_DIRNAME = 'blobs'
+BLOB_SUFFIX = '.gif'
+# blob 파일 이름 (sha256 hex)
+DIGEST_PATTERN = re.compile(r'[0-9a-f]{64}')
+
+# linux/fs.h 의 FICLONE (btrfs, xfs 등에서 copy-on-write 복제)
+FICLONE = 0x40049409
+
+
+def is_blob_file(filename: str) -> bool:
+    """BASE_GIF_DIRECTORY 기준 상대 경로가 blob 원본(blobs/<aa>/<digest>.gif)이면 True
+
+    내용 해시 이름이라 내용이 바뀌지 않는 것은 원본뿐이다. 같은 디렉토리의 썸네일/변형은
+    이름이 digest 에서 나오지만 생성 설정(크기, 품질)이 바뀌면 다시 만들어진다.
+    """
+    parts = filename.split('/')
+    if len(parts) != 3 or parts[0] != BLOB_DIRNAME or not parts[2].endswith(BLOB_SUFFIX):
+        return False
+    digest = parts[2][:-len(BLOB_SUFFIX)]
+    return DIGEST_PATTERN.fullmatch(digest) is not None and parts[1] == digest[:2]
+
+
+def place_file(src_path: str, dest_path: str, reflink: bool = True, hardlink: bool = False) -> str:
+    """src 를 dest 로 배치하고 사용한 방법('reflink', 'hardlink', 'copy') 반환
+
+    reflink(copy-on-write 복제), 하드링크 중 허용된 것을 차례로 시도하고 안 되면 복사한다.
+    하드링크는 원본과 같은 inode 라 원본을 제자리에서 고치면 blob 내용도 바뀌므로
+    (내용 해시 이름과 immutable 캐시가 깨짐) 원본을 다시 수정하지 않을 때만 켠다.
+    """
+    if reflink and fcntl is not None:
+        try:
+            with open(src_path, 'rb') as src, open(dest_path, 'wb') as dest:
+                fcntl.ioctl(dest.fileno(), FICLONE, src.fileno())
+            return 'reflink'
+        except OSError:
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
+    if hardlink:
+        try:
+            os.link(src_path, dest_path)
+            return 'hardlink'
+        except OSError:
+            pass
+    shutil.copyfile(src_path, dest_path)
+    return 'copy'
+
+
+class BlobStore:
+    """내용 해시(sha256)로 GIF 파일을 한 번만 저장하는 저장소
+
+    파일은 <root>/<해시 앞 2자리>/<해시>.gif 에 두고, 사용자 레코드는 'blob' 필드로 참조한다.
+    참조 수는 카탈로그 레코드로부터 계산되며 (GifCatalog 리스너),
+    아무도 참조하지 않게 된 blob 만 release() 에서 삭제한다.
+    저장 직후 레코드가 추가되기 전까지는 pin 으로 삭제를 막는다.
+    여러 워커 프로세스가 같은 root 를 쓸 때는 다른 워커의 참조가 아직 보이지 않을 수 있으므로
+    release_grace 초 이내에 저장(또는 재사용)된 blob 은 지우지 않는다.
+    카탈로그가 일부 사용자만 메모리에 두면 (지연 로드) 참조 수가 그 사용자들 것뿐이므로
+    partial_refs 로 만들어 release() 가 아무것도 지우지 않게 하고, 대신 저장소 전체 레코드를 훑는
+    sweep() (BlobSweeper 가 주기적으로, 또는 python gif_blobs.py sweep 으로) 이 정리한다.
+    """
+
+    def __init__(self, root: str, url_root: str = '/gifs/' + BLOB_DIRNAME, release_grace: float = 0.0,
+                 partial_refs: bool = False):
+        self.root = root
+        self.url_root = url_root
+        self.release_grace = release_grace
+        self.partial_refs = partial_refs
+        self._lock = threading.Lock()
+        self._refs: Counter = Counter()
+        self._user_refs: Dict[str, Counter] = {}
+        self._pins: Counter = Counter()
+
+    # ------------------------------------------------------------------
+    # 경로
+    # ------------------------------------------------------------------
+    def path_for(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest + BLOB_SUFFIX)
+
+    def url_for(self, digest: str, url_root: Optional[str] = None) -> str:
+        return f'{url_root or self.url_root}/{digest[:2]}/{digest}{BLOB_SUFFIX}'
+
+    # ------------------------------------------------------------------
+    # 저장 / 삭제
+    # ------------------------------------------------------------------
+    def put_chunks(self, chunks: Iterable[bytes]) -> Tuple[str, str]:
+        """청크를 해시하며 임시 파일에 쓰고 blob 으로 배치 후 (digest, path) 반환
+
+        같은 내용이 이미 있으면 새 파일은 버린다. 반환된 digest 는 pin 된 상태이므로
+        레코드를 추가한 뒤 unpin() 해야 한다.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix='.blob-', suffix='.part')
+        hasher = hashlib.sha256()
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in chunks:
+                    hasher.update(chunk)
+                    f.write(chunk)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return self.put_staged(tmp_path, hasher.hexdigest())
+
+    def put_staged(self, tmp_path: str, digest: str) -> Tuple[str, str]:
+        """root 아래에 다 쓴 임시 파일(내용 해시 digest)을 blob 으로 배치 후 (digest, path) 반환
+
+        같은 내용이 이미 있으면 임시 파일은 버린다. 반환된 digest 는 pin 된 상태다.
+        """
+        path = self.path_for(digest)
+        try:
+            with self._lock:
+                self._pins[digest] += 1
+                if os.path.exists(path):
+                    os.remove(tmp_path)
+                    self._touch(path)
+                else:
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    os.replace(tmp_path, path)
+            return digest, path
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self.unpin(digest)
+            raise
+
+    def put_file(self, src_path: str, reflink: bool = True, hardlink: bool = False,
+                 chunk_size: int = 1024 * 1024) -> Tuple[str, str]:
+        """기존 파일을 blob 으로 배치 (pin 된 상태로 반환)
+
+        해시를 먼저 계산하고 새 blob 일 때만 파일을 만든다. reflink/hardlink 는 place_file 참고.
+        """
+        hasher = hashlib.sha256()
+        with open(src_path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+        digest = hasher.hexdigest()
+        path = self.path_for(digest)
+
+        with self._lock:
+            self._pins[digest] += 1
+            if os.path.exists(path):
+                self._touch(path)
+                return digest, path
+
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.part'
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            place_file(src_path, tmp_path, reflink, hardlink)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            self.unpin(digest)
+            raise
+        return digest, path
+
+    def _touch(self, path: str) -> None:
+        # 재사용 시각을 mtime 으로 남겨 release_grace (와 sweep 의 min_age) 동안 삭제를 막는다
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def _recently_used(self, path: str) -> bool:
+        if self.release_grace <= 0:
+            return False
+        try:
+            return time.time() - os.stat(path).st_mtime < self.release_grace
+        except OSError:
+            return False
+
+    def unpin(self, digest: str) -> None:
+        with self._lock:
+            self._pins[digest] -= 1
+            if self._pins[digest] <= 0:
+                del self._pins[digest]
+
+    def ref_count(self, digest: str) -> int:
+        return self._refs.get(digest, 0)
+
+    def release(self, digest: str, extra_paths: Iterable[str] = ()) -> bool:
+        """참조도 pin 도 없고 최근에 쓰이지 않았으면 blob 파일(과 extra_paths) 삭제 후 True"""
+        if self.partial_refs:
+            return False
+        with self._lock:
+            if self._refs.get(digest, 0) > 0 or self._pins.get(digest, 0) > 0:
+                return False
+            if self._recently_used(self.path_for(digest)):
+                return False
+            for path in [self.path_for(digest), *extra_paths]:
+                if os.path.exists(path):
+                    os.remove(path)
+            return True
+
+    def _prefix_dirs(self) -> Iterator[str]:
+        if not os.path.isdir(self.root):
+            return
+        for prefix in os.listdir(self.root):
+            directory = os.path.join(self.root, prefix)
+            if os.path.isdir(directory):
+                yield directory
+
+    def digests(self) -> Iterator[str]:
+        """디스크에 있는 blob 목록"""
+        for directory in self._prefix_dirs():
+            for name in os.listdir(directory):
+                if name.endswith(BLOB_SUFFIX):
+                    yield name[:-len(BLOB_SUFFIX)]
+
+    def sweep(self, referenced: Set[str], min_age: float,
+              extra_paths: Callable[[str], Iterable[str]] = lambda path: ()) -> List[str]:
+        """mark-and-sweep 의 sweep: referenced 에 없고 이 프로세스의 참조/pin 도 없으며
+        min_age 초 넘게 저장/재사용되지 않은 blob 파일(과 extra_paths(경로)) 을 지우고 digest 목록 반환
+
+        referenced 는 저장소 전체 레코드에서 모은 digest 다. 그 뒤에 다른 워커가 저장하거나 재사용한 blob 은
+        mtime 이 min_age 안이므로 지우지 않는다 (min_age 는 카탈로그 기록 주기보다 충분히 길게).
+        """
+        removed = []
+        now = time.time()
+        for digest in list(self.digests()):
+            if digest in referenced:
+                continue
+            path = self.path_for(digest)
+            with self._lock:
+                if self._refs.get(digest, 0) > 0 or self._pins.get(digest, 0) > 0:
+                    continue
+                try:
+                    if now - os.stat(path).st_mtime < min_age:
+                        continue
+                except OSError:
+                    continue
+                for extra in [path, *extra_paths(path)]:
+                    if os.path.exists(extra):
+                        os.remove(extra)
+            removed.append(digest)
+        return removed
+
+    def sweep_orphans(self, derived_dirs: Iterable[str], min_age: float) -> List[str]:
+        """<aa>/<derived_dirs> 아래 파일 중 원본 blob 이 없고 min_age 초 넘게 지난 것(썸네일/변형)을 지우고 경로 목록 반환
+
+        blob 과 함께 지우지 못한 파일이다 (blob 을 지운 뒤 끝난 생성 작업, 삭제 도중 종료 등).
+        이름이 <digest><접미사> 가 아닌 파일은 건드리지 않는다.
+        """
+        removed = []
+        now = time.time()
+        for directory in list(self._prefix_dirs()):
+            for dirname in derived_dirs:
+                derived = os.path.join(directory, dirname)
+                if not os.path.isdir(derived):
+                    continue
+                for name in os.listdir(derived):
+                    digest = name[:64]
+                    if DIGEST_PATTERN.fullmatch(digest) is None or len(name) == 64:
+                        continue
+                    path = os.path.join(derived, name)
+                    with self._lock:
+                        if self._pins.get(digest, 0) > 0 or os.path.exists(self.path_for(digest)):
+                            continue
+                        try:
+                            if now - os.stat(path).st_mtime < min_age:
+                                continue
+                            os.remove(path)
+                        except OSError:
+                            continue
+                    removed.append(path)
+        return removed
+
+    # ------------------------------------------------------------------
+    # GifCatalog 리스너 인터페이스 (참조 수 유지)
+    # ------------------------------------------------------------------
+    def _count(self, user_id: str, gifs: Iterable[Dict[str, Any]], delta: int) -> None:
+        user_refs = self._user_refs.setdefault(user_id, Counter())
+        for gif in gifs:
+            digest = gif.get('blob')
+            if digest:
+                self._refs[digest] += delta
+                user_refs[digest] += delta
+                if self._refs[digest] <= 0:
+                    del self._refs[digest]
+                if user_refs[digest] <= 0:
+                    del user_refs[digest]
+
+    def on_add(self, user_id: str, gif: Dict[str, Any]) -> None:
+        with self._lock:
+            self._count(user_id, [gif], 1)
+
+    def on_remove(self, user_id: str, gif: Dict[str, Any]) -> None:
+        with self._lock:
+            self._count(user_id, [gif], -1)
+
+    def on_update(self, user_id: str, gif: Dict[str, Any]) -> None:
+        pass
+
+    def on_replace(self, user_id: str, gifs: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            old = self._user_refs.pop(user_id, Counter())
+            self._refs.subtract(old)
+            self._refs += Counter()  # 0 이하 항목 정리
+            self._count(user_id, gifs, 1)
+
+    def on_evict(self, user_id: str, gifs: List[Dict[str, Any]]) -> None:
+        self.on_replace(user_id, [])
+
+
+class BlobSweeper:
+    """주기적으로 mark-and-sweep 해서 아무 레코드도 참조하지 않는 blob 을 지우는 스레드
+
+    mark_fn 은 저장소 전체 레코드가 참조하는 digest 집합을 반환한다 (카탈로그 기록을 먼저 끝내고 읽을 것).
+    지운 blob 경로마다 on_removed 를 부른다 (진행 중인 변형 생성 취소 등).
+    derived_dirs 는 blob 옆에 만드는 파일 디렉토리 이름 (썸네일, 변형) 으로, 원본 없이 남은 파일도 지운다.
+    """
+
+    def __init__(self, blobs: BlobStore, mark_fn: Callable[[], Set[str]], interval: float, min_age: float,
+                 extra_paths: Callable[[str], Iterable[str]] = lambda path: (),
+                 on_removed: Optional[Callable[[str], None]] = None,
+                 derived_dirs: Iterable[str] = ()):
+        self.blobs = blobs
+        self.interval = interval
+        self.min_age = min_age
+        self._mark_fn = mark_fn
+        self._extra_paths = extra_paths
+        self._derived_dirs = tuple(derived_dirs)
+        self._on_removed = on_removed
+        self.removed_total = 0
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def run_once(self) -> int:
+        """한 번 훑어 지운 blob 수 반환"""
+        referenced = self._mark_fn()
+        removed = self.blobs.sweep(referenced, self.min_age, self._extra_paths)
+        for digest in removed:
+            if self._on_removed is not None:
+                self._on_removed(self.blobs.path_for(digest))
+        self.removed_total += len(removed)
+        if removed:
+            print(f"참조되지 않는 blob {len(removed)}개 삭제")
+        orphans = self.blobs.sweep_orphans(self._derived_dirs, self.min_age)
+        if orphans:
+            print(f"원본 blob 이 없는 썸네일/변형 {len(orphans)}개 삭제")
+        return len(removed)
+
+    def start(self) -> None:
+        if self._thread is not None or self.interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name='gif-blob-sweep', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"blob 정리 중 오류: {e}")
+
+
+def referenced_digests(gifs: Iterable[Dict[str, Any]]) -> Set[str]:
+    """레코드들이 참조하는 blob digest 집합 (mark)"""
+    return {gif['blob'] for gif in gifs if gif.get('blob')}
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] != 'sweep':
+        print("사용법: python gif_blobs.py sweep [최소 경과 시간(초), 기본 3600]")
+        print("        (GIF_BASE_DIRECTORY, GIF_STORAGE_BACKEND 저장소 기준, 참조되지 않는 blob 과 썸네일/변형 삭제)")
+        sys.exit(1)
+
+    from gif_storage import create_storage
+    from gif_thumbnails import THUMBNAIL_DIRNAME, thumbnail_paths
+    from gif_transcode import VARIANT_DIRNAME, variant_paths
+
+    store = BlobStore(os.path.join(os.environ.get('GIF_BASE_DIRECTORY', '/opt/mattermost/client/gifs'), BLOB_DIRNAME))
+    storage = create_storage(
+        os.environ.get('GIF_STORAGE_BACKEND', 'json'),
+        'users_gifs.json',
+        os.environ.get('GIF_SHARD_DIRECTORY', 'users_gifs'),
+        os.environ.get('GIF_SQLITE_PATH', 'users_gifs.db'),
+    )
+    if not storage.exists():
+        print("❌ 저장소가 없습니다.")
+        sys.exit(1)
+    min_age = float(sys.argv[2]) if len(sys.argv) > 2 else 3600.0
+    removed = store.sweep(referenced_digests(storage.iter_gifs()), min_age,
+                          lambda path: [*thumbnail_paths(path), *variant_paths(path).values()])
+    orphans = store.sweep_orphans((THUMBNAIL_DIRNAME, VARIANT_DIRNAME), min_age)
+    print(f"✅ 참조되지 않는 blob {len(removed)}개, 원본 없는 썸네일/변형 {len(orphans)}개를 삭제했습니다.")
@@ -0,0 +1,576 @@
+import contextlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, ContextManager, Dict, Iterable, List, Optional, Set, Tuple
+
+UsersGifs = Dict[str, List[Dict[str, Any]]]
+
+# 변경 작업: ('init', gifs) / ('add', gif) / ('remove', gif_id) / ('update', gif_id, changes) / ('replace', gifs)
+#           / ('add_many', gifs) / ('remove_many', gif_ids)
+Operation = Tuple[Any, ...]
+
+
+def build_id_index(user_id: str, gifs: List[Any]) -> Dict[str, Any]:
+    """사용자 목록의 id -> GIF 인덱스 (같은 id 가 여러 개면 첫 번째 항목)"""
+    index: Dict[str, Any] = {}
+    for gif in gifs:
+        if gif.get('userId') == user_id:
+            index.setdefault(gif['id'], gif)
+    return index
+
+
+def _index_add(user_id: str, index: Optional[Dict[str, Any]], gifs: Iterable[Any]) -> None:
+    if index is not None:
+        for gif in gifs:
+            if gif.get('userId') == user_id:
+                index.setdefault(gif['id'], gif)
+
+
+def apply_operation(user_id: str, gifs: Optional[List[Dict[str, Any]]], op: Operation,
+                    index: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
+    """사용자 목록(없으면 None)에 변경 작업 하나를 적용한 새 목록 반환
+
+    'init' 은 사용자가 아직 없을 때만 적용되므로, 다른 워커가 먼저 만든 목록을 덮어쓰지 않는다.
+    index 를 주면 (gifs 의 build_id_index 결과) 반환하는 목록에 맞게 그 자리에서 갱신한다.
+    """
+    kind = op[0]
+    if kind in ('init', 'replace'):
+        if kind == 'init' and gifs is not None:
+            return gifs
+        result = list(op[1])
+        if index is not None:
+            index.clear()
+            _index_add(user_id, index, result)
+        return result
+    gifs = gifs or []
+    if kind == 'add':
+        _index_add(user_id, index, (op[1],))
+        return gifs + [op[1]]
+    if kind == 'add_many':
+        _index_add(user_id, index, op[1])
+        return gifs + list(op[1])
+    if kind == 'remove_many':
+        # id 마다 첫 번째 항목만 제거 ('remove' 를 여러 번 적용한 것과 같지만 한 번에 훑음)
+        remaining = set(op[1])
+        kept = []
+        for gif in gifs:
+            if gif['id'] in remaining and gif['userId'] == user_id:
+                remaining.discard(gif['id'])
+            else:
+                kept.append(gif)
+        if index is not None:
+            removed = set(op[1]) - remaining
+            for gif_id in removed:
+                index.pop(gif_id, None)
+            _index_add(user_id, index, (gif for gif in kept if gif['id'] in removed))
+        return kept
+    for i, gif in enumerate(gifs):
+        if gif['id'] == op[1] and gif['userId'] == user_id:
+            if kind == 'remove':
+                result = gifs[:i] + gifs[i + 1:]
+                if index is not None:
+                    index.pop(op[1], None)
+                    _index_add(user_id, index, (other for other in gifs[i + 1:] if other['id'] == op[1]))
+                return result
+            updated = op[2] if kind == 'replace_gif' else {**gif, **op[2]}
+            if index is not None:
+                index[op[1]] = updated
+            return gifs[:i] + [updated] + gifs[i + 1:]
+    return gifs
+
+
+class GifCatalog:
+    """프로세스 상주 GIF 카탈로그
+
+    시작 시 한 번만 로드하고 읽기는 메모리에서 처리한다.
+    변경 작업은 flush_interval 초마다 또는 flush_threshold 개가 쌓이면 한꺼번에 기록한다 (write-behind).
+    기록할 때는 프로세스 간 잠금(process_lock)을 잡고 디스크의 최신 목록에 작업을 다시 적용하므로
+    여러 워커 프로세스가 같은 저장소를 써도 서로의 변경을 덮어쓰지 않는다. apply_fn 이 있으면
+    목록을 다시 저장하는 대신 작업 자체를 저장소에 넘기고, 기록 후 해당 사용자 목록만 다시 읽는다.
+    sync() 는 호출 시점까지의 변경이 디스크에 기록될 때까지 기다린다. 여러 요청의 sync() 는
+    진행 중인 기록이 끝나는 동안 쌓인 작업과 함께 다음 한 번의 기록으로 묶인다 (group commit).
+    사용자 목록은 변경 시 새 리스트로 교체하므로 (copy-on-write)
+    반환된 리스트는 잠금 없이 읽어도 안전하다.
+
+    max_cached_gifs 가 양수면 지연 로드 모드로, 시작 시 아무것도 읽지 않고 요청된 사용자 목록만
+    load_users_fn 으로 읽어 올린다. 메모리에 있는 GIF 수 합계가 max_cached_gifs 를 넘으면
+    오래 쓰지 않은 사용자부터 내보내고 (on_evict), 기록 대기/기록 중인 사용자는 내보내지 않는다.
+    저장소 읽기는 카탈로그 잠금 안에서 하므로 내보낸 직후의 오래된 목록을 다시 올리는 일이 없다.
+    """
+
+    def __init__(self,
+                 load_fn: Callable[[], UsersGifs],
+                 load_users_fn: Callable[[Iterable[str]], UsersGifs],
+                 save_fn: Callable[[UsersGifs], bool],
+                 path: Optional[str] = None,
+                 process_lock: Callable[[], ContextManager] = contextlib.nullcontext,
+                 flush_interval: float = 1.0,
+                 flush_threshold: int = 100,
+                 pack: Callable[[Dict[str, Any]], Any] = None,
+                 unpack: Callable[[Any], Dict[str, Any]] = None,
+                 max_cached_gifs: int = 0,
+                 apply_fn: Optional[Callable[[List[Tuple[str, Operation]]], bool]] = None):
+        self._load_fn = load_fn
+        self._load_users_fn = load_users_fn
+        self._save_fn = save_fn
+        # 저장소가 변경 작업을 직접 적용할 수 있으면 (SQLite) 사용자 목록 전체 대신 작업만 기록
+        self._apply_fn = apply_fn
+        self._path = path
+        self._process_lock = process_lock
+        # 메모리 표현 <-> 저장소 dict 변환 (예: gif_records.LocalGif). 없으면 dict 그대로 보관
+        self._pack = pack
+        self._unpack = unpack
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self.max_cached_gifs = max_cached_gifs
+
+        self._lock = threading.RLock()
+        self._flush_lock = threading.Lock()
+        self._users: UsersGifs = {}
+        # 사용자별 (목록, id -> GIF 인덱스). 카탈로그의 변경은 apply_operation 이 인덱스를 함께 갱신하고,
+        # 그 밖에 목록이 통째로 바뀌면 (로드, 기록 후 반영) 다음 조회 때 다시 만든다
+        self._id_index: Dict[str, Any] = {}
+        # 지연 로드 모드: 사용자 -> GIF 수 (오래 쓰지 않은 순), 메모리에 있는 GIF 수 합계, 조회/내보내기 횟수
+        self._lru: 'OrderedDict[str, int]' = OrderedDict()
+        self._cached_gifs = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # 아직 기록되지 않은 (user_id, 작업) 목록
+        self._pending: List[Tuple[str, Operation]] = []
+        # 지금 디스크에 기록 중인 사용자 (기록이 끝날 때까지 내보내지 않음)
+        self._flushing: Set[str] = set()
+        # 기록된 작업 수 / 디스크에 기록 완료된 작업 수 (sync 대기용)
+        self._seq = 0
+        self._durable_seq = 0
+        self._durable = threading.Condition(self._lock)
+        self._mtime: Optional[float] = None
+
+        # on_add / on_remove / on_update / on_replace (와 선택적으로 on_evict) 를 구현한 리스너 (카탈로그 잠금 안에서 호출)
+        self._listeners: List[Any] = []
+
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def lock(self) -> threading.RLock:
+        return self._lock
+
+    def add_listener(self, listener: Any) -> None:
+        """변경 이벤트 리스너 등록"""
+        self._listeners.append(listener)
+
+    @property
+    def lazy(self) -> bool:
+        return self.max_cached_gifs > 0
+
+    def _notify(self, event: str, user_id: str, payload: Any) -> None:
+        for listener in self._listeners:
+            handler = getattr(listener, event, None)
+            if handler is not None:
+                handler(user_id, payload)
+
+    def _pack_list(self, gifs: List[Any]) -> List[Any]:
+        if self._pack is None:
+            return list(gifs)
+        return [self._pack(gif) for gif in gifs]
+
+    def _pack_users(self, users: UsersGifs) -> UsersGifs:
+        return {user_id: self._pack_list(gifs) for user_id, gifs in users.items()}
+
+    def _unpack_op(self, op: Operation) -> Operation:
+        """작업 안의 메모리 표현 레코드를 저장소 dict 로 변환"""
+        if self._unpack is None:
+            return op
+        kind = op[0]
+        if kind == 'add':
+            return (kind, self._unpack(op[1]))
+        if kind in ('init', 'replace', 'add_many'):
+            return (kind, [self._unpack(gif) for gif in op[1]])
+        if kind == 'replace_gif':
+            return (kind, op[1], self._unpack(op[2]))
+        return op
+
+    def _unpack_users(self, users: UsersGifs) -> UsersGifs:
+        if self._unpack is None:
+            return users
+        return {user_id: [self._unpack(gif) for gif in gifs] for user_id, gifs in users.items()}
+
+    # ------------------------------------------------------------------
+    # 로드 / 리로드
+    # ------------------------------------------------------------------
+    def _file_mtime(self) -> Optional[float]:
+        if not self._path:
+            return None
+        try:
+            return os.stat(self._path).st_mtime
+        except OSError:
+            return None
+
+    def load(self) -> None:
+        """저장소에서 전체 카탈로그를 로드 (지연 로드 모드면 비우기만 하고 사용자 목록은 요청 때 읽음)"""
+        users = {} if self.lazy else self._pack_users(self._load_fn())
+        with self._lock:
+            previous = self._users
+            self._users = users
+            self._id_index = {}
+            self._lru.clear()
+            self._cached_gifs = 0
+            self._pending = []
+            self._mark_durable(self._seq)
+            self._mtime = self._file_mtime()
+            for user_id in set(previous) | set(users):
+                self._notify('on_replace', user_id, users.get(user_id, []))
+
+    def reload_if_changed(self) -> bool:
+        """파일 mtime 이 바뀌었으면 (다른 워커, add_user_gifs.py 등 외부 수정) 다시 로드
+
+        아직 기록되지 않은 작업이 있는 사용자의 목록은 메모리 쪽을 유지한다.
+        지연 로드 모드면 메모리에 있는 사용자만 다시 읽는다.
+        """
+        mtime = self._file_mtime()
+        if mtime is None or mtime == self._mtime:
+            return False
+
+        if self.lazy:
+            with self._lock:
+                resident = list(self._users)
+            users = self._pack_users(self._load_users_fn(resident))
+            with self._lock:
+                pending_users = {user_id for user_id, _ in self._pending}
+                for user_id in resident:
+                    # 그 사이 내보낸 사용자는 다시 올리지 않는다
+                    if user_id not in self._users or user_id in pending_users:
+                        continue
+                    gifs = users.get(user_id)
+                    if gifs is None:
+                        self._drop_user(user_id)
+                        self._notify('on_replace', user_id, [])
+                    else:
+                        self._put_user(user_id, gifs, touch=False)
+                        self._notify('on_replace', user_id, gifs)
+                self._mtime = mtime
+            return True
+
+        users = self._pack_users(self._load_fn())
+        with self._lock:
+            for user_id, _ in self._pending:
+                if user_id in self._users:
+                    users[user_id] = self._users[user_id]
+            previous = self._users
+            self._users = users
+            self._mtime = mtime
+            for user_id in set(previous) | set(users):
+                if previous.get(user_id) is not users.get(user_id):
+                    self._notify('on_replace', user_id, users.get(user_id, []))
+        return True
+
+    # ------------------------------------------------------------------
+    # 읽기 / 쓰기
+    # ------------------------------------------------------------------
+    def user_sizes(self) -> Dict[str, int]:
+        """사용자별 GIF 수 (메트릭용, 지연 로드 모드면 메모리에 있는 사용자만)"""
+        with self._lock:
+            return {user_id: len(gifs) for user_id, gifs in self._users.items()}
+
+    def pending_count(self) -> int:
+        """아직 기록되지 않은 작업 수"""
+        return len(self._pending)
+
+    def is_resident(self, user_id: str) -> bool:
+        """사용자 목록이 메모리에 있는지 (지연 로드 모드에서 저장소 읽기가 필요한지 확인용)"""
+        return user_id in self._users
+
+    def cached_gifs(self) -> int:
+        """지연 로드 모드에서 메모리에 있는 GIF 수"""
+        return self._cached_gifs
+
+    def get_user_gifs(self, user_id: str) -> Optional[List[Dict[str, Any]]]:
+        """사용자 GIF 목록 반환 (없으면 None). 반환값은 수정하지 말 것"""
+        gifs = self._users.get(user_id)
+        if not self.lazy:
+            return gifs
+        if gifs is not None:
+            self.hits += 1
+            try:
+                self._lru.move_to_end(user_id)
+            except KeyError:  # 그 사이 내보내짐 (목록 자체는 그대로 읽어도 됨)
+                pass
+            return gifs
+        with self._lock:
+            return self._resident(user_id)
+
+    def find_user_gif(self, user_id: str, gif_id: str) -> Optional[Dict[str, Any]]:
+        """id 인덱스로 사용자 GIF 하나 조회"""
+        gifs = self.get_user_gifs(user_id)
+        if gifs is None:
+            return None
+        cached = self._id_index.get(user_id)
+        if cached is None or cached[0] is not gifs:
+            cached = (gifs, build_id_index(user_id, gifs))
+            self._id_index[user_id] = cached
+        return cached[1].get(gif_id)
+
+    def _apply(self, user_id: str, op: Operation) -> List[Any]:
+        """메모리의 사용자 목록에 작업을 적용해 교체 (id 인덱스는 다시 만들지 않고 갱신, 카탈로그 잠금 안에서 호출)"""
+        gifs = self._resident(user_id)
+        cached = self._id_index.get(user_id)
+        # 잠금 없이 읽는 쪽이 쓰는 인덱스는 고치지 않고, 복사본을 갱신해 새 목록과 한 번에 교체한다
+        # (목록도 copy-on-write 로 새로 만들므로 복사 비용은 같은 차수)
+        index = dict(cached[1]) if cached is not None and cached[0] is gifs else build_id_index(user_id, gifs or [])
+        result = apply_operation(user_id, gifs, op, index)
+        self._put_user(user_id, result)
+        if user_id in self._users:
+            self._id_index[user_id] = (result, index)
+        return result
+
+    # ------------------------------------------------------------------
+    # 지연 로드 / 내보내기 (카탈로그 잠금 안에서 호출)
+    # ------------------------------------------------------------------
+    def _resident(self, user_id: str) -> Optional[List[Any]]:
+        """메모리의 사용자 목록 (지연 로드 모드면 없을 때 저장소에서 읽어 올림, 저장소에도 없으면 None)"""
+        gifs = self._users.get(user_id)
+        if not self.lazy:
+            return gifs
+        if gifs is not None:
+            self._lru.move_to_end(user_id)
+            return gifs
+        self.misses += 1
+        loaded = self._load_users_fn([user_id]).get(user_id)
+        if loaded is None:
+            return None
+        gifs = self._pack_list(loaded)
+        self._put_user(user_id, gifs)
+        self._notify('on_replace', user_id, gifs)
+        return gifs
+
+    def _put_user(self, user_id: str, gifs: List[Any], touch: bool = True) -> None:
+        # touch 가 아니면 (기록 후 반영, 리로드) 순서를 바꾸지 않고 내보내기도 다음 변경으로 미룬다
+        self._users[user_id] = gifs
+        if not self.lazy:
+            return
+        self._cached_gifs += len(gifs) - self._lru.get(user_id, 0)
+        self._lru[user_id] = len(gifs)
+        if touch:
+            self._lru.move_to_end(user_id)
+            self._evict()
+
+    def _drop_user(self, user_id: str) -> None:
+        self._users.pop(user_id, None)
+        self._id_index.pop(user_id, None)
+        self._cached_gifs -= self._lru.pop(user_id, 0)
+
+    def _evict(self) -> None:
+        """GIF 수 합계가 max_cached_gifs 이하가 될 때까지 오래 쓰지 않은 사용자부터 내보냄
+
+        기록 대기/기록 중인 사용자와 가장 최근에 쓴 사용자는 남긴다.
+        """
+        if self._cached_gifs <= self.max_cached_gifs:
+            return
+        busy = self._flushing | {user_id for user_id, _ in self._pending}
+        skipped = 0
+        while self._cached_gifs > self.max_cached_gifs and skipped < len(self._lru) - 1:
+            user_id = next(iter(self._lru))
+            if user_id in busy:
+                self._lru.move_to_end(user_id)
+                skipped += 1
+                continue
+            gifs = self._users.get(user_id, [])
+            self._drop_user(user_id)
+            self.evictions += 1
+            self._notify('on_evict', user_id, gifs)
+
+    def set_user_gifs(self, user_id: str, gifs: List[Dict[str, Any]]) -> None:
+        """사용자 GIF 목록 교체 후 기록 대기열에 추가"""
+        with self._lock:
+            self._put_user(user_id, self._pack_list(gifs))
+            self._record(user_id, ('replace', self._users[user_id]))
+            self._notify('on_replace', user_id, self._users[user_id])
+        self._maybe_flush()
+
+    def init_user_gifs(self, user_id: str, gifs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """새 사용자 목록 초기화 (저장소에 이미 있는 사용자면 기록 시 저장소 쪽을 유지)"""
+        with self._lock:
+            if self._resident(user_id) is None:
+                self._put_user(user_id, self._pack_list(gifs))
+                self._record(user_id, ('init', self._users[user_id]))
+                self._notify('on_replace', user_id, self._users[user_id])
+            result = self._users[user_id]
+        self._maybe_flush()
+        return result
+
+    def add_user_gif(self, user_id: str, gif: Dict[str, Any]) -> None:
+        """사용자 목록 끝에 GIF 추가"""
+        if self._pack is not None:
+            gif = self._pack(gif)
+        with self._lock:
+            self._apply(user_id, ('add', gif))
+            self._record(user_id, ('add', gif))
+            self._notify('on_add', user_id, gif)
+        self._maybe_flush()
+
+    def remove_user_gif(self, user_id: str, gif_id: str) -> Optional[Dict[str, Any]]:
+        """사용자 목록에서 GIF 제거 후 제거된 항목 반환 (없으면 None)"""
+        with self._lock:
+            removed = self.find_user_gif(user_id, gif_id)
+            if removed is None:
+                return None
+            self._apply(user_id, ('remove', gif_id))
+            self._record(user_id, ('remove', gif_id))
+            self._notify('on_remove', user_id, removed)
+        self._maybe_flush()
+        return removed
+
+    def add_user_gifs(self, user_id: str, gifs: List[Dict[str, Any]]) -> None:
+        """사용자 목록 끝에 GIF 여러 개 추가 (작업 하나로 기록되므로 한 번의 저장에 함께 반영)"""
+        gifs = self._pack_list(gifs)
+        with self._lock:
+            self._apply(user_id, ('add_many', gifs))
+            self._record(user_id, ('add_many', gifs))
+            for gif in gifs:
+                self._notify('on_add', user_id, gif)
+        self._maybe_flush()
+
+    def remove_user_gifs(self, user_id: str, gif_ids: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """사용자 목록에서 GIF 여러 개 제거 후 gif_ids 순서대로 제거된 항목 반환 (없던 id 는 None)"""
+        with self._lock:
+            results = []
+            seen: Dict[str, None] = {}  # 같은 id 가 여러 번 오면 처음 것만 제거
+            for gif_id in gif_ids:
+                removed = self.find_user_gif(user_id, gif_id) if gif_id not in seen else None
+                results.append(removed)
+                if removed is not None:
+                    seen[gif_id] = None
+            found = list(seen)
+            if found:
+                self._apply(user_id, ('remove_many', found))
+                self._record(user_id, ('remove_many', found))
+                for removed in results:
+                    if removed is not None:
+                        self._notify('on_remove', user_id, removed)
+        self._maybe_flush()
+        return results
+
+    def update_user_gif(self, user_id: str, gif_id: str, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """사용자 GIF 하나의 필드 갱신 후 새 항목 반환 (없으면 None)"""
+        with self._lock:
+            gif = self.find_user_gif(user_id, gif_id)
+            if gif is None:
+                return None
+            updated = {**gif, **changes}
+            if self._pack is not None:
+                updated = self._pack(updated)
+            self._apply(user_id, ('replace_gif', gif_id, updated))
+            self._record(user_id, ('update', gif_id, changes))
+            self._notify('on_update', user_id, updated)
+        self._maybe_flush()
+        return updated
+
+    def _record(self, user_id: str, op: Operation) -> None:
+        self._pending.append((user_id, op))
+        self._seq += 1
+
+    def _maybe_flush(self) -> None:
+        # flush_interval <= 0 이면 write-through, 아니면 임계치 도달 시 스레드를 깨움
+        if self.flush_interval <= 0:
+            self.flush()
+        elif len(self._pending) >= self.flush_threshold:
+            self._wakeup.set()
+
+    # ------------------------------------------------------------------
+    # 디스크 기록
+    # ------------------------------------------------------------------
+    def _mark_durable(self, seq: int) -> None:
+        if seq > self._durable_seq:
+            self._durable_seq = seq
+            self._durable.notify_all()
+
+    def sync(self, timeout: Optional[float] = None) -> bool:
+        """지금까지의 변경이 디스크에 기록될 때까지 대기 (시간 초과면 False)"""
+        with self._lock:
+            target = self._seq
+            if self._durable_seq >= target:
+                return True
+        if self._thread is None:
+            self.flush()
+        else:
+            self._wakeup.set()
+        with self._lock:
+            return self._durable.wait_for(lambda: self._durable_seq >= target, timeout)
+
+    def flush(self) -> bool:
+        """쌓인 작업을 디스크의 최신 목록에 다시 적용해 한 번에 저장"""
+        with self._flush_lock:
+            with self._lock:
+                if not self._pending:
+                    self._mark_durable(self._seq)
+                    return True
+                pending = self._pending
+                self._pending = []
+                target = self._seq
+                user_ids = {user_id for user_id, _ in pending}
+                self._flushing = user_ids
+
+            ok = False
+            mtime = None
+            try:
+                with self._process_lock():
+                    if self._apply_fn is not None:
+                        ok = self._apply_fn([(user_id, self._unpack_op(op)) for user_id, op in pending])
+                        merged = self._load_users_fn(user_ids) if ok else {}
+                    else:
+                        merged = self._load_users_fn(user_ids)
+                        for user_id, op in pending:
+                            merged[user_id] = apply_operation(user_id, merged.get(user_id), op)
+                        ok = self._save_fn(self._unpack_users(merged))
+                    mtime = self._file_mtime()
+            except Exception as e:
+                print(f"카탈로그 기록 중 오류: {e}")
+
+            with self._lock:
+                if not ok:
+                    # 실패한 작업은 다음 주기에 다시 시도
+                    self._pending = pending + self._pending
+                    self._flushing = set()
+                    return False
+                self._mark_durable(target)
+                self._mtime = mtime
+                # 다른 프로세스의 변경이 합쳐졌으면 메모리에도 반영 (그 사이 들어온 작업은 다시 적용)
+                for user_id in user_ids:
+                    current = self._pack_list(merged.get(user_id, []))
+                    for pending_user, op in self._pending:
+                        if pending_user == user_id:
+                            current = apply_operation(user_id, current, op)
+                    if current != self._users.get(user_id):
+                        self._put_user(user_id, current, touch=False)
+                        self._notify('on_replace', user_id, current)
+                self._flushing = set()
+            return True
+
+    def start(self) -> None:
+        """백그라운드 flush 스레드 시작"""
+        if self._thread is not None or self.flush_interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name='gif-catalog-flush', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """flush 스레드 종료 및 남은 변경 사항 저장"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+                self.reload_if_changed()
+            except Exception as e:
+                print(f"카탈로그 flush 중 오류: {e}")
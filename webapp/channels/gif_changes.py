@@ -0,0 +1,231 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from gif_serialization import serializer
+from gif_storage import FSYNC_WRITES
+
+
+class ChangeLog:
+    """사용자별 GIF 변경 기록 (추가/삭제/갱신, GifCatalog 리스너)
+
+    카탈로그의 on_add / on_remove / on_update 로 들어온 이 프로세스의 변경을 모아 두었다가
+    flush() 에서 SQLite(WAL) 의 changes 테이블에 한 트랜잭션으로 추가한다. seq 는 AUTOINCREMENT 라
+    여러 워커 프로세스가 같은 파일에 써도 전체에서 단조 증가하고, 쓰기 잠금 안에서 번호를 받고 커밋하므로
+    seq 가 N 인 기록이 보이면 N 이하의 기록은 모두 보인다. on_replace (로드, 다른 워커 변경 반영)는
+    그 변경을 만든 워커가 이미 기록했으므로 무시한다.
+
+    retention 초보다 오래된 기록은 지우고, 지운 마지막 seq 를 pruned_through 로 남긴다.
+    그보다 이전 seq 부터 요청하면 빠진 기록이 있을 수 있으므로 전체 목록을 다시 받으라고 알린다 (is_stale).
+    백그라운드 스레드가 poll_interval 마다 쌓인 기록을 쓰고 다른 워커가 쓴 최신 seq 를 읽어
+    wait_newer() 로 기다리는 요청을 깨운다.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            gif_id TEXT NOT NULL,
+            data TEXT,
+            created REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_changes_user_seq ON changes (user_id, seq);
+        CREATE TABLE IF NOT EXISTS change_meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self,
+                 path: str,
+                 retention: float = 7 * 24 * 3600,
+                 poll_interval: float = 0.5,
+                 prune_interval: float = 3600.0,
+                 unpack: Callable[[Any], Dict[str, Any]] = None,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.retention = retention
+        self.poll_interval = poll_interval
+        self.prune_interval = prune_interval
+        self._unpack = unpack
+        self._clock = clock
+        self._local = threading.local()
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        # 아직 기록하지 않은 (user_id, 종류, gif_id, 레코드 또는 None, 시각)
+        self._pending: List[Tuple[str, str, str, Any, float]] = []
+        # 이 프로세스가 아는 가장 큰 seq 와 지워진 마지막 seq
+        self.latest = 0
+        self.pruned_through = 0
+
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=FULL' if FSYNC_WRITES else 'PRAGMA synchronous=NORMAL')
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # GifCatalog 리스너 인터페이스 (카탈로그 잠금 안에서 호출되므로 모아 두기만 함)
+    # ------------------------------------------------------------------
+    def _append(self, user_id: str, kind: str, gif: Any) -> None:
+        record = gif if kind != 'remove' else None
+        with self._lock:
+            self._pending.append((user_id, kind, gif['id'], record, self._clock()))
+
+    def on_add(self, user_id: str, gif: Dict[str, Any]) -> None:
+        self._append(user_id, 'add', gif)
+
+    def on_remove(self, user_id: str, gif: Dict[str, Any]) -> None:
+        self._append(user_id, 'remove', gif)
+
+    def on_update(self, user_id: str, gif: Dict[str, Any]) -> None:
+        self._append(user_id, 'update', gif)
+
+    def on_replace(self, user_id: str, gifs: List[Dict[str, Any]]) -> None:
+        pass
+
+    # ------------------------------------------------------------------
+    # 기록 / 조회
+    # ------------------------------------------------------------------
+    def _advance(self, latest: Optional[int], pruned_through: Optional[int] = None) -> None:
+        with self._lock:
+            if pruned_through is not None and pruned_through > self.pruned_through:
+                self.pruned_through = pruned_through
+            if latest is not None and latest > self.latest:
+                self.latest = latest
+                self._changed.notify_all()
+
+    def flush(self) -> bool:
+        """쌓인 변경을 한 트랜잭션으로 기록 (실패하면 다음에 다시 시도)"""
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, []
+            if not pending:
+                return True
+            rows = [
+                (user_id, kind, gif_id,
+                 serializer.dumps(self._unpack(gif) if self._unpack else gif).decode('utf-8') if gif is not None else None,
+                 created)
+                for user_id, kind, gif_id, gif, created in pending
+            ]
+            try:
+                conn = self._connection()
+                conn.execute('BEGIN IMMEDIATE')
+                try:
+                    conn.executemany(
+                        'INSERT INTO changes (user_id, kind, gif_id, data, created) VALUES (?, ?, ?, ?, ?)', rows)
+                    latest = conn.execute('SELECT MAX(seq) FROM changes').fetchone()[0]
+                    conn.execute('COMMIT')
+                except BaseException:
+                    conn.execute('ROLLBACK')
+                    raise
+            except Exception as e:
+                print(f"변경 기록 저장 중 오류: {e}")
+                with self._lock:
+                    self._pending = pending + self._pending
+                return False
+            self._advance(latest)
+            return True
+
+    def refresh(self) -> int:
+        """다른 프로세스가 쓴 기록까지 포함한 최신 seq 를 읽어 반영 (기다리는 요청을 깨움)"""
+        try:
+            conn = self._connection()
+            latest = conn.execute('SELECT MAX(seq) FROM changes').fetchone()[0]
+            row = conn.execute("SELECT value FROM change_meta WHERE key = 'pruned_through'").fetchone()
+        except Exception as e:
+            print(f"변경 기록 조회 중 오류: {e}")
+            return self.latest
+        self._advance(latest, row[0] if row else None)
+        return self.latest
+
+    def read(self, user_id: str, since: int, limit: int) -> Tuple[List[Dict[str, Any]], bool]:
+        """since 보다 뒤의 사용자 변경을 seq 순으로 최대 limit 개 반환 ((변경 목록, 더 있는지))"""
+        rows = self._connection().execute(
+            'SELECT seq, kind, gif_id, data, created FROM changes WHERE user_id = ? AND seq > ? ORDER BY seq LIMIT ?',
+            (user_id, since, limit + 1),
+        ).fetchall()
+        changes = []
+        for seq, kind, gif_id, data, created in rows[:limit]:
+            change = {'seq': seq, 'type': kind, 'gifId': gif_id, 'timestamp': created}
+            if data is not None:
+                change['gif'] = serializer.loads(data)
+            changes.append(change)
+        return changes, len(rows) > limit
+
+    def is_stale(self, since: int) -> bool:
+        """since 이후 기록 중 일부가 이미 지워졌거나 since 가 아직 없는 seq 면 True (전체 목록을 다시 받아야 함)"""
+        if since > self.latest:
+            self.refresh()
+        return since < self.pruned_through or since > self.latest
+
+    def wait_newer(self, seen: int, timeout: float) -> int:
+        """latest 가 seen 보다 커질 때까지 최대 timeout 초 기다린 뒤 latest 반환"""
+        with self._lock:
+            self._changed.wait_for(lambda: self.latest > seen, timeout)
+            return self.latest
+
+    def prune(self) -> int:
+        """retention 보다 오래된 기록 삭제 후 지운 개수 반환"""
+        cutoff = self._clock() - self.retention
+        try:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                through = conn.execute('SELECT MAX(seq) FROM changes WHERE created < ?', (cutoff,)).fetchone()[0]
+                deleted = 0
+                if through is not None:
+                    deleted = conn.execute('DELETE FROM changes WHERE seq <= ?', (through,)).rowcount
+                    conn.execute(
+                        "INSERT INTO change_meta (key, value) VALUES ('pruned_through', ?) "
+                        "ON CONFLICT(key) DO UPDATE SET value = MAX(value, excluded.value)", (through,))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        except Exception as e:
+            print(f"변경 기록 정리 중 오류: {e}")
+            return 0
+        self._advance(None, through)
+        return deleted
+
+    # ------------------------------------------------------------------
+    # 백그라운드 스레드
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        """쌓인 기록 쓰기, 최신 seq 읽기, 오래된 기록 정리를 하는 스레드 시작"""
+        self.refresh()
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name='gif-changes', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        next_prune = time.monotonic()
+        while not self._stopped.wait(self.poll_interval):
+            self.flush()
+            self.refresh()
+            if self.retention > 0 and time.monotonic() >= next_prune:
+                self.prune()
+                next_prune = time.monotonic() + self.prune_interval
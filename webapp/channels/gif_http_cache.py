@@ -0,0 +1,77 @@
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional
+
+
+class UserVersions:
+    """사용자별 단조 증가 버전 (GifCatalog 리스너)
+
+    추가/삭제/갱신/교체 때마다 해당 사용자의 버전을 올린다.
+    재시작 후 같은 번호가 다른 내용을 가리키지 않도록 ETag 에는 boot_id 를 함께 넣는다.
+    """
+
+    def __init__(self):
+        self.boot_id = os.urandom(4).hex()
+        self._lock = threading.Lock()
+        self._versions: Dict[str, int] = {}
+
+    def get(self, user_id: str) -> int:
+        return self._versions.get(user_id, 0)
+
+    def bump(self, user_id: str) -> int:
+        with self._lock:
+            version = self._versions.get(user_id, 0) + 1
+            self._versions[user_id] = version
+            return version
+
+    def etag(self, user_id: str, version: int, variant: Hashable) -> str:
+        """버전과 요청 변형(경로/쿼리)으로 강한 ETag 값 생성 (따옴표 제외)"""
+        return f'{self.boot_id}-{version}-{zlib.crc32(repr(variant).encode()):08x}'
+
+    # GifCatalog 리스너 인터페이스
+    def on_add(self, user_id: str, gif: Dict[str, Any]) -> None:
+        self.bump(user_id)
+
+    def on_remove(self, user_id: str, gif: Dict[str, Any]) -> None:
+        self.bump(user_id)
+
+    def on_update(self, user_id: str, gif: Dict[str, Any]) -> None:
+        self.bump(user_id)
+
+    def on_replace(self, user_id: str, gifs: List[Dict[str, Any]]) -> None:
+        self.bump(user_id)
+
+
+class ResponseCache:
+    """직렬화된 응답 본문 LRU 캐시 ((user, version, 요청 변형) -> bytes)"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Hashable, body: bytes) -> None:
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,289 @@
+import bisect
+import contextlib
+import cProfile
+import functools
+import os
+import pstats
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 지연 시간 히스토그램 구간 (초)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 크기 히스토그램 구간 (바이트)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+
+
+class Counter(_Metric):
+    """증가만 하는 값 (레이블 조합별)"""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in values]
+
+
+class Histogram(_Metric):
+    """구간별 누적 개수와 합계 (레이블 조합별)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 레이블 조합 -> [구간별 개수..., +Inf 개수, 합계]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextlib.contextmanager
+    def time(self, **labels: Any):
+        """with 블록 실행 시간을 기록"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def count(self, **labels: Any) -> int:
+        counts = self._values.get(self._key(labels))
+        return int(sum(counts[:-1])) if counts else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts)) for key, counts in self._values.items()]
+        lines = []
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(counts[-1])}')
+            lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """수집 시점에 함수로 값을 읽는 gauge/counter (캐시 적중 수, 카탈로그 크기 등)
+
+    fn 은 [(레이블 값 tuple, 값)] 을 반환한다.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 fn: Callable[[], Iterable[Tuple[LabelValues, float]]], kind: str = 'gauge'):
+        super().__init__(name, documentation, labelnames)
+        self.kind = kind
+        self._fn = fn
+
+    def samples(self) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in self._fn()]
+
+
+class Registry:
+    """메트릭 모음과 Prometheus 텍스트 형식 출력"""
+
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(self, name: str, documentation: str, labelnames: Sequence[str],
+                 fn: Callable[[], Iterable[Tuple[LabelValues, float]]], kind: str = 'gauge') -> CallbackMetric:
+        return self.register(CallbackMetric(name, documentation, labelnames, fn, kind))
+
+    def render(self) -> bytes:
+        lines = []
+        for metric in self._metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                print(f"메트릭 수집 중 오류 ({metric.name}): {e}")
+                continue
+            lines.extend(metric.header())
+            lines.extend(samples)
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+# ----------------------------------------------------------------------
+# 서비스 공통 메트릭
+# ----------------------------------------------------------------------
+registry = Registry()
+
+REQUEST_SECONDS = registry.histogram(
+    'gif_http_request_duration_seconds', 'HTTP 요청 처리 시간', ('method', 'route', 'status'))
+REQUEST_BYTES = registry.histogram(
+    'gif_http_request_size_bytes', 'HTTP 요청 본문 크기', ('method', 'route'), SIZE_BUCKETS)
+RESPONSE_BYTES = registry.histogram(
+    'gif_http_response_size_bytes', 'HTTP 응답 본문 크기 (Content-Length 가 있는 응답)', ('method', 'route'), SIZE_BUCKETS)
+STORAGE_SECONDS = registry.histogram(
+    'gif_storage_operation_duration_seconds', '저장소/파일 작업 시간', ('operation', 'outcome'))
+SEARCH_SECONDS = registry.histogram(
+    'gif_search_duration_seconds', '사용자 GIF 검색 시간', ('kind',))
+JSON_SECONDS = registry.histogram(
+    'gif_json_duration_seconds', 'JSON 직렬화/파싱 시간', ('operation',))
+JSON_BYTES = registry.histogram(
+    'gif_json_size_bytes', 'JSON 직렬화/파싱 크기', ('operation',), SIZE_BUCKETS)
+ADMISSION_REJECTIONS = registry.counter(
+    'gif_admission_rejections_total', '크기/요청 수/동시 업로드 제한으로 거절한 요청 수', ('route', 'reason'))
+TRANSCODE_SECONDS = registry.histogram(
+    'gif_transcode_duration_seconds', '전송용 변형 인코딩 시간', ('format',),
+    (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0))
+TRANSCODE_SAVED_BYTES = registry.counter(
+    'gif_transcode_saved_bytes_total', '남긴 변형이 원본보다 줄인 바이트 수', ('format',))
+PROFILES = registry.counter(
+    'gif_profiles_total', '요청 헤더로 수집한 프로파일 수', ('route',))
+
+
+def timed(histogram: Histogram, **labels: Any):
+    """함수 실행 시간을 기록하는 데코레이터
+
+    histogram 에 outcome 레이블이 있으면 예외는 "error", 결과가 False/None (이 저장소의 실패 반환값) 이면
+    "failed", 나머지는 "ok" 로 나눠 기록한다.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = fn(*args, **kwargs)
+                outcome = 'failed' if result is None or result is False else 'ok'
+                return result
+            finally:
+                elapsed = time.perf_counter() - started
+                if 'outcome' in histogram.labelnames:
+                    histogram.observe(elapsed, outcome=outcome, **labels)
+                else:
+                    histogram.observe(elapsed, **labels)
+        return wrapper
+    return decorator
+
+
+# ----------------------------------------------------------------------
+# 요청 단위 프로파일링 (헤더로 켬)
+# ----------------------------------------------------------------------
+class RequestProfiler:
+    """요청 헤더의 토큰이 설정값과 같을 때만 그 요청을 cProfile 로 측정해 파일로 남긴다
+
+    토큰이 비어 있으면 꺼져 있다. 결과는 directory 의 .prof 파일 (pstats/snakeviz 로 열기) 과
+    상위 함수 요약 .txt 로 저장한다. cProfile 은 현재 스레드만 측정한다.
+    Python 3.12 부터는 프로파일러를 프로세스에 하나만 켤 수 있으므로 (두 번째 enable() 은 ValueError)
+    한 번에 한 요청만 측정하고, 측정 중에 온 요청은 start() 가 None 을 반환한다.
+    """
+
+    def __init__(self, token: str = '', directory: str = 'profiles', top: int = 40):
+        self.token = token
+        self.directory = directory
+        self.top = top
+        self._lock = threading.Lock()
+
+    def wants(self, header_value: Optional[str]) -> bool:
+        return bool(self.token) and header_value == self.token
+
+    def start(self) -> Optional[cProfile.Profile]:
+        """측정 시작 (다른 요청을 측정 중이면 None)"""
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            profile = cProfile.Profile()
+            profile.enable()
+        except BaseException:
+            self._lock.release()
+            raise
+        return profile
+
+    def discard(self, profile: cProfile.Profile) -> None:
+        """저장하지 않고 측정 종료"""
+        profile.disable()
+        self._lock.release()
+
+    def finish(self, profile: cProfile.Profile, route: str) -> Optional[str]:
+        """측정을 끝내고 저장한 .prof 경로 반환 (실패하면 None)"""
+        self.discard(profile)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            name = route.strip('/').replace('/', '_').replace('<', '').replace('>', '') or 'root'
+            stamp = time.strftime('%Y%m%d_%H%M%S') + f'_{int(time.time() * 1000) % 1000:03d}'
+            base = os.path.join(self.directory, f'{stamp}_{os.getpid()}_{threading.get_ident()}_{name}')
+            profile.dump_stats(base + '.prof')
+            with open(base + '.txt', 'w', encoding='utf-8') as f:
+                pstats.Stats(profile, stream=f).sort_stats('cumulative').print_stats(self.top)
+        except Exception as e:
+            print(f"프로파일 저장 실패: {e}")
+            return None
+        PROFILES.inc(route=route)
+        return base + '.prof'
@@ -0,0 +1,72 @@
+import base64
+import json
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+# fields= 에 쓸 수 있는 레코드 필드
+PROJECTABLE_FIELDS = ('id', 'title', 'url', 'thumbnailUrl', 'stillUrl', 'tags', 'userId', 'variants')
+
+
+def encode_cursor(position: int, gif_id: str) -> str:
+    """마지막으로 반환한 항목의 (위치, id) 를 불투명한 커서 문자열로 인코딩"""
+    raw = json.dumps([position, gif_id], ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """커서 문자열을 (위치, id) 로 디코딩 (형식이 틀리면 ValueError)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position, gif_id = json.loads(raw)
+    except (TypeError, ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f'잘못된 커서: {cursor}') from e
+    if not isinstance(position, int) or position < 0 or not isinstance(gif_id, str):
+        raise ValueError(f'잘못된 커서: {cursor}')
+    return position, gif_id
+
+
+def resume_position(gifs: Sequence[Dict[str, Any]], cursor: str) -> int:
+    """커서 다음 항목의 위치
+
+    보통은 기록된 위치의 id 가 그대로라 O(1) 이다. 그 사이 앞쪽 항목이 추가/삭제되었으면 id 로
+    다시 찾고, 커서 항목 자체가 삭제되었으면 뒤 항목들이 한 칸씩 당겨졌으므로 기록된 위치에서 이어간다.
+    """
+    position, gif_id = decode_cursor(cursor)
+    if position < len(gifs) and gifs[position]['id'] == gif_id:
+        return position + 1
+    for index, gif in enumerate(gifs):
+        if gif['id'] == gif_id:
+            return index + 1
+    return min(position, len(gifs))
+
+
+def page(gifs: Sequence[Dict[str, Any]],
+         limit: Optional[int] = None,
+         offset: int = 0,
+         cursor: Optional[str] = None) -> Tuple[Sequence[Dict[str, Any]], Optional[str]]:
+    """(페이지 항목, 다음 커서) 반환. cursor 가 있으면 offset 보다 우선하고, 마지막 페이지면 다음 커서는 None"""
+    start = resume_position(gifs, cursor) if cursor else offset
+    if limit is None:
+        return (gifs[start:] if start else gifs), None
+    end = start + limit
+    items = gifs[start:end]
+    if end < len(gifs) and items:
+        return items, encode_cursor(end - 1, items[-1]['id'])
+    return items, None
+
+
+def parse_fields(value: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """fields=id,title,thumbnailUrl 파싱 (없으면 None, 모르는 필드면 ValueError)"""
+    if value is None:
+        return None
+    fields = tuple(dict.fromkeys(f.strip() for f in value.split(',') if f.strip()))
+    unknown = [f for f in fields if f not in PROJECTABLE_FIELDS]
+    if unknown or not fields:
+        raise ValueError(f'알 수 없는 필드: {", ".join(unknown)}')
+    return fields
+
+
+def project(gifs: Sequence[Dict[str, Any]], fields: Optional[Tuple[str, ...]]) -> Sequence[Dict[str, Any]]:
+    """요청한 필드만 남긴 레코드 목록 (fields 가 None 이면 그대로, 직렬화는 gif_serialization 이 처리)"""
+    if fields is None:
+        return gifs
+    return [{field: gif[field] for field in fields if field in gif} for gif in gifs]
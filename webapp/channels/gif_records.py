@@ -0,0 +1,196 @@
+import argparse
+import gc
+import json
+import sys
+import time
+import tracemalloc
+import uuid
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+# 같은 태그 조합은 하나의 tuple 을 공유한다 (예: ("uploaded", "custom"))
+_tags_cache: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+BASE_FIELDS = ('id', 'title', 'url', 'thumbnailUrl', 'tags', 'userId')
+OPTIONAL_FIELDS = ('stillUrl', 'blob')
+# 저장소에만 두고 응답/변경 기록으로는 내보내지 않는 필드 (blob 해시는 내부 참조용)
+PRIVATE_FIELDS = ('blob',)
+
+
+def new_gif_id(prefix: str) -> str:
+    """충돌 없는 GIF ID (접두사 + 초 단위 시각 + 무작위 접미사)
+
+    같은 초에 같은 제목으로 여러 번 추가해도 겹치지 않는다 (카탈로그 id 인덱스, 검색 색인,
+    SQLite 기본 키, 변경 기록 모두 사용자 안에서 id 가 유일하다고 가정한다).
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    return f"{prefix}_{timestamp}_{uuid.uuid4().hex[:8]}"
+
+
+def intern_tags(tags) -> Tuple[str, ...]:
+    """태그 목록을 intern 된 문자열 tuple 로 변환 (같은 조합이면 같은 객체)"""
+    key = tuple(sys.intern(str(tag)) for tag in tags)
+    return _tags_cache.setdefault(key, key)
+
+
+class LocalGif(Mapping):
+    """카탈로그가 메모리에 들고 있는 GIF 레코드
+
+    dict 대신 __slots__ 객체로 두고, userId 와 url, 태그는 intern 해서
+    같은 값끼리 하나의 문자열/tuple 을 공유한다 (thumbnailUrl 이 url 과 같으면 같은 객체).
+    읽기 전용 Mapping 이므로 gif['id'], gif.get('blob'), {**gif, **changes} 같은 기존 코드가 그대로 동작하고,
+    저장할 때는 to_dict(), 응답으로 내보낼 때는 to_dict(private=False) 를 쓴다.
+    """
+
+    __slots__ = ('id', 'title', 'url', 'thumbnailUrl', 'tags', 'userId', 'stillUrl', 'blob', 'extra')
+
+    def __init__(self, id: str, title: str, url: str, thumbnailUrl: str, tags, userId: str,
+                 stillUrl: Optional[str] = None, blob: Optional[str] = None,
+                 extra: Optional[Dict[str, Any]] = None):
+        self.id = id
+        self.title = title
+        self.url = sys.intern(url)
+        self.thumbnailUrl = self.url if thumbnailUrl == url else sys.intern(thumbnailUrl)
+        self.tags = intern_tags(tags)
+        self.userId = sys.intern(userId)
+        self.stillUrl = sys.intern(stillUrl) if stillUrl is not None else None
+        self.blob = sys.intern(blob) if blob is not None else None
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> 'LocalGif':
+        """저장소/요청의 dict 로부터 생성 (이미 LocalGif 면 그대로)"""
+        if isinstance(data, LocalGif):
+            return data
+        extra = {k: v for k, v in data.items() if k not in cls.__slots__} if len(data) > 6 else None
+        return cls(
+            data['id'],
+            data.get('title', ''),
+            data.get('url', ''),
+            data.get('thumbnailUrl', ''),
+            data.get('tags', ()),
+            data.get('userId', ''),
+            data.get('stillUrl'),
+            data.get('blob'),
+            extra,
+        )
+
+    def to_dict(self, private: bool = True) -> Dict[str, Any]:
+        """dict 로 변환 (private=False 면 PRIVATE_FIELDS 제외)"""
+        result = {
+            'id': self.id,
+            'title': self.title,
+            'url': self.url,
+            'thumbnailUrl': self.thumbnailUrl,
+            'tags': list(self.tags),
+            'userId': self.userId
+        }
+        if self.stillUrl is not None:
+            result['stillUrl'] = self.stillUrl
+        if self.blob is not None and private:
+            result['blob'] = self.blob
+        if self.extra:
+            result.update(self.extra)
+        return result
+
+    # Mapping 인터페이스
+    def __getitem__(self, key: str) -> Any:
+        if key in BASE_FIELDS:
+            return getattr(self, key)
+        if key in OPTIONAL_FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from BASE_FIELDS
+        for key in OPTIONAL_FIELDS:
+            if getattr(self, key) is not None:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return (len(BASE_FIELDS)
+                + sum(getattr(self, key) is not None for key in OPTIONAL_FIELDS)
+                + len(self.extra or ()))
+
+    def __repr__(self) -> str:
+        return f'LocalGif({self.to_dict()!r})'
+
+
+def pack(gif: Mapping) -> LocalGif:
+    return LocalGif.from_dict(gif)
+
+
+def unpack(gif: Mapping) -> Dict[str, Any]:
+    """JSON 직렬화용 dict (LocalGif 가 아니면 그대로)"""
+    return gif.to_dict() if isinstance(gif, LocalGif) else gif
+
+
+def public(gif: Mapping) -> Dict[str, Any]:
+    """응답/변경 기록용 dict (PRIVATE_FIELDS 제외)"""
+    if isinstance(gif, LocalGif):
+        return gif.to_dict(private=False)
+    if any(field in gif for field in PRIVATE_FIELDS):
+        return {key: value for key, value in gif.items() if key not in PRIVATE_FIELDS}
+    return gif
+
+
+# ----------------------------------------------------------------------
+# 메모리 벤치마크: python gif_records.py [--count 1000000]
+# ----------------------------------------------------------------------
+def _sample_json(count: int, users: int) -> str:
+    """users_gifs.json 과 같은 형태의 레코드 목록 JSON (blob 절반은 중복)"""
+    gifs = []
+    for i in range(count):
+        digest = f'{i % (count // 2 or 1):064x}'
+        url = f'/static/gifs/blobs/{digest[:2]}/{digest}.gif'
+        gifs.append({
+            'id': f'gif_{i:08d}_20241201_123456',
+            'title': f'gif {i}',
+            'url': url,
+            'thumbnailUrl': url,
+            'tags': ['uploaded', 'custom'],
+            'userId': f'user{i % users:05d}',
+            'blob': digest
+        })
+    return json.dumps(gifs)
+
+
+def _measure(build) -> Tuple[int, float, Any]:
+    """build() 결과가 붙잡고 있는 메모리 (문자열 포함) 와 소요 시간"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, result
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="dict 와 LocalGif 레코드의 메모리 사용량 비교")
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    text = _sample_json(args.count, args.users)
+
+    size, elapsed, dicts = _measure(lambda: json.loads(text))
+    print(f"dict     : {size / args.count:7.1f} bytes/record ({size / 1e6:.0f} MB, {elapsed:.1f}s)")
+    del dicts
+
+    size, elapsed, records = _measure(lambda: [pack(g) for g in json.loads(text)])
+    print(f"LocalGif : {size / args.count:7.1f} bytes/record ({size / 1e6:.0f} MB, {elapsed:.1f}s)")
+
+    started = time.perf_counter()
+    for record in records:
+        record.to_dict()
+    print(f"to_dict  : {(time.perf_counter() - started) / args.count * 1e9:7.1f} ns/record")
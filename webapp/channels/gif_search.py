@@ -0,0 +1,173 @@
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# 1~3 글자 부분 문자열을 모두 색인한다.
+# 3글자 이하 검색어는 posting 하나로, 더 긴 검색어는 3-gram 교집합으로 후보를 찾은 뒤
+# 실제 부분 문자열 포함 여부를 확인하므로 기존 `query in text` 의미가 그대로 유지된다.
+MAX_GRAM = 3
+
+# 랭킹 점수 (작을수록 앞)
+SCORE_TITLE_EXACT = 0
+SCORE_TITLE_PREFIX = 1
+SCORE_TAG_EXACT = 2
+SCORE_TAG_PREFIX = 3
+SCORE_TITLE_SUBSTRING = 4
+SCORE_TAG_SUBSTRING = 5
+
+
+def _grams(text: str) -> Set[str]:
+    grams = set()
+    for size in range(1, MAX_GRAM + 1):
+        for i in range(len(text) - size + 1):
+            grams.add(text[i:i + size])
+    return grams
+
+
+def _score(query: str, title: str, tags: Tuple[str, ...]) -> Optional[int]:
+    if title == query:
+        return SCORE_TITLE_EXACT
+    if title.startswith(query):
+        return SCORE_TITLE_PREFIX
+    if query in tags:
+        return SCORE_TAG_EXACT
+    if any(tag.startswith(query) for tag in tags):
+        return SCORE_TAG_PREFIX
+    if query in title:
+        return SCORE_TITLE_SUBSTRING
+    if any(query in tag for tag in tags):
+        return SCORE_TAG_SUBSTRING
+    return None
+
+
+class UserSearchIndex:
+    """한 사용자의 제목/태그 n-gram 역색인"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # gif_id -> (순번, 소문자 제목, 소문자 태그들, 원본 dict)
+        self._docs: Dict[str, Tuple[int, str, Tuple[str, ...], Dict[str, Any]]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._next_seq = 0
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def _doc_grams(self, title: str, tags: Tuple[str, ...]) -> Set[str]:
+        grams = _grams(title)
+        for tag in tags:
+            grams |= _grams(tag)
+        return grams
+
+    def add(self, gif: Dict[str, Any]) -> None:
+        gif_id = gif['id']
+        title = gif.get('title', '').lower()
+        tags = tuple(tag.lower() for tag in gif.get('tags', []))
+        with self._lock:
+            if gif_id in self._docs:
+                # 갱신이면 기존 순번 유지
+                seq = self._docs[gif_id][0]
+                self._remove_locked(gif_id)
+            else:
+                seq = self._next_seq
+                self._next_seq += 1
+            self._docs[gif_id] = (seq, title, tags, gif)
+            for gram in self._doc_grams(title, tags):
+                self._postings.setdefault(gram, set()).add(gif_id)
+
+    def remove(self, gif_id: str) -> None:
+        with self._lock:
+            self._remove_locked(gif_id)
+
+    def _remove_locked(self, gif_id: str) -> None:
+        doc = self._docs.pop(gif_id, None)
+        if doc is None:
+            return
+        for gram in self._doc_grams(doc[1], doc[2]):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(gif_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def _candidates(self, query: str) -> Set[str]:
+        if len(query) <= MAX_GRAM:
+            return set(self._postings.get(query, ()))
+        postings = []
+        for i in range(len(query) - MAX_GRAM + 1):
+            posting = self._postings.get(query[i:i + MAX_GRAM])
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, query: str) -> List[Dict[str, Any]]:
+        """검색어(소문자)와 일치하는 GIF 를 랭킹 순으로 반환"""
+        with self._lock:
+            ranked = []
+            for gif_id in self._candidates(query):
+                seq, title, tags, gif = self._docs[gif_id]
+                score = _score(query, title, tags)
+                if score is not None:
+                    ranked.append((score, seq, gif))
+        ranked.sort(key=lambda item: (item[0], item[1]))
+        return [gif for _, _, gif in ranked]
+
+
+class GifSearchIndex:
+    """사용자별 역색인 모음
+
+    GifCatalog 리스너로 등록되어 추가/삭제 시 점진적으로 갱신되며,
+    아직 색인되지 않은 사용자는 첫 검색 때 카탈로그 목록으로 만든다.
+    리스너 호출과 색인 생성 모두 카탈로그 잠금 안에서 일어나므로 갱신이 누락되지 않는다.
+    """
+
+    def __init__(self, catalog):
+        self._catalog = catalog
+        self._users: Dict[str, UserSearchIndex] = {}
+
+    def _build(self, gifs: Iterable[Dict[str, Any]]) -> UserSearchIndex:
+        index = UserSearchIndex()
+        for gif in gifs:
+            index.add(gif)
+        return index
+
+    def search(self, user_id: str, query: str) -> List[Dict[str, Any]]:
+        """사용자 색인에서 검색 (색인이 없으면 카탈로그 목록으로 생성)"""
+        index = self._users.get(user_id)
+        if index is None:
+            with self._catalog.lock:
+                index = self._users.get(user_id)
+                if index is None:
+                    index = self._build(self._catalog.get_user_gifs(user_id) or [])
+                    self._users[user_id] = index
+        return index.search(query)
+
+    # GifCatalog 리스너 인터페이스
+    def on_add(self, user_id: str, gif: Dict[str, Any]) -> None:
+        index = self._users.get(user_id)
+        if index is not None:
+            index.add(gif)
+
+    def on_remove(self, user_id: str, gif: Dict[str, Any]) -> None:
+        index = self._users.get(user_id)
+        if index is not None:
+            index.remove(gif['id'])
+
+    def on_update(self, user_id: str, gif: Dict[str, Any]) -> None:
+        index = self._users.get(user_id)
+        if index is not None:
+            index.add(gif)
+
+    def on_replace(self, user_id: str, gifs: List[Dict[str, Any]]) -> None:
+        # 목록 전체가 바뀌면 다음 검색 때 다시 만든다
+        self._users.pop(user_id, None)
+
+    def on_evict(self, user_id: str, gifs: List[Dict[str, Any]]) -> None:
+        # 카탈로그에서 내보낸 사용자 (지연 로드) 의 색인도 버린다
+        self._users.pop(user_id, None)
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple, Union
+
+from gif_records import LocalGif
+
+try:
+    import orjson
+except ImportError:  # orjson 이 없으면 표준 json 으로 동작
+    orjson = None
+
+# 'auto' (orjson 이 있으면 사용), 'orjson', 'json'
+JSON_ENCODER = os.environ.get('GIF_JSON_ENCODER', 'auto')
+
+
+def _default(obj: Any) -> Any:
+    # LocalGif 는 응답으로만 직렬화된다 (저장소에는 카탈로그가 unpack 한 dict 를 넘김)
+    if isinstance(obj, LocalGif):
+        return obj.to_dict(private=False)
+    raise TypeError(f'JSON 으로 직렬화할 수 없는 타입: {type(obj).__name__}')
+
+
+class JsonSerializer:
+    """표준 json 기반 직렬화 (공백 없는 compact 출력, 비ASCII 문자는 그대로)"""
+
+    name = 'json'
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=_default).encode('utf-8')
+
+    def dumps_pretty(self, obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2, default=_default).encode('utf-8')
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonSerializer:
+    """orjson 기반 직렬화 (출력 형식은 JsonSerializer 와 같음)"""
+
+    name = 'orjson'
+
+    def dumps(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default)
+
+    def dumps_pretty(self, obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_INDENT_2)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return orjson.loads(data)
+
+
+def create_serializer(name: str = JSON_ENCODER):
+    """설정값으로 직렬화기 생성 ('auto' 면 orjson 우선)"""
+    if name == 'auto':
+        name = OrjsonSerializer.name if orjson is not None else JsonSerializer.name
+    if name == OrjsonSerializer.name:
+        if orjson is None:
+            raise ValueError('orjson 이 설치되어 있지 않습니다.')
+        return OrjsonSerializer()
+    if name == JsonSerializer.name:
+        return JsonSerializer()
+    raise ValueError(f'알 수 없는 JSON 인코더: {name}')
+
+
+# 저장소와 HTTP 응답이 함께 쓰는 기본 직렬화기
+serializer = create_serializer()
+
+
+class FragmentCache:
+    """GIF 레코드별로 미리 인코딩한 JSON 바이트 LRU
+
+    LocalGif 는 변경 시 새 객체로 교체되므로 (userId, id) 항목에 레코드 객체를 함께 두고
+    같은 객체일 때만 재사용한다. 목록 응답은 이 조각들을 이어 붙여 만든다.
+    """
+
+    def __init__(self, max_entries: int = 100_000, serializer=serializer):
+        self.max_entries = max_entries
+        self.serializer = serializer
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, Tuple[LocalGif, bytes]]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def encode(self, record: Any) -> bytes:
+        if not isinstance(record, LocalGif) or self.max_entries <= 0:
+            return self.serializer.dumps(record)
+        key = (record.userId, record.id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is record:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+        encoded = self.serializer.dumps(record)
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = (record, encoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return encoded
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def encode_payload(payload: Dict[str, Any], fragments: Optional[FragmentCache] = None,
+                   list_key: str = 'data') -> bytes:
+    """응답 본문 인코딩. list_key 목록은 레코드 조각을 이어 붙여 만든다 (조각 캐시가 없으면 한 번에 인코딩)"""
+    items = payload.get(list_key)
+    if fragments is None or not isinstance(items, list):
+        return serializer.dumps(payload)
+    encoder = fragments.serializer
+    rest = encoder.dumps({key: value for key, value in payload.items() if key != list_key})
+    body = b','.join([fragments.encode(item) for item in items])
+    head = b'{' + encoder.dumps(list_key) + b':[' + body + b']'
+    return head + (b',' + rest[1:] if len(rest) > 2 else b'}')
@@ -0,0 +1,238 @@
+import mimetypes
+import os
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, List, Optional, Tuple
+
+from werkzeug.security import safe_join
+from werkzeug.wsgi import wrap_file
+
+# 내용 해시 이름의 blob 원본은 내용이 바뀌지 않으므로 1년 + immutable
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+class OpenFileCache:
+    """자주 요청되는 파일의 열린 fd 를 재사용하는 캐시
+
+    fd 는 파일 오프셋을 공유하므로 한 요청이 빌려 간(checkout) fd 는 돌려받기(checkin) 전까지
+    다른 요청에 주지 않는다. 경로마다 최대 per_path 개, 전체 최대 max_open 개의 쉬는 fd 를 두고
+    넘으면 오래 쓰지 않은 것부터 닫는다. 요청마다 stat 으로 inode/크기/mtime 을 확인해
+    교체되거나 삭제된 파일의 fd 는 버린다.
+    """
+
+    def __init__(self, max_open: int = 256, per_path: int = 4):
+        self.max_open = max_open
+        self.per_path = per_path
+        self._lock = threading.Lock()
+        # 경로 -> (파일 식별자, 쉬는 fd 목록)
+        self._idle: 'OrderedDict[str, Tuple[Tuple[int, int, int], List[int]]]' = OrderedDict()
+        self._idle_count = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _identity(st: os.stat_result) -> Tuple[int, int, int]:
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def checkout(self, path: str) -> Tuple[int, os.stat_result]:
+        """(fd, stat) 반환. 파일이 없으면 FileNotFoundError"""
+        st = os.stat(path)
+        identity = self._identity(st)
+        with self._lock:
+            entry = self._idle.get(path)
+            if entry is not None:
+                if entry[0] == identity and entry[1]:
+                    self._idle.move_to_end(path)
+                    self._idle_count -= 1
+                    self.hits += 1
+                    return entry[1].pop(), st
+                if entry[0] != identity:
+                    self._discard_locked(path)
+            self.misses += 1
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            opened = os.fstat(fd)
+        except OSError:
+            os.close(fd)
+            raise
+        if self._identity(opened) != identity:
+            # stat 과 open 사이에 교체되었으면 실제로 연 파일 기준으로 응답
+            st = opened
+        return fd, st
+
+    def checkin(self, path: str, fd: int, st: os.stat_result) -> None:
+        """다 쓴 fd 반납 (같은 파일이고 자리가 있으면 보관, 아니면 닫음)"""
+        identity = self._identity(st)
+        close = []
+        with self._lock:
+            entry = self._idle.get(path)
+            if entry is not None and entry[0] != identity:
+                close.extend(self._pop_locked(path))
+                entry = None
+            if entry is None:
+                entry = (identity, [])
+                self._idle[path] = entry
+            if len(entry[1]) < self.per_path and self.max_open > 0:
+                entry[1].append(fd)
+                self._idle_count += 1
+                self._idle.move_to_end(path)
+            else:
+                close.append(fd)
+            while self._idle_count > self.max_open and self._idle:
+                close.extend(self._pop_locked(next(iter(self._idle))))
+        for idle_fd in close:
+            os.close(idle_fd)
+
+    def _pop_locked(self, path: str) -> List[int]:
+        _, fds = self._idle.pop(path)
+        self._idle_count -= len(fds)
+        return fds
+
+    def _discard_locked(self, path: str) -> None:
+        for fd in self._pop_locked(path):
+            os.close(fd)
+
+    def close(self) -> None:
+        with self._lock:
+            for path in list(self._idle):
+                self._discard_locked(path)
+
+    def __len__(self) -> int:
+        return self._idle_count
+
+
+class LeasedFile:
+    """빌린 fd 의 [start, start + length) 구간만 읽는 파일 객체
+
+    fileno() 가 있으므로 WSGI 서버의 wsgi.file_wrapper 가 sendfile 로 보낼 수 있다
+    (gunicorn 은 현재 오프셋부터 Content-Length 만큼 보낸다). 닫으면 fd 를 캐시에 반납한다.
+    """
+
+    def __init__(self, cache: OpenFileCache, path: str, fd: int, st: os.stat_result, start: int, length: int):
+        self._cache = cache
+        self._path = path
+        self._fd = fd
+        self._st = st
+        self._offset = start
+        self._remaining = length
+        os.lseek(fd, start, os.SEEK_SET)
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def read(self, size: int = -1) -> bytes:
+        if self._fd is None or self._remaining <= 0:
+            return b''
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = os.pread(self._fd, size, self._offset)
+        self._offset += len(data)
+        self._remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        if self._fd is not None:
+            fd, self._fd = self._fd, None
+            self._cache.checkin(self._path, fd, self._st)
+
+
+def resolve_path(root: str, filename: str) -> Optional[str]:
+    """root 아래의 안전한 파일 경로 (벗어나거나 숨김/임시 파일이면 None)"""
+    if any(part.startswith('.') for part in filename.split('/')) or filename.endswith('.part'):
+        return None
+    return safe_join(root, filename)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """단일 bytes 범위를 (start, end 포함) 로 파싱
+
+    헤더가 없거나 여러 범위/알 수 없는 형식이면 None (전체 응답), 만족할 수 없으면 ValueError.
+    """
+    if not header or not header.startswith('bytes=') or ',' in header:
+        return None
+    first, sep, last = header[len('bytes='):].strip().partition('-')
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            suffix = int(last)
+            if suffix <= 0:
+                raise ValueError('빈 범위')
+            start, end = max(0, size - suffix), size - 1
+    except ValueError:
+        if first or last:
+            raise
+        return None
+    if start < 0 or start >= size or end < start:
+        raise ValueError('만족할 수 없는 범위')
+    return start, min(end, size - 1)
+
+
+def _etag_for(st: os.stat_result) -> str:
+    return f'{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}'
+
+
+def _not_modified(request, etag: str, st: os.stat_result) -> bool:
+    if_none_match = request.headers.get('If-None-Match')
+    if if_none_match is not None:
+        return request.if_none_match.contains(etag) or request.if_none_match.star_tag
+    if_modified_since = request.headers.get('If-Modified-Since')
+    if if_modified_since:
+        try:
+            return int(st.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def send_gif_file(request, response_class, cache: OpenFileCache, path: str,
+                  cache_control: str):
+    """정적 GIF/썸네일 응답 (Range, 조건부 GET, fd 캐시, wsgi.file_wrapper 로 sendfile)"""
+    try:
+        fd, st = cache.checkout(path)
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        return None
+    leased = False
+    try:
+        etag = _etag_for(st)
+        headers: Dict[str, str] = {
+            'ETag': f'"{etag}"',
+            'Last-Modified': formatdate(st.st_mtime, usegmt=True),
+            'Cache-Control': cache_control,
+            'Accept-Ranges': 'bytes',
+        }
+        if _not_modified(request, etag, st):
+            return response_class(status=304, headers=headers)
+
+        size = st.st_size
+        status = 200
+        start, length = 0, size
+        if_range = request.headers.get('If-Range')
+        if if_range is None or if_range.strip('"') == etag:
+            try:
+                byte_range = parse_range(request.headers.get('Range'), size)
+            except ValueError:
+                headers['Content-Range'] = f'bytes */{size}'
+                return response_class(status=416, headers=headers)
+            if byte_range is not None:
+                start, end = byte_range
+                length = end - start + 1
+                status = 206
+                headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+        headers['Content-Length'] = str(length)
+        mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+        if request.method == 'HEAD':
+            return response_class(status=status, headers=headers, mimetype=mimetype)
+
+        body = wrap_file(request.environ, LeasedFile(cache, path, fd, st, start, length))
+        leased = True
+        return response_class(body, status=status, headers=headers, mimetype=mimetype,
+                              direct_passthrough=True)
+    finally:
+        if not leased:
+            cache.checkin(path, fd, st)
@@ -0,0 +1,505 @@
+import contextlib
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import quote, unquote
+
+from gif_serialization import serializer
+
+try:
+    import fcntl
+except ImportError:  # Windows 등에서는 프로세스 간 잠금 없이 동작 (단일 프로세스 전용)
+    fcntl = None
+
+UsersGifs = Dict[str, List[Dict[str, Any]]]
+
+# 파일 교체 전후로 fsync 해서 전원이 나가도 기록이 남도록 함 (0 이면 OS 에 맡김)
+FSYNC_WRITES = os.environ.get('GIF_FSYNC', '1') == '1'
+
+SHARD_SUFFIX = '.json'
+
+
+def _fsync_directory(directory: str) -> None:
+    """rename 결과(디렉토리 항목)까지 디스크에 기록"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:  # Windows 등 디렉토리를 열 수 없는 환경
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_temp_json(directory: str, data: Any, pretty: bool = False) -> str:
+    """같은 디렉토리의 임시 파일에 쓰고 (FSYNC_WRITES 면 fsync) 경로 반환"""
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=SHARD_SUFFIX)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(serializer.dumps_pretty(data) if pretty else serializer.dumps(data))
+            if FSYNC_WRITES:
+                f.flush()
+                os.fsync(f.fileno())
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return tmp_path
+
+
+def _atomic_write_files(files: Dict[str, Any]) -> None:
+    """여러 JSON 파일을 임시 파일에 쓴 뒤 rename 으로 교체 (중간에 죽어도 각 파일은 이전 또는 새 내용)
+
+    디렉토리 fsync 는 디렉토리마다 한 번만 한다.
+    """
+    replaced = []
+    try:
+        for path, data in files.items():
+            directory = os.path.dirname(os.path.abspath(path))
+            replaced.append((_write_temp_json(directory, data), path))
+        for tmp_path, path in replaced:
+            os.replace(tmp_path, path)
+    except BaseException:
+        for tmp_path, _ in replaced:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        raise
+    if FSYNC_WRITES:
+        for directory in {os.path.dirname(os.path.abspath(path)) for path in files}:
+            _fsync_directory(directory)
+
+
+def _atomic_write_json(path: str, data: Any, pretty: bool = False) -> None:
+    """임시 파일에 쓴 뒤 rename 으로 교체 (중간에 죽어도 기존 파일 유지)
+
+    기본은 공백 없는 compact 형식이고, pretty 면 사람이 읽기 좋게 들여쓴다 (export 용).
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    tmp_path = _write_temp_json(directory, data, pretty)
+    try:
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    if FSYNC_WRITES:
+        _fsync_directory(directory)
+
+
+@contextlib.contextmanager
+def file_lock(path: str):
+    """프로세스 간 배타 잠금 (flock). 같은 프로세스의 다른 스레드끼리도 배타적이다"""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        os.close(fd)
+
+
+class JsonFileStorage:
+    """모든 사용자를 하나의 users_gifs.json 에 저장하는 기존 방식"""
+
+    name = 'json'
+
+    def __init__(self, path: str):
+        self.path = path
+
+    @property
+    def watch_path(self) -> str:
+        return self.path
+
+    def lock(self):
+        """읽기-수정-쓰기 구간을 감싸는 프로세스 간 잠금"""
+        return file_lock(self.path + '.lock')
+
+    def load_all(self) -> UsersGifs:
+        with open(self.path, 'rb') as f:
+            return serializer.loads(f.read())
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def load_user(self, user_id: str) -> Optional[List[Dict[str, Any]]]:
+        if not self.exists():
+            return None
+        return self.load_all().get(user_id)
+
+    def iter_gifs(self) -> Iterator[Dict[str, Any]]:
+        """모든 사용자의 레코드 (blob 정리용)"""
+        for gifs in self.load_all().values():
+            yield from gifs
+
+    def load_users(self, user_ids: Iterable[str]) -> UsersGifs:
+        """여러 사용자 목록을 한 번의 파일 읽기로 로드 (없는 사용자는 제외)"""
+        users_gifs = self.load_all() if self.exists() else {}
+        return {user_id: users_gifs[user_id] for user_id in user_ids if user_id in users_gifs}
+
+    def save_user(self, user_id: str, gifs: List[Dict[str, Any]]) -> None:
+        self.save_users({user_id: gifs})
+
+    def save_users(self, users_gifs: UsersGifs) -> None:
+        """일부 사용자 목록을 기존 파일과 합쳐 한 번에 저장"""
+        merged = self.load_all() if self.exists() else {}
+        merged.update(users_gifs)
+        self.save(merged)
+
+    def save(self, users_gifs: UsersGifs, dirty_users: Optional[Iterable[str]] = None) -> None:
+        # 단일 파일이므로 dirty 여부와 상관없이 전체를 다시 쓴다 (임시 파일 + rename)
+        _atomic_write_json(self.path, users_gifs)
+
+
+class ShardedStorage:
+    """사용자마다 하나의 JSON 파일을 두는 저장소
+
+    쓰기 비용은 해당 사용자의 GIF 수에만 비례한다.
+    파일명은 사용자 ID 를 URL 인코딩한 값이다 (예: users_gifs/chlee0811.json).
+    """
+
+    name = 'sharded'
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    @property
+    def watch_path(self) -> str:
+        # 파일 교체(rename) 시 디렉토리 mtime 이 바뀐다
+        return self.directory
+
+    def lock(self):
+        """읽기-수정-쓰기 구간을 감싸는 프로세스 간 잠금"""
+        return file_lock(self.directory.rstrip('/\\') + '.lock')
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.directory)
+
+    def _user_path(self, user_id: str) -> str:
+        return os.path.join(self.directory, quote(user_id, safe='') + SHARD_SUFFIX)
+
+    def user_ids(self) -> List[str]:
+        if not self.exists():
+            return []
+        return [
+            unquote(name[:-len(SHARD_SUFFIX)])
+            for name in os.listdir(self.directory)
+            if name.endswith(SHARD_SUFFIX) and not name.startswith('.')
+        ]
+
+    def load_user(self, user_id: str) -> Optional[List[Dict[str, Any]]]:
+        try:
+            with open(self._user_path(user_id), 'rb') as f:
+                return serializer.loads(f.read())
+        except FileNotFoundError:
+            return None
+
+    def load_all(self) -> UsersGifs:
+        users_gifs = {}
+        for user_id in self.user_ids():
+            gifs = self.load_user(user_id)
+            if gifs is not None:
+                users_gifs[user_id] = gifs
+        return users_gifs
+
+    def iter_gifs(self) -> Iterator[Dict[str, Any]]:
+        """모든 사용자의 레코드 (사용자 파일을 하나씩 읽음, blob 정리용)"""
+        for user_id in self.user_ids():
+            yield from self.load_user(user_id) or []
+
+    def load_users(self, user_ids: Iterable[str]) -> UsersGifs:
+        """여러 사용자 목록 로드 (없는 사용자는 제외)"""
+        users_gifs = {}
+        for user_id in user_ids:
+            gifs = self.load_user(user_id)
+            if gifs is not None:
+                users_gifs[user_id] = gifs
+        return users_gifs
+
+    def save_user(self, user_id: str, gifs: List[Dict[str, Any]]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        _atomic_write_json(self._user_path(user_id), gifs)
+
+    def save_users(self, users_gifs: UsersGifs) -> None:
+        """일부 사용자 목록 저장 (사용자 파일 단위로 원자적)"""
+        self.save(users_gifs)
+
+    def save(self, users_gifs: UsersGifs, dirty_users: Optional[Iterable[str]] = None) -> None:
+        # dirty 사용자 파일만 다시 쓴다 (None 이면 전체)
+        os.makedirs(self.directory, exist_ok=True)
+        if dirty_users is None:
+            dirty_users = users_gifs.keys()
+        _atomic_write_files({
+            self._user_path(user_id): users_gifs[user_id]
+            for user_id in dirty_users
+            if user_id in users_gifs
+        })
+
+
+class SqliteStorage:
+    """SQLite 기반 저장소
+
+    (userId, id) 기본 키를 두고 WAL 모드로 동작하므로 여러 프로세스/스레드가 동시에 읽을 수 있다.
+    연결은 스레드마다 하나씩 둔다. 레코드 전체는 data 컬럼에 JSON 으로 저장해 필드가 늘어나도
+    스키마를 바꾸지 않는다. 카탈로그 기록은 apply_operations() 로 변경 작업마다 해당 행만
+    INSERT/UPDATE/DELETE 하므로 GIF 하나를 추가해도 사용자 목록 전체를 다시 쓰지 않는다.
+    태그/제목 조회는 메모리 검색 색인(gif_search.py)이 맡으므로 태그 인덱스는 두지 않는다.
+
+    행은 (user_id, seq) 로 구분하고 id 인덱스는 고유하지 않다. 예전 초 단위 id 로 만든
+    users_gifs.json 에 같은 id 가 여러 개 있어도 JSON/샤드 저장소와 똑같이 그대로 저장하고,
+    id 로 지우거나 고치는 작업은 gif_catalog.apply_operation 처럼 목록에서 첫 번째 항목에만 적용한다.
+    """
+
+    name = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS gifs (
+            user_id TEXT NOT NULL,
+            id TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            title TEXT NOT NULL,
+            data TEXT NOT NULL,
+            PRIMARY KEY (user_id, seq)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_gifs_user_id ON gifs (user_id, id);
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def watch_path(self) -> str:
+        # WAL 모드에서는 커밋이 -wal 파일에 기록된다
+        return self.path + '-wal'
+
+    def lock(self):
+        """읽기-수정-쓰기 구간을 감싸는 프로세스 간 잠금 (트랜잭션은 save 안에서만 열린다)"""
+        return file_lock(self.path + '.lock')
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            # WAL 에서 FULL 이면 커밋(한 배치)마다 WAL 을 한 번 fsync 한다
+            conn.execute('PRAGMA synchronous=FULL' if FSYNC_WRITES else 'PRAGMA synchronous=NORMAL')
+            conn.executescript(self.SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    def user_ids(self) -> List[str]:
+        rows = self._connection().execute('SELECT DISTINCT user_id FROM gifs')
+        return [row[0] for row in rows]
+
+    def load_user(self, user_id: str) -> Optional[List[Dict[str, Any]]]:
+        rows = self._connection().execute(
+            'SELECT data FROM gifs WHERE user_id = ? ORDER BY seq', (user_id,)
+        ).fetchall()
+        if not rows:
+            return None
+        return [serializer.loads(row[0]) for row in rows]
+
+    def load_all(self) -> UsersGifs:
+        users_gifs: UsersGifs = {}
+        rows = self._connection().execute('SELECT user_id, data FROM gifs ORDER BY user_id, seq')
+        for user_id, data in rows:
+            users_gifs.setdefault(user_id, []).append(serializer.loads(data))
+        return users_gifs
+
+    def load_users(self, user_ids: Iterable[str]) -> UsersGifs:
+        """여러 사용자 목록 로드 (없는 사용자는 제외)"""
+        users_gifs = {}
+        for user_id in user_ids:
+            gifs = self.load_user(user_id)
+            if gifs is not None:
+                users_gifs[user_id] = gifs
+        return users_gifs
+
+    def iter_gifs(self) -> Iterator[Dict[str, Any]]:
+        """모든 사용자의 레코드 (커서로 한 행씩 읽음, blob 정리용)"""
+        for (data,) in self._connection().execute('SELECT data FROM gifs'):
+            yield serializer.loads(data)
+
+    def _insert_gifs(self, conn: sqlite3.Connection, user_id: str, gifs: Iterable[Dict[str, Any]]) -> None:
+        """사용자 목록 끝에 행 추가"""
+        seq = conn.execute('SELECT COALESCE(MAX(seq), -1) FROM gifs WHERE user_id = ?', (user_id,)).fetchone()[0]
+        conn.executemany(
+            'INSERT INTO gifs (user_id, id, seq, title, data) VALUES (?, ?, ?, ?, ?)',
+            [(user_id, gif['id'], seq + offset, gif.get('title', ''), serializer.dumps(gif).decode('utf-8'))
+             for offset, gif in enumerate(gifs, 1)],
+        )
+
+    def _first_seq(self, conn: sqlite3.Connection, user_id: str, gif_id: str) -> Optional[int]:
+        """목록에서 gif_id 인 첫 번째 행의 seq (없으면 None)"""
+        return conn.execute('SELECT MIN(seq) FROM gifs WHERE user_id = ? AND id = ?', (user_id, gif_id)).fetchone()[0]
+
+    def _delete_gif(self, conn: sqlite3.Connection, user_id: str, gif_id: str) -> None:
+        seq = self._first_seq(conn, user_id, gif_id)
+        if seq is not None:
+            conn.execute('DELETE FROM gifs WHERE user_id = ? AND seq = ?', (user_id, seq))
+
+    def _update_gif(self, conn: sqlite3.Connection, user_id: str, gif_id: str,
+                    build: Callable[[Dict[str, Any]], Dict[str, Any]]) -> None:
+        row = conn.execute(
+            'SELECT seq, data FROM gifs WHERE user_id = ? AND id = ? ORDER BY seq LIMIT 1', (user_id, gif_id)
+        ).fetchone()
+        if row is not None:
+            gif = build(serializer.loads(row[1]))
+            conn.execute(
+                'UPDATE gifs SET id = ?, title = ?, data = ? WHERE user_id = ? AND seq = ?',
+                (gif['id'], gif.get('title', ''), serializer.dumps(gif).decode('utf-8'), user_id, row[0]),
+            )
+
+    def _replace_user(self, conn: sqlite3.Connection, user_id: str, gifs: List[Dict[str, Any]]) -> None:
+        conn.execute('DELETE FROM gifs WHERE user_id = ?', (user_id,))
+        self._insert_gifs(conn, user_id, gifs)
+
+    def _apply_operation(self, conn: sqlite3.Connection, user_id: str, op: Tuple[Any, ...]) -> None:
+        # 작업 형식과 의미는 gif_catalog.apply_operation 과 같다
+        kind = op[0]
+        if kind == 'init':
+            if conn.execute('SELECT 1 FROM gifs WHERE user_id = ? LIMIT 1', (user_id,)).fetchone() is None:
+                self._insert_gifs(conn, user_id, op[1])
+        elif kind == 'replace':
+            self._replace_user(conn, user_id, op[1])
+        elif kind == 'add':
+            self._insert_gifs(conn, user_id, [op[1]])
+        elif kind == 'add_many':
+            self._insert_gifs(conn, user_id, op[1])
+        elif kind == 'remove':
+            self._delete_gif(conn, user_id, op[1])
+        elif kind == 'remove_many':
+            for gif_id in dict.fromkeys(op[1]):
+                self._delete_gif(conn, user_id, gif_id)
+        elif kind == 'replace_gif':
+            self._update_gif(conn, user_id, op[1], lambda _: op[2])
+        elif kind == 'update':
+            self._update_gif(conn, user_id, op[1], lambda gif: {**gif, **op[2]})
+        else:
+            raise ValueError(f'알 수 없는 변경 작업: {kind}')
+
+    def apply_operations(self, operations: Iterable[Tuple[str, Tuple[Any, ...]]]) -> None:
+        """카탈로그 변경 작업 (user_id, 작업) 들을 해당 행에만 한 트랜잭션으로 적용"""
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for user_id, op in operations:
+                self._apply_operation(conn, user_id, op)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def save_user(self, user_id: str, gifs: List[Dict[str, Any]]) -> None:
+        self.save_users({user_id: gifs})
+
+    def save_users(self, users_gifs: UsersGifs) -> None:
+        """일부 사용자 목록을 한 트랜잭션으로 저장"""
+        self.save(users_gifs)
+
+    def save(self, users_gifs: UsersGifs, dirty_users: Optional[Iterable[str]] = None) -> None:
+        # dirty 사용자 행만 한 트랜잭션으로 교체한다 (None 이면 전체)
+        if dirty_users is None:
+            dirty_users = users_gifs.keys()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            for user_id in dirty_users:
+                if user_id in users_gifs:
+                    self._replace_user(conn, user_id, users_gifs[user_id])
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+
+def create_storage(backend: str, json_path: str, shard_directory: str, sqlite_path: str = 'users_gifs.db'):
+    """설정값으로 저장소 백엔드 생성"""
+    if backend == JsonFileStorage.name:
+        return JsonFileStorage(json_path)
+    if backend == ShardedStorage.name:
+        return ShardedStorage(shard_directory)
+    if backend == SqliteStorage.name:
+        return SqliteStorage(sqlite_path)
+    raise ValueError(f'알 수 없는 저장소 백엔드: {backend}')
+
+
+def ensure_initialized(storage, json_path: str) -> None:
+    """저장소가 없으면 기존 JSON 파일에서 변환하거나 빈 저장소로 초기화
+
+    서버와 add_user_gifs.py 모두 처음 쓰기 전에 부른다 (어느 쪽이 먼저 실행돼도 기존 JSON 을 변환).
+    """
+    if storage.exists():
+        return
+    # 여러 프로세스가 동시에 시작해도 변환/초기화는 한 번만 하도록 잠금 안에서 다시 확인
+    with storage.lock():
+        if storage.exists():
+            return
+        elif not isinstance(storage, JsonFileStorage) and os.path.exists(json_path):
+            # 새 저장소가 처음이면 기존 JSON 파일에서 한 번 변환
+            count = migrate_from_json(json_path, storage)
+            print(f"{storage.name} 저장소로 변환 완료: {count}명")
+        else:
+            # 파일이 없으면 빈 딕셔너리로 초기화
+            storage.save({})
+
+
+def migrate_from_json(json_path: str, target) -> int:
+    """기존 users_gifs.json 을 다른 저장소로 한 번에 변환 (변환된 사용자 수 반환)"""
+    source = JsonFileStorage(json_path)
+    if not source.exists():
+        return 0
+    users_gifs = source.load_all()
+    for user_id, gifs in users_gifs.items():
+        # 예전 초 단위 id 로 생긴 중복은 id 를 바꾸지 않고 그대로 옮기되 알려 둔다
+        counts = Counter(gif.get('id') for gif in gifs)
+        duplicates = [gif_id for gif_id, count in counts.items() if count > 1]
+        if duplicates:
+            print(f"중복 GIF id ({user_id}): {', '.join(map(str, duplicates))} — id 로 지우거나 고치면 첫 번째 항목에만 적용됩니다")
+    target.save(users_gifs)
+    return len(users_gifs)
+
+
+def export_pretty(source, output_path: str) -> int:
+    """저장소 내용을 사람이 읽기 좋은 (들여쓰기) JSON 파일로 내보내기 (사용자 수 반환)"""
+    users_gifs = source.load_all() if source.exists() else {}
+    _atomic_write_json(output_path, users_gifs, pretty=True)
+    return len(users_gifs)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2 or sys.argv[1] not in ('migrate', 'migrate-sqlite', 'export'):
+        print("사용법: python gif_storage.py migrate [users_gifs.json] [users_gifs]")
+        print("        python gif_storage.py migrate-sqlite [users_gifs.json] [users_gifs.db]")
+        print("        python gif_storage.py export [users_gifs.pretty.json]  (GIF_STORAGE_BACKEND 저장소 기준)")
+        sys.exit(1)
+
+    if sys.argv[1] == 'export':
+        output_path = sys.argv[2] if len(sys.argv) > 2 else 'users_gifs.pretty.json'
+        source = create_storage(
+            os.environ.get('GIF_STORAGE_BACKEND', 'json'),
+            'users_gifs.json',
+            os.environ.get('GIF_SHARD_DIRECTORY', 'users_gifs'),
+            os.environ.get('GIF_SQLITE_PATH', 'users_gifs.db'),
+        )
+        count = export_pretty(source, output_path)
+        print(f"✅ {count}명의 사용자 GIF 목록을 '{output_path}' 로 내보냈습니다.")
+        sys.exit(0)
+
+    json_path = sys.argv[2] if len(sys.argv) > 2 else 'users_gifs.json'
+    if sys.argv[1] == 'migrate-sqlite':
+        target_path = sys.argv[3] if len(sys.argv) > 3 else 'users_gifs.db'
+        target = SqliteStorage(target_path)
+    else:
+        target_path = sys.argv[3] if len(sys.argv) > 3 else 'users_gifs'
+        target = ShardedStorage(target_path)
+    count = migrate_from_json(json_path, target)
+    print(f"✅ {count}명의 사용자 GIF 목록을 '{target_path}' 로 변환했습니다.")
@@ -0,0 +1,177 @@
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+try:
+    from PIL import Image, ImageSequence
+except ImportError:  # Pillow 가 없으면 썸네일 단계를 건너뛴다
+    Image = None
+    ImageSequence = None
+
+THUMBNAIL_DIRNAME = 'thumbnails'
+STILL_SUFFIX = '.png'
+PREVIEW_SUFFIX = '_preview.gif'
+
+
+def thumbnails_available() -> bool:
+    return Image is not None
+
+
+def thumbnail_paths(gif_path: str) -> Tuple[str, str]:
+    """원본 GIF 경로로부터 (정지 썸네일, 애니메이션 미리보기) 경로 계산"""
+    directory, filename = os.path.split(gif_path)
+    stem = os.path.splitext(filename)[0]
+    thumb_dir = os.path.join(directory, THUMBNAIL_DIRNAME)
+    return (
+        os.path.join(thumb_dir, stem + STILL_SUFFIX),
+        os.path.join(thumb_dir, stem + PREVIEW_SUFFIX),
+    )
+
+
+def thumbnail_urls(gif_url: str) -> Tuple[str, str]:
+    """원본 GIF URL 로부터 (정지 썸네일, 애니메이션 미리보기) URL 계산"""
+    directory, _, filename = gif_url.rpartition('/')
+    stem = os.path.splitext(filename)[0]
+    return (
+        f'{directory}/{THUMBNAIL_DIRNAME}/{stem}{STILL_SUFFIX}',
+        f'{directory}/{THUMBNAIL_DIRNAME}/{stem}{PREVIEW_SUFFIX}',
+    )
+
+
+def generate_thumbnails(gif_path: str, max_size: int = 200, max_frames: int = 60) -> Tuple[str, str]:
+    """첫 프레임 정지 썸네일과 축소된 애니메이션 미리보기 생성 (워커 프로세스에서 실행)
+
+    max_frames 보다 프레임이 많으면 균등하게 건너뛰고 그만큼 프레임 지속 시간을 늘린다.
+    """
+    still_path, preview_path = thumbnail_paths(gif_path)
+    os.makedirs(os.path.dirname(still_path), exist_ok=True)
+    size = (max_size, max_size)
+
+    with Image.open(gif_path) as im:
+        first = im.convert('RGBA')
+        first.thumbnail(size)
+        tmp_still = f'{still_path}.{os.getpid()}.part'
+        first.save(tmp_still, format='PNG', optimize=True)
+        os.replace(tmp_still, still_path)
+
+        n_frames = getattr(im, 'n_frames', 1)
+        step = max(1, -(-n_frames // max_frames))
+        frames = []
+        durations = []
+        for index, frame in enumerate(ImageSequence.Iterator(im)):
+            if index % step:
+                continue
+            resized = frame.convert('RGBA')
+            resized.thumbnail(size)
+            frames.append(resized)
+            durations.append(frame.info.get('duration', 100) * step)
+
+        tmp_preview = f'{preview_path}.{os.getpid()}.part'
+        frames[0].save(
+            tmp_preview,
+            format='GIF',
+            save_all=True,
+            append_images=frames[1:],
+            duration=durations,
+            loop=im.info.get('loop', 0),
+            optimize=True,
+            disposal=2,
+        )
+        os.replace(tmp_preview, preview_path)
+
+    return still_path, preview_path
+
+
+class ThumbnailPipeline:
+    """업로드 요청을 막지 않는 비동기 썸네일 생성 단계
+
+    크기가 제한된 프로세스 풀에서 generate_thumbnails 를 실행하고,
+    완료되면 on_ready(user_id, gif_id, gif_url) 콜백으로 알린다.
+    같은 파일(blob)에 대한 작업이 이미 진행 중이면 새로 만들지 않고 완료 콜백만 붙인다.
+    대기 작업이 max_pending 을 넘으면 새 작업을 받지 않는다 (원본 URL 유지).
+    """
+
+    def __init__(self,
+                 on_ready: Callable[[str, str, str], None],
+                 max_workers: int = 2,
+                 max_pending: int = 64,
+                 max_size: int = 200,
+                 max_frames: int = 60):
+        self._on_ready = on_ready
+        self.max_workers = max_workers
+        self.max_size = max_size
+        self.max_frames = max_frames
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # 진행 중인 파일 경로 -> 완료 시 알릴 (user_id, gif_id, gif_url) 목록
+        self._inflight: Dict[str, List[Tuple[str, str, str]]] = {}
+        self._inflight_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return thumbnails_available() and self.max_workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, user_id: str, gif_id: str, gif_path: str, gif_url: str) -> bool:
+        """썸네일 생성 예약 (대기열이 가득 찼거나 비활성화면 False)"""
+        if not self.enabled:
+            return False
+        with self._inflight_lock:
+            waiters = self._inflight.get(gif_path)
+            if waiters is not None:
+                waiters.append((user_id, gif_id, gif_url))
+                return True
+            if not self._slots.acquire(blocking=False):
+                return False
+            self._inflight[gif_path] = [(user_id, gif_id, gif_url)]
+        try:
+            future = self._get_executor().submit(generate_thumbnails, gif_path, self.max_size, self.max_frames)
+        except Exception as e:
+            with self._inflight_lock:
+                self._inflight.pop(gif_path, None)
+            self._slots.release()
+            print(f"썸네일 작업 예약 중 오류: {e}")
+            return False
+        future.add_done_callback(lambda f: self._done(f, gif_path))
+        return True
+
+    def _done(self, future: Future, gif_path: str) -> None:
+        with self._inflight_lock:
+            waiters = self._inflight.pop(gif_path, [])
+        self._slots.release()
+        try:
+            future.result()
+        except Exception as e:
+            print(f"썸네일 생성 중 오류 ({gif_path}): {e}")
+            return
+        for user_id, gif_id, gif_url in waiters:
+            try:
+                self._on_ready(user_id, gif_id, gif_url)
+            except Exception as e:
+                print(f"썸네일 반영 중 오류 ({gif_id}): {e}")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+def remove_thumbnails(gif_path: str) -> None:
+    """원본 GIF 에 딸린 썸네일 파일 삭제 (없으면 무시)"""
+    for path in thumbnail_paths(gif_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def thumbnail_fields(gif_url: str) -> Dict[str, str]:
+    """썸네일 생성 완료 후 레코드에 반영할 필드"""
+    still_url, preview_url = thumbnail_urls(gif_url)
+    return {'thumbnailUrl': preview_url, 'stillUrl': still_url}
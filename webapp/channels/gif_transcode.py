@@ -0,0 +1,290 @@
+import os
+import shutil
+import subprocess
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+try:
+    from PIL import Image, ImageSequence, features
+except ImportError:  # Pillow 가 없으면 gif/webp 변형을 만들지 않는다
+    Image = None
+    ImageSequence = None
+    features = None
+
+VARIANT_DIRNAME = 'variants'
+# 형식 -> (파일 접미사, MIME 타입)
+VARIANT_FORMATS = {
+    'gif': ('.min.gif', 'image/gif'),
+    'webp': ('.webp', 'image/webp'),
+    'mp4': ('.mp4', 'video/mp4'),
+}
+# 전체 프레임 픽셀 수가 이것을 넘는 GIF 는 gif/webp 변형을 만들지 않는다
+# (프레임은 하나씩 디코딩하지만 gif 변형은 팔레트 프레임(픽셀당 1바이트)을 저장이 끝날 때까지 모아 둔다)
+MAX_PIXELS = 64 * 1024 * 1024
+
+
+def ffmpeg_path() -> Optional[str]:
+    return shutil.which(os.environ.get('GIF_FFMPEG', 'ffmpeg'))
+
+
+def available_formats(formats: Sequence[str]) -> List[str]:
+    """요청한 형식 중 이 환경에서 만들 수 있는 것 (gif/webp 는 Pillow, mp4 는 ffmpeg 필요)"""
+    available = []
+    for fmt in formats:
+        if fmt == 'gif' and Image is not None:
+            available.append(fmt)
+        elif fmt == 'webp' and Image is not None and features.check('webp'):
+            available.append(fmt)
+        elif fmt == 'mp4' and ffmpeg_path():
+            available.append(fmt)
+    return available
+
+
+def variant_paths(gif_path: str) -> Dict[str, str]:
+    """원본 GIF 경로로부터 형식별 변형 경로 계산"""
+    directory, filename = os.path.split(gif_path)
+    stem = os.path.splitext(filename)[0]
+    return {fmt: os.path.join(directory, VARIANT_DIRNAME, stem + suffix)
+            for fmt, (suffix, _) in VARIANT_FORMATS.items()}
+
+
+def variant_urls(gif_url: str) -> Dict[str, str]:
+    """원본 GIF URL 로부터 형식별 변형 URL 계산"""
+    directory, _, filename = gif_url.rpartition('/')
+    stem = os.path.splitext(filename)[0]
+    return {fmt: f'{directory}/{VARIANT_DIRNAME}/{stem}{suffix}'
+            for fmt, (suffix, _) in VARIANT_FORMATS.items()}
+
+
+def _check_size(im: Any) -> None:
+    n_frames = getattr(im, 'n_frames', 1)
+    if im.width * im.height * n_frames > MAX_PIXELS:
+        raise ValueError(f'프레임이 너무 큽니다 ({im.width}x{im.height}x{n_frames})')
+
+
+def _quantized_frames(im: Any, colors: int) -> Iterator[Any]:
+    """프레임을 하나씩 RGBA 로 디코딩해 colors 색 이하 팔레트로 줄인 프레임 (지속 시간은 info 에)"""
+    for frame in ImageSequence.Iterator(im):
+        quantized = frame.convert('RGBA').quantize(colors=colors, method=Image.Quantize.FASTOCTREE)
+        quantized.info['duration'] = frame.info.get('duration', 100)
+        yield quantized
+
+
+def _encode_gif(gif_path: str, path: str, colors: int) -> None:
+    # 팔레트로 줄인 프레임을 저장하면서 하나씩 만들고, 바뀐 영역만 기록 (optimize)
+    with Image.open(gif_path) as im:
+        _check_size(im)
+        frames = _quantized_frames(im, colors)
+        first = next(frames)
+        first.save(path, format='GIF', save_all=True, append_images=frames,
+                   loop=im.info.get('loop', 0), optimize=True, disposal=2)
+
+
+def _encode_webp(gif_path: str, path: str, quality: int, method: int) -> None:
+    # 원본을 그대로 넘기면 인코더가 프레임을 하나씩 디코딩한다
+    # allow_mixed: 프레임마다 손실/무손실 중 작은 쪽을 고른다
+    with Image.open(gif_path) as im:
+        _check_size(im)
+        durations = [frame.info.get('duration', 100) for frame in ImageSequence.Iterator(im)]
+        im.save(path, format='WEBP', save_all=True, duration=durations, loop=im.info.get('loop', 0),
+                quality=quality, method=method, allow_mixed=True)
+
+
+def _encode_mp4(gif_path: str, path: str, crf: int, timeout: float) -> None:
+    # H.264 는 가로/세로가 짝수여야 하고 투명도가 없다 (muted loop 재생용)
+    command = [
+        ffmpeg_path() or 'ffmpeg', '-v', 'error', '-y', '-i', gif_path,
+        '-an', '-c:v', 'libx264', '-crf', str(crf), '-pix_fmt', 'yuv420p',
+        '-vf', 'scale=trunc(iw/2)*2:trunc(ih/2)*2', '-movflags', '+faststart', '-f', 'mp4', path,
+    ]
+    result = subprocess.run(command, capture_output=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode('utf-8', 'replace').strip() or 'ffmpeg 실패')
+
+
+def transcode_gif(gif_path: str,
+                  formats: Sequence[str],
+                  gif_colors: int = 256,
+                  webp_quality: int = 80,
+                  webp_method: int = 4,
+                  mp4_crf: int = 28,
+                  timeout: float = 120.0) -> Dict[str, Any]:
+    """전송용 변형 생성 (워커 프로세스에서 실행)
+
+    원본보다 작은 변형만 남긴다. 반환값은 {'original': 원본 바이트,
+    'variants': {형식: {'bytes', 'seconds', 'kept'} 또는 {'error'}}} 이다.
+    """
+    paths = variant_paths(gif_path)
+    original = os.path.getsize(gif_path)
+    results: Dict[str, Dict[str, Any]] = {}
+    for fmt in formats:
+        path = paths[fmt]
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.part'
+        started = time.perf_counter()
+        try:
+            if fmt == 'mp4':
+                _encode_mp4(gif_path, tmp_path, mp4_crf, timeout)
+            elif fmt == 'gif':
+                _encode_gif(gif_path, tmp_path, gif_colors)
+            else:
+                _encode_webp(gif_path, tmp_path, webp_quality, webp_method)
+            size = os.path.getsize(tmp_path)
+        except Exception as e:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            results[fmt] = {'error': str(e)}
+            continue
+        kept = size < original
+        if kept:
+            os.replace(tmp_path, path)
+        else:
+            os.remove(tmp_path)
+        results[fmt] = {'bytes': size, 'seconds': time.perf_counter() - started, 'kept': kept}
+    return {'original': original, 'variants': results}
+
+
+def variant_records(gif_path: str, gif_url: str) -> List[Dict[str, Any]]:
+    """디스크에 있는 변형을 작은 순으로 [{'format', 'type', 'url', 'size'}] 반환 (레코드의 variants 필드)"""
+    urls = variant_urls(gif_url)
+    records = []
+    for fmt, path in variant_paths(gif_path).items():
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        records.append({'format': fmt, 'type': VARIANT_FORMATS[fmt][1], 'url': urls[fmt], 'size': size})
+    records.sort(key=lambda record: record['size'])
+    return records
+
+
+def remove_variants(gif_path: str) -> None:
+    """원본 GIF 에 딸린 변형 파일 삭제 (없으면 무시)"""
+    for path in variant_paths(gif_path).values():
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class _Job:
+    __slots__ = ('future', 'waiters', 'cancelled')
+
+    def __init__(self, waiters: List[Tuple[str, str, str]]):
+        self.future: Optional[Future] = None
+        self.waiters = waiters
+        self.cancelled = False
+
+
+class TranscodePipeline:
+    """업로드 요청을 막지 않는 비동기 변형 생성 단계 (ThumbnailPipeline 과 같은 구조)
+
+    크기가 제한된 프로세스 풀에서 transcode_gif 를 실행하고, 남은 변형이 있으면
+    on_ready(user_id, gif_id, gif_url, gif_path) 로, 작업마다 결과를 on_result(result) 로 알린다.
+    원본이 지워지면 cancel() 로 대기 중인 작업은 취소하고, 이미 실행 중이면 끝난 뒤 결과 파일을 지운다
+    (그 사이 같은 경로가 다시 예약됐으면 새 작업의 결과이므로 지우지 않는다).
+    """
+
+    def __init__(self,
+                 on_ready: Callable[[str, str, str, str], None],
+                 formats: Sequence[str] = ('gif', 'webp', 'mp4'),
+                 max_workers: int = 1,
+                 max_pending: int = 64,
+                 on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 **options: Any):
+        self._on_ready = on_ready
+        self._on_result = on_result
+        self.formats = available_formats(formats)
+        self.max_workers = max_workers
+        self.options = options
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+        # 진행 중인 파일 경로 -> 작업 (완료 시 알릴 (user_id, gif_id, gif_url) 목록)
+        self._inflight: Dict[str, _Job] = {}
+        self._inflight_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.formats) and self.max_workers > 0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def submit(self, user_id: str, gif_id: str, gif_path: str, gif_url: str) -> bool:
+        """변형 생성 예약 (대기열이 가득 찼거나 비활성화면 False)"""
+        if not self.enabled:
+            return False
+        with self._inflight_lock:
+            job = self._inflight.get(gif_path)
+            if job is not None:
+                job.waiters.append((user_id, gif_id, gif_url))
+                return True
+            if not self._slots.acquire(blocking=False):
+                return False
+            job = self._inflight[gif_path] = _Job([(user_id, gif_id, gif_url)])
+            try:
+                job.future = self._get_executor().submit(transcode_gif, gif_path, self.formats, **self.options)
+            except Exception as e:
+                del self._inflight[gif_path]
+                self._slots.release()
+                print(f"변형 작업 예약 중 오류: {e}")
+                return False
+        job.future.add_done_callback(lambda f: self._done(f, gif_path, job))
+        return True
+
+    def cancel(self, gif_path: str) -> bool:
+        """gif_path 의 작업 취소 (진행 중인 작업이 있었으면 True)"""
+        with self._inflight_lock:
+            job = self._inflight.pop(gif_path, None)
+            if job is None:
+                return False
+            job.cancelled = True
+        job.future.cancel()
+        return True
+
+    def _done(self, future: Future, gif_path: str, job: _Job) -> None:
+        with self._inflight_lock:
+            if self._inflight.get(gif_path) is job:
+                del self._inflight[gif_path]
+            if job.cancelled and gif_path not in self._inflight:
+                # 실행 중에 원본이 지워졌으면 만들어진 변형도 지운다. 그 사이 같은 경로가 다시
+                # 예약됐으면 새 작업의 결과이므로 남긴다 (잠금 안에서 지워 새 예약과 엇갈리지 않게)
+                try:
+                    remove_variants(gif_path)
+                except OSError:
+                    pass
+        self._slots.release()
+        if job.cancelled:
+            return
+        try:
+            result = future.result()
+        except CancelledError:
+            return
+        except Exception as e:
+            print(f"변형 생성 중 오류 ({gif_path}): {e}")
+            return
+        for fmt, outcome in result['variants'].items():
+            if 'error' in outcome:
+                print(f"변형 생성 실패 ({fmt}, {gif_path}): {outcome['error']}")
+        if self._on_result is not None:
+            self._on_result(result)
+        if not any(outcome.get('kept') for outcome in result['variants'].values()):
+            return
+        for user_id, gif_id, gif_url in job.waiters:
+            try:
+                self._on_ready(user_id, gif_id, gif_url, gif_path)
+            except Exception as e:
+                print(f"변형 반영 중 오류 ({gif_id}): {e}")
+
+    def pending_count(self) -> int:
+        return len(self._inflight)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,426 @@
+import heapq
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from gif_serialization import serializer
+from gif_storage import _atomic_write_json, file_lock
+
+# (소유 사용자 ID, GIF ID)
+ItemKey = Tuple[str, str]
+
+# 저장된 점수가 2 ** RESCALE_EXPONENT 배를 넘으면 기준 시각을 옮긴다 (float 범위 보호)
+RESCALE_EXPONENT = 64
+# 기준 시각을 옮길 때 현재 점수가 이보다 작은 항목은 버린다 (전송 1회 = 1.0)
+PRUNE_SCORE = 0.01
+
+
+def _normalize_tags(tags: Iterable[str]) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(str(tag).lower() for tag in tags))
+
+
+class TrendingIndex:
+    """전체 사용자 대상 GIF 인기 순위 (시간 감쇠 top-K)
+
+    점수는 전송 1회마다 1 을 더하고 half_life 초마다 절반으로 줄어든다. 모든 점수를 매번 줄이는 대신
+    기준 시각(landmark) 기준 가중치 2 ** ((t - landmark) / half_life) 를 더해 두는 forward decay 를 써서,
+    기록은 해당 항목 하나만 바꾸고 항목 간 순서는 저장된 값 그대로 비교할 수 있다.
+
+    전체(None)와 태그별로 상위 top_k 항목을 유지한다. 점수는 기록될 때만 오르므로 기록된 항목만
+    해당 top-K 의 최솟값과 비교하면 되고, 조회는 정렬해 둔 K 개를 그대로 돌려준다.
+
+    기록은 메모리에만 반영하고 증가분을 모아 두었다가 flush 때 파일 잠금 안에서 파일 내용에 더해 저장한다
+    (여러 워커의 기록이 합쳐지고, 다른 워커가 쓴 내용은 다시 읽어 반영한다).
+    GifCatalog 리스너로 등록하면 삭제된 GIF 는 빠지고 태그 변경이 반영된다. 사용자별 항목 집합과 태그별 항목 집합을
+    따로 두어, 삭제/태그 변경은 해당 항목만 고치고 top-K 에서 빠진 자리는 그 그룹의 항목 중에서만 채운다.
+    """
+
+    def __init__(self, path: Optional[str] = None, half_life: float = 6 * 3600.0, top_k: int = 100,
+                 flush_interval: float = 5.0, clock=time.time):
+        self._path = path
+        self.half_life = half_life
+        self.top_k = top_k
+        self.flush_interval = flush_interval
+        self._clock = clock
+
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._landmark = clock()
+        # 항목별 (landmark 기준 점수, 누적 전송 수, 소문자 태그)
+        self._scores: Dict[ItemKey, float] = {}
+        self._sends: Dict[ItemKey, int] = {}
+        self._tags: Dict[ItemKey, Tuple[str, ...]] = {}
+        # 사용자 -> 그 사용자의 항목, 태그 -> 그 태그를 가진 항목 (전체 그룹은 _scores 자체)
+        self._user_keys: Dict[str, Set[ItemKey]] = {}
+        self._members: Dict[str, Set[ItemKey]] = {}
+        # 그룹(None = 전체, 태그) -> 상위 항목 점수 / 최솟값 항목 / 정렬된 목록 캐시
+        self._tops: Dict[Optional[str], Dict[ItemKey, float]] = {}
+        self._mins: Dict[Optional[str], ItemKey] = {}
+        self._sorted: Dict[Optional[str], List[ItemKey]] = {}
+        # 아직 파일에 반영되지 않은 증가분 (landmark 기준 점수, 전송 수) 과 삭제된 항목
+        self._pending: Dict[ItemKey, List[float]] = {}
+        self._removed: Set[ItemKey] = set()
+        # 마지막으로 읽거나 쓴 파일의 (inode, 크기, mtime)
+        self._file_stamp: Optional[Tuple[int, int, int]] = None
+
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # 기록 / 조회
+    # ------------------------------------------------------------------
+    def record(self, user_id: str, gif: Dict[str, Any], count: int = 1) -> float:
+        """GIF 전송 기록 (amortized O(1)) 후 현재 점수 반환"""
+        key = (user_id, gif['id'])
+        now = self._clock()
+        with self._lock:
+            if (now - self._landmark) / self.half_life > RESCALE_EXPONENT:
+                self._rescale_locked(now)
+            weight = count * 2.0 ** ((now - self._landmark) / self.half_life)
+            tags = self._tags.get(key)
+            if tags is None:
+                tags = _normalize_tags(gif.get('tags', ()))
+                self._track_locked(key, tags)
+            score = self._scores.get(key, 0.0) + weight
+            self._scores[key] = score
+            self._sends[key] = self._sends.get(key, 0) + count
+            pending = self._pending.get(key)
+            if pending is None:
+                self._pending[key] = [weight, count]
+            else:
+                pending[0] += weight
+                pending[1] += count
+            self._removed.discard(key)
+            for group in (None,) + tags:
+                self._offer_locked(group, key, score)
+            return score * 2.0 ** (-(now - self._landmark) / self.half_life)
+
+    def top(self, tag: Optional[str] = None, limit: Optional[int] = None) -> List[Tuple[ItemKey, float, int]]:
+        """전체(tag=None) 또는 태그별 상위 항목 [(키, 현재 점수, 누적 전송 수)] (O(K))"""
+        group = tag.lower() if tag is not None else None
+        now = self._clock()
+        with self._lock:
+            ranked = self._sorted.get(group)
+            if ranked is None:
+                top = self._tops.get(group, {})
+                ranked = sorted(top, key=top.__getitem__, reverse=True)
+                self._sorted[group] = ranked
+            decay = 2.0 ** (-(now - self._landmark) / self.half_life)
+            if limit is not None:
+                ranked = ranked[:limit]
+            return [(key, self._scores[key] * decay, self._sends[key]) for key in ranked]
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    # ------------------------------------------------------------------
+    # top-K 유지
+    # ------------------------------------------------------------------
+    def _offer_locked(self, group: Optional[str], key: ItemKey, score: float) -> None:
+        """점수가 오른 항목을 그룹 top-K 에 반영"""
+        top = self._tops.get(group)
+        if top is None:
+            top = self._tops[group] = {}
+        if key in top:
+            top[key] = score
+            if self._mins.get(group) == key:
+                self._mins.pop(group)
+        elif len(top) < self.top_k:
+            top[key] = score
+            min_key = self._mins.get(group)
+            if min_key is not None and score < top[min_key]:
+                self._mins[group] = key
+        else:
+            min_key = self._min_locked(group)
+            if min_key is None or score <= top[min_key]:
+                return
+            del top[min_key]
+            top[key] = score
+            self._mins.pop(group)
+        self._sorted.pop(group, None)
+
+    def _min_locked(self, group: Optional[str]) -> Optional[ItemKey]:
+        min_key = self._mins.get(group)
+        if min_key is None:
+            top = self._tops[group]
+            if not top:
+                return None
+            min_key = self._mins[group] = min(top, key=top.__getitem__)
+        return min_key
+
+    def _drop_locked(self, group: Optional[str], key: ItemKey, dropped: Set[Optional[str]]) -> None:
+        """그룹 top-K 에서 항목을 빼고 그룹을 dropped 에 추가 (빈자리는 _refill_locked 가 채움)"""
+        top = self._tops.get(group)
+        if top is None or key not in top:
+            return
+        del top[key]
+        self._mins.pop(group, None)
+        self._sorted.pop(group, None)
+        dropped.add(group)
+
+    def _refill_locked(self, groups: Iterable[Optional[str]]) -> None:
+        """항목이 빠진 그룹 top-K 의 빈자리를 그 그룹 항목 중 점수가 높은 것으로 채운다 (O(그룹 크기))"""
+        for group in groups:
+            top = self._tops.get(group, {})
+            members = self._scores if group is None else self._members.get(group, ())
+            needed = self.top_k - len(top)
+            if needed > 0 and len(members) > len(top):
+                for key in heapq.nlargest(needed, (key for key in members if key not in top),
+                                          key=self._scores.__getitem__):
+                    top[key] = self._scores[key]
+            if top:
+                self._tops[group] = top
+            else:
+                self._tops.pop(group, None)
+
+    def _rebuild_locked(self) -> None:
+        self._tops.clear()
+        self._mins.clear()
+        self._sorted.clear()
+        for key, score in self._scores.items():
+            for group in (None,) + self._tags[key]:
+                self._offer_locked(group, key, score)
+
+    def _rescale_locked(self, now: float) -> None:
+        """기준 시각을 now 로 옮기고 거의 0 이 된 항목은 버린다 (RESCALE_EXPONENT 반감기마다 한 번, O(N))"""
+        factor = 2.0 ** (-(now - self._landmark) / self.half_life)
+        self._landmark = now
+        for key in list(self._scores):
+            score = self._scores[key] * factor
+            if score < PRUNE_SCORE and key not in self._pending:
+                self._forget_locked(key)
+            else:
+                self._scores[key] = score
+        for pending in self._pending.values():
+            pending[0] *= factor
+        self._rebuild_locked()
+
+    def _track_locked(self, key: ItemKey, tags: Tuple[str, ...]) -> None:
+        """새 항목을 사용자/태그별 항목 집합에 추가"""
+        self._tags[key] = tags
+        self._user_keys.setdefault(key[0], set()).add(key)
+        for tag in tags:
+            self._members.setdefault(tag, set()).add(key)
+
+    def _untag_locked(self, key: ItemKey, tags: Iterable[str]) -> None:
+        for tag in tags:
+            members = self._members.get(tag)
+            if members is not None:
+                members.discard(key)
+                if not members:
+                    del self._members[tag]
+
+    def _forget_locked(self, key: ItemKey) -> None:
+        self._scores.pop(key, None)
+        self._sends.pop(key, None)
+        tags = self._tags.pop(key, None)
+        if tags is None:
+            return
+        self._untag_locked(key, tags)
+        user_keys = self._user_keys.get(key[0])
+        if user_keys is not None:
+            user_keys.discard(key)
+            if not user_keys:
+                del self._user_keys[key[0]]
+
+    def _remove_locked(self, key: ItemKey, dropped: Set[Optional[str]]) -> None:
+        tags = self._tags.get(key)
+        if tags is None:
+            return
+        self._forget_locked(key)
+        self._pending.pop(key, None)
+        self._removed.add(key)
+        for group in (None,) + tags:
+            self._drop_locked(group, key, dropped)
+
+    def _retag_locked(self, key: ItemKey, tags: Tuple[str, ...], dropped: Set[Optional[str]]) -> None:
+        old_tags = self._tags.get(key)
+        if old_tags is None or old_tags == tags:
+            return
+        self._tags[key] = tags
+        self._untag_locked(key, [group for group in old_tags if group not in tags])
+        for group in old_tags:
+            if group not in tags:
+                self._drop_locked(group, key, dropped)
+        for group in tags:
+            if group not in old_tags:
+                self._members.setdefault(group, set()).add(key)
+                self._offer_locked(group, key, self._scores[key])
+
+    # ------------------------------------------------------------------
+    # GifCatalog 리스너 인터페이스
+    # ------------------------------------------------------------------
+    def on_add(self, user_id: str, gif: Dict[str, Any]) -> None:
+        pass
+
+    def on_remove(self, user_id: str, gif: Dict[str, Any]) -> None:
+        dropped: Set[Optional[str]] = set()
+        with self._lock:
+            self._remove_locked((user_id, gif['id']), dropped)
+            self._refill_locked(dropped)
+
+    def on_update(self, user_id: str, gif: Dict[str, Any]) -> None:
+        dropped: Set[Optional[str]] = set()
+        with self._lock:
+            self._retag_locked((user_id, gif['id']), _normalize_tags(gif.get('tags', ())), dropped)
+            self._refill_locked(dropped)
+
+    def on_replace(self, user_id: str, gifs: List[Dict[str, Any]]) -> None:
+        dropped: Set[Optional[str]] = set()
+        with self._lock:
+            keys = self._user_keys.get(user_id)
+            if not keys:
+                return
+            current = {gif['id']: gif for gif in gifs}
+            for key in list(keys):
+                gif = current.get(key[1])
+                if gif is None:
+                    self._remove_locked(key, dropped)
+                else:
+                    self._retag_locked(key, _normalize_tags(gif.get('tags', ())), dropped)
+            self._refill_locked(dropped)
+
+    # ------------------------------------------------------------------
+    # 저장 / 로드
+    # ------------------------------------------------------------------
+    def _stat(self) -> Optional[Tuple[int, int, int]]:
+        try:
+            st = os.stat(self._path)
+        except OSError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _read_file(self) -> Tuple[float, Dict[ItemKey, List[Any]]]:
+        """파일의 (landmark, {키: [점수, 전송 수, 태그]}) (없거나 깨졌으면 빈 상태)"""
+        try:
+            with open(self._path, 'rb') as f:
+                data = serializer.loads(f.read())
+            landmark = float(data['landmark'])
+            items = {(user_id, gif_id): [score, sends, tuple(tags)]
+                     for user_id, gif_id, score, sends, tags in data['items']}
+            return landmark, items
+        except FileNotFoundError:
+            return self._landmark, {}
+        except Exception as e:
+            print(f"인기 순위 파일 로드 실패 (무시됨): {e}")
+            return self._landmark, {}
+
+    def _replace_locked(self, landmark: float, items: Dict[ItemKey, List[Any]]) -> None:
+        """파일 상태로 메모리를 교체하고 그 뒤에 들어온 기록을 다시 더한다"""
+        factor = 2.0 ** ((landmark - self._landmark) / self.half_life)
+        previous_tags = self._tags
+        self._scores = {key: item[0] * factor for key, item in items.items()}
+        self._sends = {key: item[1] for key, item in items.items()}
+        self._tags = {}
+        self._user_keys = {}
+        self._members = {}
+        for key, item in items.items():
+            self._track_locked(key, item[2])
+        for key, (weight, count) in self._pending.items():
+            if key in self._scores:
+                self._scores[key] += weight
+                self._sends[key] += count
+            else:
+                self._scores[key] = weight
+                self._sends[key] = count
+                self._track_locked(key, previous_tags[key])
+        for key in self._removed:
+            self._forget_locked(key)
+        self._rebuild_locked()
+
+    def load(self) -> None:
+        """파일에서 점수를 로드"""
+        if not self._path:
+            return
+        with self._flush_lock:
+            stamp = self._stat()
+            landmark, items = self._read_file()
+            with self._lock:
+                self._replace_locked(landmark, items)
+                self._file_stamp = stamp
+
+    def flush(self) -> None:
+        """모아 둔 증가분을 파일에 더해 저장 (다른 워커가 바꾼 파일이면 메모리도 파일 기준으로 갱신)"""
+        if not self._path:
+            with self._lock:
+                self._pending = {}
+                self._removed = set()
+            return
+        with self._flush_lock:
+            with self._lock:
+                pending, self._pending = self._pending, {}
+                removed, self._removed = self._removed, set()
+                tags = {key: self._tags[key] for key in pending}
+                landmark = self._landmark
+            # 기록할 것도 없고 다른 워커가 바꾼 것도 없으면 잠금/읽기 없이 끝낸다
+            if not pending and not removed and self._stat() == self._file_stamp:
+                return
+            try:
+                with file_lock(self._path + '.lock'):
+                    stamp = self._stat()
+                    changed = stamp != self._file_stamp
+                    if not pending and not removed and not changed:
+                        return
+                    file_landmark, items = self._read_file()
+                    factor = 2.0 ** ((file_landmark - landmark) / self.half_life)
+                    for key, item in items.items():
+                        item[0] *= factor
+                    for key, (weight, count) in pending.items():
+                        item = items.get(key)
+                        if item is None:
+                            items[key] = [weight, count, tags[key]]
+                        else:
+                            item[0] += weight
+                            item[1] += count
+                            item[2] = tags[key]
+                    for key in removed:
+                        items.pop(key, None)
+                    _atomic_write_json(self._path, {
+                        'landmark': landmark,
+                        'items': [[key[0], key[1], item[0], item[1], list(item[2])]
+                                  for key, item in items.items()],
+                    })
+                    stamp = self._stat()
+            except Exception:
+                with self._lock:
+                    for key, (weight, count) in pending.items():
+                        if key in self._scores:
+                            current = self._pending.setdefault(key, [0.0, 0])
+                            current[0] += weight * 2.0 ** ((landmark - self._landmark) / self.half_life)
+                            current[1] += count
+                    self._removed |= removed - set(self._scores)
+                raise
+            with self._lock:
+                self._file_stamp = stamp
+                if changed:
+                    self._replace_locked(landmark, items)
+
+    # ------------------------------------------------------------------
+    # 백그라운드 flush
+    # ------------------------------------------------------------------
+    def start(self) -> None:
+        """백그라운드 flush 스레드 시작"""
+        if self._thread is not None or self.flush_interval <= 0:
+            return
+        self._thread = threading.Thread(target=self._run, name='gif-trending-flush', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """flush 스레드 종료 및 남은 기록 저장"""
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"인기 순위 flush 중 오류: {e}")
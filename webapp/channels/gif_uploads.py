@@ -0,0 +1,100 @@
+import base64
+import hashlib
+import os
+import tempfile
+from typing import BinaryIO, Callable, Iterator
+
+# 스트리밍/디코딩 시 한 번에 처리하는 크기
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# base64 디코딩 시 제거할 공백 문자
+_WHITESPACE_TABLE = str.maketrans('', '', ' \t\r\n')
+
+
+def write_chunks_atomically(chunks: Iterator[bytes], dest_path: str) -> int:
+    """청크들을 같은 디렉토리의 임시 파일에 쓴 뒤 rename 으로 배치 (기록한 바이트 수 반환)
+
+    중간에 실패하면 임시 파일을 지우므로 dest_path 에는 완성된 파일만 나타난다.
+    """
+    directory = os.path.dirname(os.path.abspath(dest_path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.upload-', suffix='.part')
+    written = 0
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        os.replace(tmp_path, dest_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return written
+
+
+class StagedFile:
+    """청크를 하나씩 받아 임시 파일에 쓰면서 sha256 을 계산하고, 다 받은 뒤 commit() 으로 배치하는 파일
+
+    청크를 반복자로 넘길 수 없는 경우 (asyncio 서버가 청크마다 I/O 스레드에서 write() 를 부르는 경우) 에 쓴다.
+    최종 파일 이름은 모든 청크를 받은 뒤에 정할 수 있다.
+    """
+
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        fd, self.path = tempfile.mkstemp(dir=directory, prefix='.upload-', suffix='.part')
+        self._file = os.fdopen(fd, 'wb')
+        self._hasher = hashlib.sha256()
+        self.size = 0
+
+    def write(self, chunk: bytes) -> None:
+        self._hasher.update(chunk)
+        self._file.write(chunk)
+        self.size += len(chunk)
+
+    def hexdigest(self) -> str:
+        return self._hasher.hexdigest()
+
+    def close(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+
+    def commit(self, dest_path: str) -> None:
+        """임시 파일을 dest_path 로 rename"""
+        self.close()
+        os.replace(self.path, dest_path)
+
+    def discard(self) -> None:
+        """임시 파일 삭제 (commit 후거나 이미 옮겨졌으면 무시)"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def iter_stream(stream: BinaryIO, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """파일 객체를 고정 크기 청크로 읽기"""
+    read: Callable[[int], bytes] = stream.read
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+
+
+def iter_base64_decoded(base64_data: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """base64 문자열을 청크 단위로 디코딩 (data URL 헤더 허용)
+
+    전체 디코딩 결과를 메모리에 올리지 않고 chunk_size 글자씩 잘라 디코딩한다.
+    """
+    start = base64_data.find(',') + 1  # 'data:image/gif;base64,' 헤더 건너뛰기
+    chunk_size -= chunk_size % 4
+    carry = ''
+    for i in range(start, len(base64_data), chunk_size):
+        piece = carry + base64_data[i:i + chunk_size].translate(_WHITESPACE_TABLE)
+        usable = len(piece) - len(piece) % 4
+        carry = piece[usable:]
+        if usable:
+            yield base64.b64decode(piece[:usable])
+    if carry:
+        # 패딩이 빠진 마지막 조각
+        yield base64.b64decode(carry + '=' * (-len(carry) % 4))
+
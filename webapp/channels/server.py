@@ -1,43 +1,170 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, abort, g
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
-import json
-import base64
 import os
-from typing import List, Dict, Any
+import atexit
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, BinaryIO, Callable, Dict, List, Optional, Tuple
+import time
 import uuid
 from datetime import datetime
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from gif_catalog import GifCatalog
+from gif_search import GifSearchIndex
+from gif_uploads import StagedFile, iter_base64_decoded, iter_stream, write_chunks_atomically
+from gif_thumbnails import THUMBNAIL_DIRNAME, ThumbnailPipeline, remove_thumbnails, thumbnail_fields, thumbnail_paths
+from gif_transcode import VARIANT_DIRNAME, TranscodePipeline, remove_variants, variant_paths, variant_records
+from gif_admission import RateLimiter, UploadGate, admission_key, retry_after
+from gif_blobs import BLOB_DIRNAME, BlobStore, BlobSweeper, is_blob_file, referenced_digests
+from gif_changes import ChangeLog
+from gif_http_cache import ResponseCache, UserVersions
+from gif_metrics import (
+    ADMISSION_REJECTIONS, JSON_BYTES, JSON_SECONDS, REQUEST_BYTES, REQUEST_SECONDS, RESPONSE_BYTES, SEARCH_SECONDS, STORAGE_SECONDS,
+    TRANSCODE_SAVED_BYTES, TRANSCODE_SECONDS,
+    RequestProfiler, registry, timed,
+)
+from gif_paging import decode_cursor, page, parse_fields, project
+from gif_records import new_gif_id, pack, public, unpack
+from gif_serialization import FragmentCache, encode_payload, serializer
+from gif_static import IMMUTABLE_CACHE_CONTROL, OpenFileCache, resolve_path, send_gif_file
+from gif_storage import JsonFileStorage, create_storage, ensure_initialized
+from gif_trending import TrendingIndex
+
+class SerializerJSONProvider(JSONProvider):
+    """jsonify / request.json 도 gif_serialization 의 직렬화기(orjson 우선)를 쓰도록 교체"""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        with JSON_SECONDS.time(operation='dumps'):
+            data = serializer.dumps(obj)
+        JSON_BYTES.observe(len(data), operation='dumps')
+        return data.decode('utf-8')
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        JSON_BYTES.observe(len(s), operation='loads')
+        with JSON_SECONDS.time(operation='loads'):
+            return serializer.loads(s)
 
 app = Flask(__name__)
+app.json = SerializerJSONProvider(app)
 CORS(app)  # CORS 설정 (프론트엔드와 연결을 위해)
 
 # 설정
 JSON_FILE_PATH = 'users_gifs.json'
-BASE_GIF_DIRECTORY = '/opt/mattermost/client/gifs'
+BASE_GIF_DIRECTORY = os.environ.get('GIF_BASE_DIRECTORY', '/opt/mattermost/client/gifs')
 # BASE_GIF_DIRECTORY = './public/gifs'
 
+# 저장소 백엔드: 'json' (단일 users_gifs.json), 'sharded' (사용자별 파일), 'sqlite'
+STORAGE_BACKEND = os.environ.get('GIF_STORAGE_BACKEND', 'json')
+SHARD_DIRECTORY = os.environ.get('GIF_SHARD_DIRECTORY', 'users_gifs')
+SQLITE_PATH = os.environ.get('GIF_SQLITE_PATH', 'users_gifs.db')
+
+# 내용 해시 기반 중복 제거 저장소 사용 여부 (BASE_GIF_DIRECTORY/blobs/)
+BLOB_STORE_ENABLED = os.environ.get('GIF_BLOB_STORE', '1') == '1'
+
+# GET 응답 캐시 설정 (직렬화 본문 LRU 항목 수, Cache-Control 헤더)
+RESPONSE_CACHE_SIZE = int(os.environ.get('GIF_RESPONSE_CACHE_SIZE', '1024'))
+RESPONSE_CACHE_CONTROL = os.environ.get('GIF_RESPONSE_CACHE_CONTROL', 'private, no-cache')
+
+# 목록 응답 조립용 레코드별 JSON 조각 캐시 항목 수 (0 이면 매번 인코딩)
+FRAGMENT_CACHE_SIZE = int(os.environ.get('GIF_FRAGMENT_CACHE_SIZE', '100000'))
+
+# 업로드 스트리밍/디코딩 청크 크기 (바이트)
+UPLOAD_CHUNK_SIZE = int(os.environ.get('GIF_UPLOAD_CHUNK_SIZE', str(64 * 1024)))
+
+# 썸네일 생성 설정 (워커 프로세스 수, 최대 대기 작업 수, 최대 가로/세로 px)
+THUMBNAIL_WORKERS = int(os.environ.get('GIF_THUMBNAIL_WORKERS', '2'))
+THUMBNAIL_MAX_PENDING = int(os.environ.get('GIF_THUMBNAIL_MAX_PENDING', '64'))
+THUMBNAIL_SIZE = int(os.environ.get('GIF_THUMBNAIL_SIZE', '200'))
+
+# 전송용 변형(팔레트 최적화 GIF, 애니메이션 WebP, MP4) 생성 설정 (워커 프로세스 수가 0 이면 꺼짐)
+# mp4 는 ffmpeg 가 PATH 에 있을 때만, webp 는 Pillow 가 WebP 를 지원할 때만 만든다
+TRANSCODE_WORKERS = int(os.environ.get('GIF_TRANSCODE_WORKERS', '0'))
+TRANSCODE_FORMATS = [fmt.strip() for fmt in os.environ.get('GIF_TRANSCODE_FORMATS', 'gif,webp,mp4').split(',') if fmt.strip()]
+TRANSCODE_MAX_PENDING = int(os.environ.get('GIF_TRANSCODE_MAX_PENDING', '64'))
+TRANSCODE_WEBP_QUALITY = int(os.environ.get('GIF_TRANSCODE_WEBP_QUALITY', '80'))
+TRANSCODE_MP4_CRF = int(os.environ.get('GIF_TRANSCODE_MP4_CRF', '28'))
+
+# 여러 워커 프로세스(wsgi.py)가 같은 blob 디렉토리를 쓸 때, 이 시간(초) 안에 저장/재사용된 blob 은 삭제하지 않음
+BLOB_RELEASE_GRACE = float(os.environ.get('GIF_BLOB_RELEASE_GRACE', '60'))
+# 저장소 전체 레코드를 훑어 참조되지 않는 blob 을 지우는 주기 (초, 0 이면 끔)와 지우지 않을 최근 저장/재사용 시간 (초)
+# 지연 로드 모드에서는 release() 가 아무것도 지우지 않으므로 이것이 유일한 정리 경로다
+BLOB_SWEEP_INTERVAL = float(os.environ.get('GIF_BLOB_SWEEP_INTERVAL', '3600'))
+BLOB_SWEEP_MIN_AGE = float(os.environ.get('GIF_BLOB_SWEEP_MIN_AGE', '3600'))
+
+# 카탈로그 write-behind 설정 (초 단위 주기, 0 이면 매 변경마다 즉시 저장)
+CATALOG_FLUSH_INTERVAL = float(os.environ.get('GIF_CATALOG_FLUSH_INTERVAL', '1.0'))
+# 이 개수 이상의 변경이 쌓이면 주기를 기다리지 않고 저장
+CATALOG_FLUSH_THRESHOLD = int(os.environ.get('GIF_CATALOG_FLUSH_THRESHOLD', '100'))
+# 카탈로그 지연 로드: 메모리에 올려 둘 최대 GIF 수 (0 이면 시작 시 전체 로드)
+# 양수면 요청된 사용자 목록만 저장소에서 읽고 넘치면 오래 쓰지 않은 사용자부터 내보낸다 (sharded/sqlite 저장소 필요)
+CATALOG_CACHE_GIFS = int(os.environ.get('GIF_CATALOG_CACHE_GIFS', '0'))
+# 추가/삭제 응답 전에 변경이 디스크에 기록(fsync)될 때까지 대기 (동시 요청은 한 번의 기록으로 묶임)
+DURABLE_WRITES = os.environ.get('GIF_DURABLE_WRITES', '1') == '1'
+# 기록 완료 대기 최대 시간 (초, 넘으면 저장 실패로 응답)
+COMMIT_TIMEOUT = float(os.environ.get('GIF_COMMIT_TIMEOUT', '10'))
+
+# 새로 저장하는 GIF 의 URL 접두사 (예전 '/gifs' URL 도 계속 서빙)
+GIF_URL_PREFIX = os.environ.get('GIF_URL_PREFIX', '/static/gifs')
+# 정적 GIF 서빙: 내용 해시 이름이 아닌 파일의 캐시 시간 (초)
+STATIC_MAX_AGE = int(os.environ.get('GIF_STATIC_MAX_AGE', '3600'))
+# 정적 GIF 서빙: 재사용할 열린 파일 디스크립터 수
+STATIC_OPEN_FILES = int(os.environ.get('GIF_STATIC_OPEN_FILES', '256'))
+
+# 인기 순위: 전송 기록 파일 (여러 워커가 잠금 후 합쳐서 기록)
+TRENDING_PATH = os.environ.get('GIF_TRENDING_PATH', 'gif_trending.json')
+# 인기 순위: 점수가 절반이 되는 시간 (초)
+TRENDING_HALF_LIFE = float(os.environ.get('GIF_TRENDING_HALF_LIFE', str(6 * 3600)))
+# 인기 순위: 전체/태그별로 유지할 상위 항목 수
+TRENDING_TOP_K = int(os.environ.get('GIF_TRENDING_TOP_K', '100'))
+# 인기 순위: 전송 기록을 파일에 모아 쓰는 주기 (초)
+TRENDING_FLUSH_INTERVAL = float(os.environ.get('GIF_TRENDING_FLUSH_INTERVAL', '5.0'))
+
+# 변경 기록: SQLite 파일 (여러 워커가 함께 씀), 보관 기간 (초), 다른 워커가 쓴 기록을 확인하는 주기 (초)
+CHANGES_PATH = os.environ.get('GIF_CHANGES_PATH', 'gif_changes.db')
+CHANGES_RETENTION = float(os.environ.get('GIF_CHANGES_RETENTION', str(7 * 24 * 3600)))
+CHANGES_POLL_INTERVAL = float(os.environ.get('GIF_CHANGES_POLL_INTERVAL', '0.5'))
+# 변경 조회: 한 번에 돌려주는 최대 변경 수, long-poll(wait=<초>) 최대 대기 시간 (초)
+CHANGES_MAX_LIMIT = int(os.environ.get('GIF_CHANGES_MAX_LIMIT', '500'))
+CHANGES_MAX_WAIT = float(os.environ.get('GIF_CHANGES_MAX_WAIT', '25'))
+# 변경 스트림(SSE): 한 연결을 유지하는 시간 (초, 끝나면 클라이언트가 Last-Event-ID 로 다시 연결), keepalive 주기 (초)
+CHANGES_STREAM_SECONDS = float(os.environ.get('GIF_CHANGES_STREAM_SECONDS', '300'))
+CHANGES_HEARTBEAT = float(os.environ.get('GIF_CHANGES_HEARTBEAT', '15'))
+# long-poll/SSE 로 워커 스레드를 붙잡아 둘 수 있는 요청 수 (워커별, 0 이면 무제한)
+# (넘으면 long-poll 은 기다리지 않고 바로 응답, SSE 는 503)
+CHANGES_MAX_WAITERS = int(os.environ.get('GIF_CHANGES_MAX_WAITERS', '2'))
+CHANGES_RETRY_AFTER = 5.0
+
+# /metrics 에 사용자별 GIF 수를 내보낼 최대 사용자 수 (GIF 가 많은 순)
+METRICS_MAX_USERS = int(os.environ.get('GIF_METRICS_MAX_USERS', '50'))
+# 요청 프로파일링: 이 헤더 값이 GIF_PROFILE_TOKEN 과 같은 요청만 cProfile 로 측정 (토큰이 비어 있으면 꺼짐)
+PROFILE_HEADER = 'X-Gif-Profile'
+PROFILE_TOKEN = os.environ.get('GIF_PROFILE_TOKEN', '')
+PROFILE_DIRECTORY = os.environ.get('GIF_PROFILE_DIR', 'profiles')
+
+# 요청 본문 최대 크기 (바이트, 넘으면 413): 스트리밍 업로드는 읽는 중에, JSON 본문은 파싱 전에 확인
+# (JSON 기본값은 base64 로 4/3 배가 된 같은 크기의 GIF 가 들어갈 만큼)
+MAX_UPLOAD_SIZE = int(os.environ.get('GIF_MAX_UPLOAD_SIZE', str(32 * 1024 * 1024)))
+MAX_JSON_BODY_SIZE = int(os.environ.get('GIF_MAX_JSON_BODY_SIZE', str(MAX_UPLOAD_SIZE * 4 // 3 + 64 * 1024)))
+# 사용자별 추가/업로드/삭제 요청 수 제한 (토큰 버킷: 초당 보충 수, 최대 연속 요청 수, 0 이면 끔, 넘으면 429)
+RATE_LIMIT_PER_SECOND = float(os.environ.get('GIF_RATE_LIMIT_PER_SECOND', '2'))
+RATE_LIMIT_BURST = float(os.environ.get('GIF_RATE_LIMIT_BURST', '20'))
+# 동시에 처리하는 추가/업로드 요청 수 (0 이면 무제한), 자리를 기다리는 최대 시간 (초, 넘으면 503)
+MAX_CONCURRENT_UPLOADS = int(os.environ.get('GIF_MAX_CONCURRENT_UPLOADS', '8'))
+UPLOAD_QUEUE_TIMEOUT = float(os.environ.get('GIF_UPLOAD_QUEUE_TIMEOUT', '0.5'))
+# 동시 업로드 제한으로 거절할 때 Retry-After (초)
+UPLOAD_RETRY_AFTER = float(os.environ.get('GIF_UPLOAD_RETRY_AFTER', '1'))
+# 배치 요청 한 번에 처리하는 최대 항목(GIF 또는 사용자) 수
+BATCH_MAX_ITEMS = int(os.environ.get('GIF_BATCH_MAX_ITEMS', '100'))
+# 배치 안의 base64 디코딩/파일 쓰기/삭제를 병렬로 처리할 스레드 수
+BATCH_IO_THREADS = int(os.environ.get('GIF_BATCH_IO_THREADS', '4'))
+# 그 밖의 요청 본문도 JSON 최대 크기로 제한 (스트리밍 업로드는 요청마다 MAX_UPLOAD_SIZE 로 올림)
+app.config['MAX_CONTENT_LENGTH'] = MAX_JSON_BODY_SIZE
+
 # 기본 디렉토리 생성
 os.makedirs(BASE_GIF_DIRECTORY, exist_ok=True)
 
-# LocalGif 타입 정의
-class LocalGif:
-    def __init__(self, id: str, title: str, url: str, thumbnailUrl: str, tags: List[str], userId: str):
-        self.id = id
-        self.title = title
-        self.url = url
-        self.thumbnailUrl = thumbnailUrl
-        self.tags = tags
-        self.userId = userId
-    
-    def to_dict(self) -> Dict[str, Any]:
-        return {
-            'id': self.id,
-            'title': self.title,
-            'url': self.url,
-            'thumbnailUrl': self.thumbnailUrl,
-            'tags': self.tags,
-            'userId': self.userId
-        }
-
 # 기본 GIF 데이터 (각 사용자마다 초기화됨)
 DEFAULT_LOCAL_GIFS = []
 
@@ -47,65 +174,1093 @@ def get_user_gif_directory(user_id: str) -> str:
     os.makedirs(user_dir, exist_ok=True)  # 디렉토리가 없으면 생성
     return user_dir
 
+storage = create_storage(STORAGE_BACKEND, JSON_FILE_PATH, SHARD_DIRECTORY, SQLITE_PATH)
+if CATALOG_CACHE_GIFS > 0 and isinstance(storage, JsonFileStorage):
+    # 단일 JSON 파일은 한 사용자만 읽을 수 없으므로 전체 로드로 동작
+    print("⚠️  카탈로그 지연 로드는 sharded/sqlite 저장소에서만 동작합니다 (GIF_STORAGE_BACKEND=sharded 면 "
+          f"{JSON_FILE_PATH} 에서 자동 변환). 전체 로드로 시작합니다.")
+    CATALOG_CACHE_GIFS = 0
+
+def ensure_storage() -> None:
+    """저장소가 없으면 기존 JSON 파일에서 변환하거나 빈 저장소로 초기화"""
+    ensure_initialized(storage, JSON_FILE_PATH)
+
+@timed(STORAGE_SECONDS, operation='load_all')
 def load_users_gifs() -> Dict[str, List[Dict[str, Any]]]:
-    """JSON 파일에서 사용자별 GIF 목록을 로드"""
+    """저장소에서 사용자별 GIF 목록을 로드"""
     try:
-        if os.path.exists(JSON_FILE_PATH):
-            with open(JSON_FILE_PATH, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        else:
-            # 파일이 없으면 빈 딕셔너리로 초기화
-            save_users_gifs({})
-            return {}
+        ensure_storage()
+        return storage.load_all()
     except Exception as e:
         print(f"사용자 GIF 로드 중 오류: {e}")
         return {}
 
+@timed(STORAGE_SECONDS, operation='load_users')
+def load_some_users_gifs(user_ids) -> Dict[str, List[Dict[str, Any]]]:
+    """저장소에서 일부 사용자 목록만 로드 (카탈로그 기록 시 최신 상태와 합치기 위해 사용)"""
+    return storage.load_users(user_ids)
+
+@timed(STORAGE_SECONDS, operation='save_users')
 def save_users_gifs(users_gifs: Dict[str, List[Dict[str, Any]]]) -> bool:
-    """사용자별 GIF 목록을 JSON 파일에 저장"""
+    """주어진 사용자들의 GIF 목록만 저장 (나머지 사용자는 저장소 쪽 유지)"""
+    try:
+        storage.save_users(users_gifs)
+        return True
+    except Exception as e:
+        print(f"사용자 GIF 저장 중 오류: {e}")
+        return False
+
+@timed(STORAGE_SECONDS, operation='apply_operations')
+def apply_gif_operations(operations: List[Tuple[str, Tuple[Any, ...]]]) -> bool:
+    """카탈로그 변경 작업을 저장소의 해당 행에만 적용 (SQLite)"""
     try:
-        with open(JSON_FILE_PATH, 'w', encoding='utf-8') as f:
-            json.dump(users_gifs, f, ensure_ascii=False, indent=2)
+        storage.apply_operations(operations)
         return True
     except Exception as e:
         print(f"사용자 GIF 저장 중 오류: {e}")
         return False
 
+# 프로세스 상주 카탈로그: 시작 시 한 번 로드하고 변경은 주기적으로 일괄 저장
+# (워커가 여러 개여도 저장 시 파일 잠금 안에서 최신 목록에 변경 작업을 다시 적용)
+catalog = GifCatalog(
+    load_fn=load_users_gifs,
+    load_users_fn=load_some_users_gifs,
+    save_fn=save_users_gifs,
+    path=storage.watch_path,
+    process_lock=storage.lock,
+    flush_interval=CATALOG_FLUSH_INTERVAL,
+    flush_threshold=CATALOG_FLUSH_THRESHOLD,
+    # 메모리에는 LocalGif (__slots__, 문자열/태그 intern) 로 보관
+    pack=pack,
+    unpack=unpack,
+    max_cached_gifs=CATALOG_CACHE_GIFS,
+    apply_fn=apply_gif_operations if hasattr(storage, 'apply_operations') else None,
+)
+# 검색용 사용자별 역색인 (카탈로그 변경 시 점진적으로 갱신)
+search_index = GifSearchIndex(catalog)
+catalog.add_listener(search_index)
+# blob 참조 수는 카탈로그 레코드의 'blob' 필드로부터 유지
+blobs = BlobStore(os.path.join(BASE_GIF_DIRECTORY, BLOB_DIRNAME), url_root=f'{GIF_URL_PREFIX}/{BLOB_DIRNAME}',
+                  release_grace=BLOB_RELEASE_GRACE, partial_refs=catalog.lazy)
+catalog.add_listener(blobs)
+# 정적 GIF 응답용 열린 파일 캐시
+open_files = OpenFileCache(STATIC_OPEN_FILES)
+atexit.register(open_files.close)
+# 배치 추가/삭제의 파일 작업용 스레드 풀
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_IO_THREADS, thread_name_prefix='gif-batch')
+atexit.register(batch_executor.shutdown)
+# 사용자별 버전 (ETag) 과 직렬화된 GET 응답 캐시
+user_versions = UserVersions()
+catalog.add_listener(user_versions)
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+fragment_cache = FragmentCache(FRAGMENT_CACHE_SIZE)
+# 전체 사용자 대상 인기 순위 (전송 기록, 시간 감쇠 top-K)
+trending = TrendingIndex(TRENDING_PATH, half_life=TRENDING_HALF_LIFE, top_k=TRENDING_TOP_K,
+                         flush_interval=TRENDING_FLUSH_INTERVAL)
+catalog.add_listener(trending)
+# 사용자별 변경 기록 (추가/삭제/갱신, 클라이언트 증분 동기화용)
+changes = ChangeLog(CHANGES_PATH, retention=CHANGES_RETENTION, poll_interval=CHANGES_POLL_INTERVAL, unpack=public)
+catalog.add_listener(changes)
+if catalog.lazy:
+    # 지연 로드는 load_users_gifs 를 거치지 않으므로 저장소 변환/초기화만 먼저
+    try:
+        ensure_storage()
+    except Exception as e:
+        print(f"저장소 초기화 중 오류: {e}")
+catalog.load()
+catalog.start()
+atexit.register(catalog.stop)
+trending.load()
+trending.start()
+atexit.register(trending.stop)
+changes.start()
+atexit.register(changes.stop)
+
+# /metrics 수집 시점에 읽는 값
+def cache_samples():
+    caches = [('response', response_cache), ('fragment', fragment_cache), ('open_file', open_files)]
+    if catalog.lazy:
+        caches.append(('catalog', catalog))
+    for name, cache in caches:
+        yield (name, 'hit'), cache.hits
+        yield (name, 'miss'), cache.misses
+
+def catalog_user_samples():
+    sizes = catalog.user_sizes()
+    for user_id in sorted(sizes, key=sizes.get, reverse=True)[:METRICS_MAX_USERS]:
+        yield (user_id,), sizes[user_id]
+
+registry.callback('gif_cache_requests_total', '캐시 조회 수', ('cache', 'result'), cache_samples, kind='counter')
+registry.callback('gif_cache_entries', '캐시 항목 수', ('cache',), lambda: [
+    (('response',), len(response_cache)), (('fragment',), len(fragment_cache)), (('open_file',), len(open_files))])
+registry.callback('gif_catalog_users', '카탈로그 사용자 수', (), lambda: [((), len(catalog.user_sizes()))])
+registry.callback('gif_catalog_gifs', '카탈로그 전체 GIF 수', (), lambda: [((), sum(catalog.user_sizes().values()))])
+registry.callback('gif_catalog_user_gifs', f'사용자별 GIF 수 (상위 {METRICS_MAX_USERS}명)', ('user',), catalog_user_samples)
+registry.callback('gif_catalog_pending_operations', '아직 기록되지 않은 카탈로그 작업 수', (),
+                  lambda: [((), catalog.pending_count())])
+if catalog.lazy:
+    registry.callback('gif_catalog_cached_gifs', f'메모리에 올린 GIF 수 (최대 {CATALOG_CACHE_GIFS})', (),
+                      lambda: [((), catalog.cached_gifs())])
+    registry.callback('gif_catalog_evictions_total', '메모리에서 내보낸 사용자 수', (),
+                      lambda: [((), catalog.evictions)], kind='counter')
+registry.callback('gif_trending_items', '인기 순위 추적 항목 수', (), lambda: [((), len(trending))])
+registry.callback('gif_changes_latest_seq', '이 워커가 아는 최신 변경 seq', (), lambda: [((), changes.latest)])
+profiler = RequestProfiler(PROFILE_TOKEN, PROFILE_DIRECTORY)
+# 업로드/삭제 요청 수 제한과 동시 업로드 제한
+rate_limiter = RateLimiter(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
+upload_gate = UploadGate(MAX_CONCURRENT_UPLOADS)
+registry.callback('gif_uploads_in_progress', '처리 중인 추가/업로드 요청 수', (), lambda: [((), upload_gate.active)])
+registry.callback('gif_rate_limit_buckets', '요청 수 제한을 추적 중인 사용자 수', (), lambda: [((), len(rate_limiter))])
+# 변경 long-poll/SSE 로 대기 중인 요청 수 제한
+change_waiters = UploadGate(CHANGES_MAX_WAITERS)
+registry.callback('gif_changes_waiters', '변경을 기다리는 long-poll/SSE 요청 수', (), lambda: [((), change_waiters.active)])
+
+# 제한을 적용하는 엔드포인트 (JSON 본문 추가, 스트리밍 업로드, 배치 추가(JSON 또는 multipart), 삭제)
+JSON_UPLOAD_ENDPOINTS = frozenset({'add_gif', 'add_user_gif_by_path'})
+STREAM_UPLOAD_ENDPOINTS = frozenset({'upload_gif', 'upload_user_gif_by_path'})
+BATCH_UPLOAD_ENDPOINTS = frozenset({'add_gifs_batch', 'add_user_gifs_batch_by_path'})
+UPLOAD_ENDPOINTS = JSON_UPLOAD_ENDPOINTS | STREAM_UPLOAD_ENDPOINTS | BATCH_UPLOAD_ENDPOINTS
+RATE_LIMITED_ENDPOINTS = UPLOAD_ENDPOINTS | {
+    'delete_gif', 'delete_user_gif_by_path', 'delete_gifs_batch', 'delete_user_gifs_batch_by_path'}
+
+def is_streaming_upload(endpoint: str, mimetype: str) -> bool:
+    """본문을 미리 읽지 않고 읽으면서 저장하는 업로드인지 (크기 제한은 MAX_UPLOAD_SIZE)"""
+    return endpoint in STREAM_UPLOAD_ENDPOINTS or (
+        endpoint in BATCH_UPLOAD_ENDPOINTS and mimetype == 'multipart/form-data')
+
+def request_route() -> str:
+    """메트릭 레이블용 라우트 패턴 (매칭되지 않은 요청은 하나로 묶음)"""
+    return request.url_rule.rule if request.url_rule is not None else 'unmatched'
+
+@app.before_request
+def start_request_metrics():
+    g.metrics_started = time.perf_counter()
+    if profiler.wants(request.headers.get(PROFILE_HEADER)):
+        g.profile = profiler.start()
+        if g.profile is None:
+            return admission_error('다른 요청을 프로파일링 중입니다. 잠시 후 다시 시도하세요.', 409, 'profile_busy')
+
+@app.after_request
+def record_request_metrics(response):
+    route = request_route()
+    profile = g.pop('profile', None)
+    if profile is not None:
+        path = profiler.finish(profile, route)
+        if path:
+            # 서버 경로는 로그에만 남기고 응답에는 파일 이름만
+            print(f"프로파일 저장: {path}")
+            response.headers['X-Gif-Profile-File'] = os.path.basename(path)
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        REQUEST_SECONDS.observe(time.perf_counter() - started,
+                                method=request.method, route=route, status=response.status_code)
+    if request.content_length:
+        REQUEST_BYTES.observe(request.content_length, method=request.method, route=route)
+    if response.content_length is not None:
+        RESPONSE_BYTES.observe(response.content_length, method=request.method, route=route)
+    return response
+
+@app.teardown_request
+def stop_request_profile(exc):
+    # after_request 가 실행되지 않은 (처리되지 않은 예외) 요청의 프로파일러 정리
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.discard(profile)
+
+def admission_error(message: str, status: int, reason: str, retry_after_seconds: Optional[float] = None):
+    """제한으로 거절하는 응답 (retry_after_seconds 가 있으면 Retry-After 헤더 포함)"""
+    ADMISSION_REJECTIONS.inc(route=request_route(), reason=reason)
+    response = jsonify({
+        'success': False,
+        'error': message
+    })
+    response.status_code = status
+    if retry_after_seconds is not None:
+        response.headers['Retry-After'] = retry_after(retry_after_seconds)
+    return response
+
+def too_large_response():
+    return admission_error(f'요청 본문이 너무 큽니다. (최대 {request.max_content_length} 바이트)', 413, 'too_large')
+
+@app.before_request
+def admit_request():
+    """추가/업로드/삭제 요청의 본문 크기, 사용자별 요청 수, 동시 업로드 수 확인
+
+    Content-Length 로 본문을 읽기 전에 먼저 거절하고, 요청 수와 업로드 자리를 확인한 뒤에야
+    JSON 본문을 제한 안에서 미리 읽어 둔다 (Content-Length 없이 들어와도 제한을 넘는 순간 멈춘다).
+    스트리밍 업로드는 읽는 중에 넘으면 413. 잡은 업로드 자리는 teardown 에서 돌려준다.
+    배치는 여기서 토큰 하나를 쓰고 나머지 항목 수만큼은 본문을 읽은 뒤 charge_batch_items 로 뺀다.
+    """
+    endpoint = request.endpoint
+    if endpoint not in RATE_LIMITED_ENDPOINTS:
+        return None
+    streaming = is_streaming_upload(endpoint, request.mimetype)
+    if streaming:
+        request.max_content_length = MAX_UPLOAD_SIZE
+    if request.content_length is not None and request.content_length > request.max_content_length:
+        return too_large_response()
+    
+    # 본문을 읽지 않고 경로/쿼리의 사용자 ID, Bearer 토큰, 클라이언트 주소 순으로 키를 정한다
+    g.admission_key = admission_key((request.view_args or {}).get('user_id'), request.args.get('userId'),
+                                    request.headers.get('Authorization'), request.remote_addr)
+    wait = rate_limiter.acquire(g.admission_key)
+    if wait > 0:
+        return admission_error('요청이 너무 많습니다. 잠시 후 다시 시도하세요.', 429, 'rate_limited', wait)
+    
+    if endpoint in UPLOAD_ENDPOINTS:
+        if not upload_gate.try_acquire(UPLOAD_QUEUE_TIMEOUT):
+            return admission_error('처리 중인 업로드가 많습니다. 잠시 후 다시 시도하세요.', 503, 'busy',
+                                   UPLOAD_RETRY_AFTER)
+        g.upload_slot = True
+    
+    if endpoint in UPLOAD_ENDPOINTS and not streaming:
+        try:
+            if len(request.get_data(cache=True)) >= request.max_content_length:
+                # Content-Length 없는 본문은 제한만큼 읽고 멈추므로, 더 읽어 보면 넘친 경우 RequestEntityTooLarge
+                request.stream.read(1)
+        except RequestEntityTooLarge:
+            return too_large_response()
+    return None
+
+def charge_batch_items(count: int) -> None:
+    """배치 요청의 두 번째 항목부터 항목마다 토큰 하나씩 추가로 쓴다 (첫 항목은 admit_request 에서)"""
+    rate_limiter.charge(g.get('admission_key', ''), count - 1)
+
+@app.teardown_request
+def release_upload_slot(exc):
+    if g.pop('upload_slot', False):
+        upload_gate.release()
+
 def get_user_gifs(user_id: str) -> List[Dict[str, Any]]:
-    """특정 사용자의 GIF 목록 반환"""
-    users_gifs = load_users_gifs()
-    if user_id not in users_gifs:
+    """특정 사용자의 GIF 목록 반환 (반환된 리스트는 수정하지 말 것)"""
+    user_gifs = catalog.get_user_gifs(user_id)
+    if user_gifs is None:
         # 새 사용자면 기본 GIF로 초기화
-        users_gifs[user_id] = [
+        user_gifs = catalog.init_user_gifs(user_id, [
             {**gif, 'userId': user_id} for gif in DEFAULT_LOCAL_GIFS
-        ]
-        save_users_gifs(users_gifs)
-    return users_gifs[user_id]
+        ])
+    return user_gifs
+
+def commit_changes() -> bool:
+    """DURABLE_WRITES 면 지금까지의 변경이 디스크에 기록될 때까지 대기
+
+    응답 전에 변경 기록도 써 두어 (다른 워커로 가는) 바로 다음 변경 조회에서 보이게 한다.
+    """
+    if DURABLE_WRITES and not catalog.sync(COMMIT_TIMEOUT):
+        print(f"카탈로그 기록 대기 시간 초과 ({COMMIT_TIMEOUT}초)")
+        return False
+    changes.flush()
+    return True
 
 def save_user_gifs(user_id: str, gifs: List[Dict[str, Any]]) -> bool:
     """특정 사용자의 GIF 목록 저장"""
-    users_gifs = load_users_gifs()
-    users_gifs[user_id] = gifs
-    return save_users_gifs(users_gifs)
+    catalog.set_user_gifs(user_id, gifs)
+    return commit_changes()
+
+def new_user_gif_id(user_id: str, title: Any) -> str:
+    """모든 추가 경로에서 쓰는 고유 GIF ID (같은 초에 같은 제목이 와도 겹치지 않음)"""
+    return new_gif_id(f"{user_id}_{title}")
+
+def add_user_gif(user_id: str, gif: Dict[str, Any]) -> bool:
+    """특정 사용자의 GIF 목록에 항목 추가 (기록 완료 후 True)"""
+    get_user_gifs(user_id)
+    catalog.add_user_gif(user_id, gif)
+    return commit_changes()
+
+def remove_user_gif(user_id: str, gif_id: str) -> Optional[Dict[str, Any]]:
+    """특정 사용자의 GIF 목록에서 항목 제거 (기록 완료 후 제거된 항목 반환)"""
+    removed = catalog.remove_user_gif(user_id, gif_id)
+    if removed is None or not commit_changes():
+        return None
+    return removed
+
+def on_thumbnails_ready(user_id: str, gif_id: str, gif_url: str) -> None:
+    """썸네일 생성 완료 시 thumbnailUrl 을 생성된 미리보기로 교체"""
+    catalog.update_user_gif(user_id, gif_id, thumbnail_fields(gif_url))
+
+# 업로드 요청을 막지 않도록 별도 프로세스 풀에서 썸네일 생성
+thumbnails = ThumbnailPipeline(
+    on_ready=on_thumbnails_ready,
+    max_workers=THUMBNAIL_WORKERS,
+    max_pending=THUMBNAIL_MAX_PENDING,
+    max_size=THUMBNAIL_SIZE,
+)
+atexit.register(thumbnails.shutdown)
+
+def schedule_thumbnails(user_id: str, gif: Dict[str, Any], gif_path: str) -> None:
+    """썸네일 생성 예약 (완료 전까지는 thumbnailUrl 이 원본 url)"""
+    if not thumbnails.enabled:
+        return
+    if all(os.path.exists(path) for path in thumbnail_paths(gif_path)):
+        # 같은 blob 의 썸네일이 이미 있으면 바로 반영
+        on_thumbnails_ready(user_id, gif['id'], gif['url'])
+    elif not thumbnails.submit(user_id, gif['id'], gif_path, gif['url']):
+        print(f"썸네일 생성 생략 (대기열 가득 참): {gif['id']}")
+
+def on_variants_ready(user_id: str, gif_id: str, gif_url: str, gif_path: str) -> None:
+    """변형 생성 완료 시 variants 에 작은 순으로 대체 URL 기록 (클라이언트가 지원하는 가장 작은 형식을 고름)"""
+    variants = variant_records(gif_path, gif_url)
+    if variants:
+        catalog.update_user_gif(user_id, gif_id, {'variants': variants})
+
+def on_variants_encoded(result: Dict[str, Any]) -> None:
+    for fmt, outcome in result['variants'].items():
+        if 'seconds' in outcome:
+            TRANSCODE_SECONDS.observe(outcome['seconds'], format=fmt)
+        if outcome.get('kept'):
+            TRANSCODE_SAVED_BYTES.inc(result['original'] - outcome['bytes'], format=fmt)
 
-def save_base64_to_file(base64_data: str, filename: str) -> bool:
-    """base64 데이터를 파일로 저장"""
+# 인코딩은 썸네일보다 훨씬 무거우므로 별도 프로세스 풀에서 (원본이 지워지면 취소)
+transcodes = TranscodePipeline(
+    on_ready=on_variants_ready,
+    on_result=on_variants_encoded,
+    formats=TRANSCODE_FORMATS,
+    max_workers=TRANSCODE_WORKERS,
+    max_pending=TRANSCODE_MAX_PENDING,
+    webp_quality=TRANSCODE_WEBP_QUALITY,
+    mp4_crf=TRANSCODE_MP4_CRF,
+)
+atexit.register(transcodes.shutdown)
+
+def schedule_variants(user_id: str, gif: Dict[str, Any], gif_path: str) -> None:
+    """전송용 변형 생성 예약 (완료 전까지는 variants 없이 원본 url 만)"""
+    if not transcodes.enabled:
+        return
+    if any(os.path.exists(path) for path in variant_paths(gif_path).values()):
+        # 같은 blob 의 변형이 이미 있으면 바로 반영
+        on_variants_ready(user_id, gif['id'], gif['url'], gif_path)
+    elif not transcodes.submit(user_id, gif['id'], gif_path, gif['url']):
+        print(f"변형 생성 생략 (대기열 가득 참): {gif['id']}")
+
+@timed(STORAGE_SECONDS, operation='store_gif')
+def store_gif_chunks(user_id: str, gif_id: str, chunks, url_prefix: str) -> Optional[Dict[str, str]]:
+    """GIF 바이트를 저장하고 {'path', 'url'(, 'blob')} 반환 (실패 시 None)
+
+    blob 저장소를 쓰면 같은 내용은 한 번만 저장되고 반환된 blob 은 pin 된 상태다.
+    """
     try:
-        # base64 헤더 제거 (data:image/gif;base64, 부분)
-        if ',' in base64_data:
-            base64_data = base64_data.split(',')[1]
-        
-        # base64 디코딩
-        gif_data = base64.b64decode(base64_data)
+        if BLOB_STORE_ENABLED:
+            digest, path = blobs.put_chunks(chunks)
+            url = blobs.url_for(digest, f'{url_prefix}/{BLOB_DIRNAME}')
+            return {'path': path, 'url': url, 'blob': digest}
         
-        # 파일 저장
-        with open(filename, 'wb') as f:
-            f.write(gif_data)
-        
-        return True
+        filename = f"{gif_id}.gif"
+        path = os.path.join(get_user_gif_directory(user_id), filename)
+        write_chunks_atomically(chunks, path)
+        return {'path': path, 'url': f'{url_prefix}/{user_id}/{filename}'}
+    except RequestEntityTooLarge:
+        # 업로드 본문이 최대 크기를 넘음 (호출한 라우트가 413 으로 응답)
+        raise
     except Exception as e:
         print(f"파일 저장 중 오류: {e}")
-        return False
+        return None
+
+def stage_gif_upload(user_id: str) -> StagedFile:
+    """청크를 하나씩 받을 업로드 임시 파일 (최종 위치와 같은 디렉토리에 생성)"""
+    return StagedFile(blobs.root if BLOB_STORE_ENABLED else get_user_gif_directory(user_id))
+
+def commit_gif_upload(staged: StagedFile, user_id: str, gif_id: str, url_prefix: str) -> Optional[Dict[str, str]]:
+    """stage_gif_upload 로 받은 파일을 store_gif_chunks 와 같은 위치에 배치 (실패 시 None)"""
+    try:
+        if BLOB_STORE_ENABLED:
+            staged.close()
+            digest, path = blobs.put_staged(staged.path, staged.hexdigest())
+            url = blobs.url_for(digest, f'{url_prefix}/{BLOB_DIRNAME}')
+            return {'path': path, 'url': url, 'blob': digest}
+
+        filename = f"{gif_id}.gif"
+        path = os.path.join(get_user_gif_directory(user_id), filename)
+        staged.commit(path)
+        return {'path': path, 'url': f'{url_prefix}/{user_id}/{filename}'}
+    except Exception as e:
+        staged.discard()
+        print(f"파일 저장 중 오류: {e}")
+        return None
+
+@timed(STORAGE_SECONDS, operation='save_base64')
+def save_base64_to_file(user_id: str, gif_id: str, base64_data: str, url_prefix: str) -> Optional[Dict[str, str]]:
+    """base64 데이터를 파일로 저장 (청크 단위로 디코딩, 헤더 data:image/gif;base64, 허용)"""
+    return store_gif_chunks(user_id, gif_id, iter_base64_decoded(base64_data, UPLOAD_CHUNK_SIZE), url_prefix)
+
+def new_gif_record(gif_id: str, title: str, tags: List[str], user_id: str,
+                   stored: Optional[Dict[str, str]], url: str = '') -> Dict[str, Any]:
+    """추가할 GIF 레코드 (썸네일이 생성되기 전까지 thumbnailUrl 은 url 과 동일, 저장된 파일이면 blob 참조 포함)"""
+    gif_url = stored['url'] if stored else url
+    new_gif = {
+        'id': gif_id,
+        'title': title,
+        'url': gif_url,
+        'thumbnailUrl': gif_url,
+        'tags': tags,
+        'userId': user_id
+    }
+    if stored and stored.get('blob'):
+        new_gif['blob'] = stored['blob']
+    return new_gif
+
+def add_stored_gif(user_id: str, gif: Dict[str, Any], stored: Optional[Dict[str, str]]) -> bool:
+    """저장된 파일과 함께 GIF 레코드를 추가하고 썸네일 예약"""
+    added = False
+    try:
+        added = add_user_gif(user_id, gif)
+        if added and stored:
+            schedule_thumbnails(user_id, gif, stored['path'])
+            schedule_variants(user_id, gif, stored['path'])
+        return added
+    finally:
+        if stored and stored.get('blob'):
+            blobs.unpin(stored['blob'])
+            if not added:
+                release_blob(stored['blob'])
+
+def add_stored_gifs(user_id: str, entries: List[Tuple[Dict[str, Any], Optional[Dict[str, str]]]]) -> bool:
+    """저장된 파일과 함께 GIF 레코드 여러 개를 한 번의 카탈로그 기록으로 추가하고 썸네일 예약"""
+    added = False
+    try:
+        if entries:
+            get_user_gifs(user_id)
+            catalog.add_user_gifs(user_id, [gif for gif, _ in entries])
+        added = commit_changes()
+        if added:
+            for gif, stored in entries:
+                if stored:
+                    schedule_thumbnails(user_id, gif, stored['path'])
+                    schedule_variants(user_id, gif, stored['path'])
+        return added
+    finally:
+        for _, stored in entries:
+            if stored and stored.get('blob'):
+                blobs.unpin(stored['blob'])
+                if not added:
+                    release_blob(stored['blob'])
+
+def blob_extra_paths(path: str) -> List[str]:
+    """blob 과 함께 지울 썸네일/변형 경로"""
+    return [*thumbnail_paths(path), *variant_paths(path).values()]
+
+def release_blob(digest: str) -> None:
+    """참조가 없어진 blob 과 그 썸네일/변형 삭제 (생성 중인 변형은 취소)"""
+    path = blobs.path_for(digest)
+    if blobs.release(digest, blob_extra_paths(path)):
+        transcodes.cancel(path)
+        print(f"파일 삭제됨: {path}")
+
+def mark_blobs() -> set:
+    """저장소 전체 레코드가 참조하는 blob (이 워커의 쌓인 변경을 먼저 기록)"""
+    catalog.flush()
+    return referenced_digests(storage.iter_gifs())
+
+# 주기적 mark-and-sweep (여러 워커가 동시에 돌아도 같은 결과, 다른 워커의 대기 중인 변경은 min_age 로 보호)
+blob_sweeper = BlobSweeper(blobs, mark_blobs, BLOB_SWEEP_INTERVAL, BLOB_SWEEP_MIN_AGE,
+                           extra_paths=blob_extra_paths, on_removed=transcodes.cancel,
+                           derived_dirs=(THUMBNAIL_DIRNAME, VARIANT_DIRNAME))
+if BLOB_STORE_ENABLED:
+    blob_sweeper.start()
+    atexit.register(blob_sweeper.stop)
+registry.callback('gif_blob_swept_total', '주기적 정리로 삭제한 blob 수', (),
+                  lambda: [((), blob_sweeper.removed_total)], kind='counter')
+
+def delete_gif_files(user_id: str, gif: Dict[str, Any]) -> None:
+    """GIF 파일과 썸네일/변형 삭제 (blob 은 다른 사용자가 참조하지 않을 때만, 오류는 무시)"""
+    try:
+        if gif.get('blob'):
+            release_blob(gif['blob'])
+        elif gif['url'].startswith((f'/gifs/{user_id}/', f'{GIF_URL_PREFIX}/{user_id}/')):
+            filename = gif['url'].split('/')[-1]  # 파일명만 추출
+            file_path = os.path.join(get_user_gif_directory(user_id), filename)
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                print(f"파일 삭제됨: {file_path}")
+            remove_thumbnails(file_path)
+            transcodes.cancel(file_path)
+            remove_variants(file_path)
+    except Exception as e:
+        print(f"파일 삭제 중 오류 (무시됨): {e}")
+
+def user_gifs_payload(user_id: str, paging: Optional[Dict[str, Any]] = None,
+                      view: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """GIF 목록 응답 본문
+
+    limit/offset/cursor 가 있으면 해당 페이지와 total, nextCursor 를,
+    countOnly 면 목록 없이 개수만, fields 가 있으면 해당 필드만 담는다.
+    """
+    gifs = get_user_gifs(user_id)
+    if view and view['countOnly']:
+        return {'success': True, 'count': len(gifs), 'userId': user_id}
+    
+    payload = {
+        'success': True,
+        'data': gifs,
+        'count': len(gifs),
+        'userId': user_id
+    }
+    if paging and is_paged(paging):
+        items, next_cursor = paginate(gifs, paging)
+        payload.update(data=items, count=len(items), total=len(gifs), nextCursor=next_cursor)
+    payload['data'] = project(payload['data'], view and view['fields'])
+    return payload
+
+def search_payload(user_id: str, query: str, paging: Dict[str, Any],
+                   view: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """GIF 검색 응답 본문 (검색어가 없으면 전체 목록)"""
+    if not query:
+        results = get_user_gifs(user_id)
+    else:
+        # 제목이나 태그에서 검색 (역색인 + 랭킹)
+        results = search_user_gifs(user_id, query)
+    
+    if view and view['countOnly']:
+        payload = {'success': True, 'count': len(results), 'userId': user_id}
+    else:
+        items, next_cursor = paginate(results, paging)
+        payload = {
+            'success': True,
+            'data': project(items, view and view['fields']),
+            'count': len(items),
+            'total': len(results),
+            'userId': user_id
+        }
+        if paging['limit'] is not None:
+            payload['nextCursor'] = next_cursor
+    if query:
+        payload['query'] = query
+    return payload
+
+@timed(SEARCH_SECONDS, kind='index')
+def search_user_gifs(user_id: str, query: str) -> List[Dict[str, Any]]:
+    """역색인으로 제목/태그 검색 (랭킹 순: 제목 일치 > 제목 접두 > 태그 일치 > 태그 접두 > 부분 일치)"""
+    get_user_gifs(user_id)
+    return search_index.search(user_id, query)
+
+def cached_json_response(user_id: str, build_payload):
+    """사용자 버전 기반 ETag/304 와 직렬화 본문 LRU 캐시를 적용한 JSON 응답
+
+    If-None-Match 가 현재 ETag 와 같으면 본문 없이 304 를 반환하고,
+    (사용자, 버전, 경로+쿼리) 가 같은 응답은 jsonify 없이 캐시된 바이트를 그대로 보낸다.
+    """
+    get_user_gifs(user_id)  # 새 사용자 초기화로 버전이 바뀌기 전에 먼저 처리
+    version = user_versions.get(user_id)
+    variant = (request.path, tuple(sorted(request.args.items(multi=True))))
+    etag = user_versions.etag(user_id, version, variant)
+    
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        key = (user_id, version, variant)
+        body = response_cache.get(key)
+        if body is None:
+            payload = build_payload()
+            with JSON_SECONDS.time(operation='encode_payload'):
+                body = encode_payload(payload, fragment_cache)
+            JSON_BYTES.observe(len(body), operation='encode_payload')
+            response_cache.put(key, body)
+        response = app.response_class(body, mimetype='application/json')
+    
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = RESPONSE_CACHE_CONTROL
+    return response
+
+def trending_payload(tag: Optional[str], limit: int, view: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """인기 GIF 응답 본문 (전체 또는 태그별, 점수 높은 순)"""
+    items = []
+    scores = []
+    for (user_id, gif_id), score, sends in trending.top(tag, limit):
+        gif = catalog.find_user_gif(user_id, gif_id)
+        if gif is not None:
+            items.append(gif)
+            scores.append({'score': round(score, 4), 'sends': sends})
+    if view and view['countOnly']:
+        return {'success': True, 'count': len(items), 'tag': tag}
+    return {
+        'success': True,
+        'data': [{**public(gif), **score} for gif, score in zip(project(items, view and view['fields']), scores)],
+        'count': len(items),
+        'tag': tag
+    }
+
+def get_trending_args(args=None) -> Dict[str, Any]:
+    """tag/limit 쿼리 파라미터 파싱 (limit 은 TRENDING_TOP_K 이하, 잘못된 값이면 ValueError)"""
+    if args is None:
+        args = request.args
+    try:
+        limit = int(args.get('limit', TRENDING_TOP_K))
+    except ValueError:
+        raise ValueError('limit 값이 올바르지 않습니다.')
+    if limit < 0:
+        raise ValueError('limit 값이 올바르지 않습니다.')
+    return {'tag': args.get('tag') or None, 'limit': min(limit, TRENDING_TOP_K)}
+
+def record_gif_send(user_id: str, gif_id: str) -> Optional[Dict[str, Any]]:
+    """GIF 전송 기록 후 응답 본문 반환 (GIF 가 없으면 None)"""
+    gif = catalog.find_user_gif(user_id, gif_id)
+    if gif is None:
+        return None
+    score = trending.record(user_id, gif)
+    return {'success': True, 'data': {'id': gif_id, 'userId': user_id, 'score': round(score, 4)}}
+
+def get_changes_args(args=None, last_event_id: Optional[str] = None) -> Dict[str, Any]:
+    """since=<seq>&limit=<n>&wait=<초> 파싱 (SSE 재연결이면 Last-Event-ID 가 since 대신, 잘못된 값이면 ValueError)"""
+    if args is None:
+        args = request.args
+    since = last_event_id or args.get('since')
+    try:
+        since = int(since) if since not in (None, '') else None
+        limit = int(args.get('limit', 100))
+        wait = float(args.get('wait', 0))
+    except ValueError:
+        raise ValueError('since, limit, wait 는 숫자여야 합니다.')
+    if (since is not None and since < 0) or limit <= 0 or not wait >= 0:
+        raise ValueError('since, limit, wait 값이 올바르지 않습니다.')
+    return {'since': since, 'limit': min(limit, CHANGES_MAX_LIMIT), 'wait': min(wait, CHANGES_MAX_WAIT)}
+
+def changes_payload(user_id: str, since: Optional[int], limit: int) -> Dict[str, Any]:
+    """since 이후 사용자 변경 응답 본문
+
+    cursor 를 다음 요청의 since 로 보낸다. since 가 없으면 변경 없이 현재 cursor 만 돌려준다
+    (cursor 를 받은 뒤 목록을 받고 이후 변경부터 이어 받기, 겹치는 변경은 같은 결과가 된다).
+    그 사이 기록이 지워져 이어 받을 수 없으면 reset 이 True 이고 목록을 다시 받아야 한다.
+    """
+    # 조회 전에 읽은 latest 까지만 cursor 로 건너뛰어야 조회 중에 들어온 변경을 놓치지 않는다
+    latest = changes.latest
+    payload = {'success': True, 'userId': user_id, 'since': since, 'changes': [], 'hasMore': False,
+               'reset': False, 'cursor': latest}
+    if since is None:
+        return payload
+    if changes.is_stale(since):
+        payload.update(reset=True, cursor=changes.latest)
+        return payload
+    items, has_more = changes.read(user_id, since, limit)
+    last = items[-1]['seq'] if items else since
+    payload.update(changes=items, hasMore=has_more, cursor=last if has_more else max(last, latest))
+    return payload
+
+def wait_for_changes(user_id: str, since: Optional[int], limit: int, wait: float) -> Dict[str, Any]:
+    """변경이 없으면 생길 때까지 최대 wait 초 기다린 뒤 응답 본문 반환 (long-poll)"""
+    deadline = time.monotonic() + wait
+    while True:
+        seen = changes.latest
+        payload = changes_payload(user_id, since, limit)
+        remaining = deadline - time.monotonic()
+        if payload['changes'] or payload['reset'] or since is None or remaining <= 0:
+            return payload
+        since = payload['cursor']
+        changes.wait_newer(seen, remaining)
+
+def wants_change_stream() -> bool:
+    return request.args.get('stream') in ('1', 'true') or request.accept_mimetypes.best == 'text/event-stream'
+
+def change_event(event: str, data: Any, event_id: Optional[int] = None) -> bytes:
+    """SSE 이벤트 한 개 (id 는 재연결 시 Last-Event-ID 로 돌아옴)"""
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.append('data: ' + serializer.dumps(data).decode('utf-8'))
+    return ('\n'.join(lines) + '\n\n').encode('utf-8')
+
+def change_events(payload: Dict[str, Any], first: bool) -> bytes:
+    """변경 응답 본문을 SSE 이벤트로 변환
+
+    변경마다 type(add/remove/update) 이벤트, 처음 따라잡았을 때 ready 이벤트 (현재 cursor),
+    이어 받을 수 없으면 reset 이벤트를 보낸다.
+    """
+    if payload['reset']:
+        return change_event('reset', {'cursor': payload['cursor']}, payload['cursor'])
+    events = [change_event(change['type'], change, change['seq']) for change in payload['changes']]
+    if first and not payload['hasMore']:
+        events.append(change_event('ready', {'cursor': payload['cursor']}, payload['cursor']))
+    return b''.join(events)
+
+def stream_changes(user_id: str, since: Optional[int], limit: int):
+    """SSE 본문: CHANGES_STREAM_SECONDS 동안 변경을 보내고 기다리기를 반복 (없으면 keepalive 주석)"""
+    deadline = time.monotonic() + CHANGES_STREAM_SECONDS
+    first = True
+    yield b'retry: 3000\n\n'
+    while True:
+        seen = changes.latest
+        payload = changes_payload(user_id, since, limit)
+        yield change_events(payload, first)
+        if payload['reset']:
+            return
+        first = first and payload['hasMore']
+        since = payload['cursor']
+        if payload['hasMore']:
+            continue
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        if changes.wait_newer(seen, min(remaining, CHANGES_HEARTBEAT)) <= seen:
+            yield b': keepalive\n\n'
+
+def changes_response(user_id: str):
+    """변경 조회 응답 (long-poll 또는 SSE)
+
+    long-poll 과 SSE 는 기다리는 동안 워커 스레드를 잡으므로 워커별 CHANGES_MAX_WAITERS 개까지만
+    기다린다. 연결을 많이 유지해야 하면 server_async 로 서비스한다.
+    """
+    try:
+        args = get_changes_args(last_event_id=request.headers.get('Last-Event-ID'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    if wants_change_stream():
+        if not change_waiters.try_acquire():
+            return admission_error('변경 스트림 연결이 너무 많습니다. 잠시 후 다시 시도하세요.', 503, 'changes_busy',
+                                   CHANGES_RETRY_AFTER)
+        try:
+            response = app.response_class(stream_changes(user_id, args['since'], args['limit']),
+                                          mimetype='text/event-stream')
+        except BaseException:
+            change_waiters.release()
+            raise
+        response.call_on_close(change_waiters.release)
+        response.headers['X-Accel-Buffering'] = 'no'
+    elif args['wait'] > 0 and args['since'] is not None and change_waiters.try_acquire():
+        try:
+            response = jsonify(wait_for_changes(user_id, args['since'], args['limit'], args['wait']))
+        finally:
+            change_waiters.release()
+    else:
+        response = jsonify(changes_payload(user_id, args['since'], args['limit']))
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+def get_paging_args(args=None) -> Dict[str, Any]:
+    """limit/offset/cursor 쿼리 파라미터 파싱 (잘못된 값이면 ValueError, args 기본값은 request.args)"""
+    if args is None:
+        args = request.args
+    limit = args.get('limit')
+    offset = args.get('offset')
+    cursor = args.get('cursor') or None
+    try:
+        paging = {
+            'limit': int(limit) if limit is not None else None,
+            'offset': int(offset) if offset is not None else 0,
+            'cursor': cursor,
+        }
+    except ValueError:
+        raise ValueError('limit/offset 값이 올바르지 않습니다.')
+    if (paging['limit'] is not None and paging['limit'] < 0) or paging['offset'] < 0:
+        raise ValueError('limit/offset 값이 올바르지 않습니다.')
+    if cursor:
+        decode_cursor(cursor)
+    return paging
+
+def get_view_args(args=None) -> Dict[str, Any]:
+    """fields=id,title,... (필드 선택) 와 count=1 (개수만) 파싱 (잘못된 값이면 ValueError)"""
+    if args is None:
+        args = request.args
+    return {
+        'fields': parse_fields(args.get('fields')),
+        'countOnly': args.get('count') in ('1', 'true'),
+    }
+
+def is_paged(paging: Dict[str, Any]) -> bool:
+    return paging['limit'] is not None or paging['offset'] > 0 or paging['cursor'] is not None
+
+def paginate(gifs: List[Dict[str, Any]], paging: Dict[str, Any]):
+    """limit/offset (또는 cursor) 적용 후 (항목, 다음 커서) 반환"""
+    return page(gifs, paging['limit'], paging['offset'], paging['cursor'])
+
+def get_upload_fields():
+    """스트리밍 업로드의 title/tags 와 본문 스트림 반환
+
+    multipart/form-data 면 form 필드와 'file' 파트를,
+    그 외(raw 바이너리)면 쿼리 파라미터와 요청 본문을 사용한다.
+    tags 는 반복 파라미터 또는 쉼표 구분 문자열 모두 허용한다.
+    """
+    if request.mimetype == 'multipart/form-data':
+        fields = request.form
+        upload = request.files.get('file')
+        stream = upload.stream if upload else None
+    else:
+        fields = request.args
+        stream = request.stream
+    
+    tags = None
+    if 'tags' in fields:
+        tags = [
+            tag.strip()
+            for value in fields.getlist('tags')
+            for tag in value.split(',')
+            if tag.strip()
+        ]
+    return fields.get('title'), tags, stream
+
+def handle_stream_upload(user_id: str):
+    """스트리밍 업로드 공통 처리"""
+    title, tags, stream = get_upload_fields()
+    
+    # 필수 필드 확인
+    for field, value in (('title', title), ('tags', tags)):
+        if value is None:
+            return jsonify({
+                'success': False,
+                'error': f'필수 필드 누락: {field}'
+            }), 400
+    if stream is None:
+        return jsonify({
+            'success': False,
+            'error': '필수 필드 누락: file'
+        }), 400
+    
+    # 고유 ID 생성
+    gif_id = new_user_gif_id(user_id, title)
+    
+    stored = store_gif_chunks(user_id, gif_id, iter_stream(stream, UPLOAD_CHUNK_SIZE), GIF_URL_PREFIX)
+    if stored is None:
+        return jsonify({
+            'success': False,
+            'error': 'GIF 파일 저장 실패'
+        }), 500
+    
+    return finish_add_gif(user_id, new_gif_record(gif_id, title, tags, user_id, stored), stored)
+
+def handle_json_add(user_id: str, data: Dict[str, Any]):
+    """JSON 본문 GIF 추가 공통 처리 (base64_data 가 있으면 파일 저장, 내용이 같으면 기존 blob 재사용)"""
+    # 필수 필드 확인
+    required_fields = ['title', 'tags']
+    for field in required_fields:
+        if field not in data:
+            return jsonify({
+                'success': False,
+                'error': f'필수 필드 누락: {field}'
+            }), 400
+    
+    # 고유 ID 생성
+    gif_id = new_user_gif_id(user_id, data.get('title'))
+    
+    stored = None
+    if 'base64_data' in data:
+        stored = save_base64_to_file(user_id, gif_id, data['base64_data'], GIF_URL_PREFIX)
+        if stored is None:
+            return jsonify({
+                'success': False,
+                'error': 'GIF 파일 저장 실패'
+            }), 500
+    
+    new_gif = new_gif_record(gif_id, data['title'], data['tags'], user_id, stored, data.get('url', ''))
+    return finish_add_gif(user_id, new_gif, stored)
+
+def finish_add_gif(user_id: str, new_gif: Dict[str, Any], stored: Optional[Dict[str, str]]):
+    """레코드를 추가(blob pin 해제, 썸네일 예약 포함)하고 응답 반환"""
+    if add_stored_gif(user_id, new_gif, stored):
+        return jsonify({
+            'success': True,
+            'message': 'GIF가 성공적으로 추가되었습니다.',
+            'data': public(new_gif)
+        })
+    return jsonify({
+        'success': False,
+        'error': 'GIF 목록 저장 실패'
+    }), 500
+
+def get_batch_list(data: Any, key: str) -> List[Any]:
+    """배치 본문의 key 목록 반환 (없거나 비었거나 BATCH_MAX_ITEMS 를 넘으면 ValueError)"""
+    items = data.get(key) if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise ValueError(f'{key} 목록이 필요합니다.')
+    if len(items) > BATCH_MAX_ITEMS:
+        raise ValueError(f'한 번에 최대 {BATCH_MAX_ITEMS}개까지 처리할 수 있습니다.')
+    return items
+
+def parse_batch_user_ids(values: List[str]) -> List[str]:
+    """userIds=a,b,c (반복 파라미터 허용) 를 중복 없는 사용자 ID 목록으로 파싱 (잘못되면 ValueError)"""
+    user_ids = list(dict.fromkeys(
+        user_id.strip()
+        for value in values
+        for user_id in value.split(',')
+        if user_id.strip()
+    ))
+    if not user_ids:
+        raise ValueError('userIds 가 필요합니다.')
+    if len(user_ids) > BATCH_MAX_ITEMS:
+        raise ValueError(f'한 번에 최대 {BATCH_MAX_ITEMS}명까지 조회할 수 있습니다.')
+    return user_ids
+
+def new_batch_gif_ids(user_id: str, titles: List[Any]) -> List[str]:
+    """배치 항목별 고유 ID"""
+    return [new_user_gif_id(user_id, title) for title in titles]
+
+def batch_item_error(item: Any, open_file: Optional[Callable[[str], Optional[BinaryIO]]],
+                     used_files: set) -> Optional[str]:
+    """배치 추가 항목 하나의 형식 확인 (문제없으면 None, 파일 파트는 한 항목에서만 쓸 수 있음)"""
+    if not isinstance(item, dict):
+        return '항목은 객체여야 합니다.'
+    for field in ('title', 'tags'):
+        if field not in item:
+            return f'필수 필드 누락: {field}'
+    if 'file' in item:
+        name = item['file']
+        if not isinstance(name, str) or open_file is None or open_file(name) is None:
+            return f'파일 파트 없음: {name}'
+        if name in used_files:
+            return f'파일 파트를 여러 항목에서 쓸 수 없습니다: {name}'
+        used_files.add(name)
+    return None
+
+def batch_store_job(user_id: str, gif_id: str, item: Dict[str, Any],
+                    open_file: Optional[Callable[[str], Optional[BinaryIO]]]):
+    """항목의 파일 저장 작업 (file 파트 또는 base64_data, 파일 없이 url 만 있으면 None)"""
+    if 'file' in item:
+        chunks = iter_stream(open_file(item['file']), UPLOAD_CHUNK_SIZE)
+        return functools.partial(store_gif_chunks, user_id, gif_id, chunks, GIF_URL_PREFIX)
+    if 'base64_data' in item:
+        return functools.partial(save_base64_to_file, user_id, gif_id, item['base64_data'], GIF_URL_PREFIX)
+    return None
+
+def run_batch_jobs(jobs: List[Optional[Callable[[], Any]]]) -> List[Any]:
+    """작업들을 batch_executor 에서 병렬 실행 후 순서대로 결과 반환 (None 작업과 예외는 None)"""
+    futures = [batch_executor.submit(job) if job is not None else None for job in jobs]
+    results = []
+    for future in futures:
+        try:
+            results.append(future.result() if future is not None else None)
+        except Exception as e:
+            print(f"배치 작업 중 오류: {e}")
+            results.append(None)
+    return results
+
+def batch_add_gifs(user_id: str, items: List[Any],
+                   open_file: Optional[Callable[[str], Optional[BinaryIO]]] = None) -> Tuple[Dict[str, Any], int]:
+    """GIF 여러 개를 추가하고 (응답 본문, 상태 코드) 반환
+
+    항목마다 title/tags 를 확인하고 파일(base64_data 또는 open_file 로 여는 multipart 파트)은 병렬로 저장한 뒤,
+    성공한 항목만 모아 한 번의 카탈로그 기록(fsync 한 번)으로 추가한다. results 는 요청 순서대로
+    항목별 성공 여부와 추가된 GIF 또는 오류를 담는다.
+    """
+    get_user_gifs(user_id)
+    gif_ids = new_batch_gif_ids(user_id, [item.get('title') if isinstance(item, dict) else None for item in items])
+    results: List[Optional[Dict[str, Any]]] = []
+    jobs = []
+    used_files = set()
+    for index, item in enumerate(items):
+        error = batch_item_error(item, open_file, used_files)
+        if error:
+            results.append({'index': index, 'success': False, 'error': error})
+            jobs.append(None)
+        else:
+            results.append(None)
+            jobs.append(batch_store_job(user_id, gif_ids[index], item, open_file))
+    stored_list = run_batch_jobs(jobs)
+    
+    entries = []
+    indexes = []
+    for index, item in enumerate(items):
+        if results[index] is not None:
+            continue
+        stored = stored_list[index]
+        if jobs[index] is not None and stored is None:
+            results[index] = {'index': index, 'success': False, 'error': 'GIF 파일 저장 실패'}
+            continue
+        new_gif = new_gif_record(gif_ids[index], item['title'], item['tags'], user_id, stored, item.get('url', ''))
+        entries.append((new_gif, stored))
+        indexes.append(index)
+    
+    committed = add_stored_gifs(user_id, entries)
+    for index, (new_gif, _) in zip(indexes, entries):
+        if committed:
+            results[index] = {'index': index, 'success': True, 'data': public(new_gif)}
+        else:
+            results[index] = {'index': index, 'success': False, 'error': 'GIF 목록 저장 실패'}
+    added = len(entries) if committed else 0
+    payload = {
+        'success': committed,
+        'added': added,
+        'failed': len(items) - added,
+        'results': results,
+        'userId': user_id
+    }
+    if not committed:
+        payload['error'] = 'GIF 목록 저장 실패'
+        return payload, 500
+    return payload, 200
+
+def batch_delete_gifs(user_id: str, gif_ids: List[Any]) -> Tuple[Dict[str, Any], int]:
+    """GIF 여러 개를 한 번의 카탈로그 기록으로 삭제하고 (응답 본문, 상태 코드) 반환 (파일은 병렬 삭제)"""
+    if not all(isinstance(gif_id, str) for gif_id in gif_ids):
+        raise ValueError('ids 는 문자열 목록이어야 합니다.')
+    get_user_gifs(user_id)
+    removed = catalog.remove_user_gifs(user_id, gif_ids)
+    deleted = [gif for gif in removed if gif is not None]
+    if deleted and not commit_changes():
+        return {
+            'success': False,
+            'error': 'GIF 목록 저장 실패'
+        }, 500
+    # 파일 삭제 (blob 은 참조가 모두 사라진 뒤에만, 썸네일 포함)
+    run_batch_jobs([functools.partial(delete_gif_files, user_id, gif) for gif in deleted])
+    results = [
+        {'id': gif_id, 'success': True, 'deleted_gif': public(gif)} if gif is not None
+        else {'id': gif_id, 'success': False, 'error': 'GIF를 찾을 수 없습니다.'}
+        for gif_id, gif in zip(gif_ids, removed)
+    ]
+    return {
+        'success': True,
+        'deleted': len(deleted),
+        'failed': len(gif_ids) - len(deleted),
+        'results': results,
+        'userId': user_id
+    }, 200
+
+def users_gifs_etag(user_ids: List[str], variant: Any) -> str:
+    """여러 사용자 목록 응답의 ETag (사용자 중 누구의 목록이 바뀌어도 달라짐)"""
+    for user_id in user_ids:
+        get_user_gifs(user_id)  # 새 사용자 초기화로 버전이 바뀌기 전에 먼저 처리
+    version = sum(user_versions.get(user_id) for user_id in user_ids)
+    return user_versions.etag(user_ids[0], version, (tuple(user_ids), variant))
+
+def users_gifs_body(user_ids: List[str], paging: Dict[str, Any], view: Dict[str, Any], variant: Any) -> bytes:
+    """여러 사용자 목록 응답 본문 (사용자별 본문은 응답 캐시에서 재사용해 이어 붙임)"""
+    parts = []
+    for user_id in user_ids:
+        key = (user_id, user_versions.get(user_id), variant)
+        body = response_cache.get(key)
+        if body is None:
+            payload = user_gifs_payload(user_id, paging, view)
+            with JSON_SECONDS.time(operation='encode_payload'):
+                body = encode_payload(payload, fragment_cache)
+            JSON_BYTES.observe(len(body), operation='encode_payload')
+            response_cache.put(key, body)
+        parts.append(body)
+    return b'{"success":true,"count":' + str(len(parts)).encode() + b',"users":[' + b','.join(parts) + b']}'
+
+def batch_add_response(user_id: str):
+    """배치 추가 요청 처리
+
+    JSON 본문: {"gifs": [{"title", "tags", "base64_data" 또는 "url"}, ...]}
+    multipart/form-data: gifs 필드에 같은 JSON 목록, 각 항목의 "file" 에 파일 파트 이름
+    """
+    try:
+        if request.mimetype == 'multipart/form-data':
+            items = get_batch_list({'gifs': serializer.loads(request.form.get('gifs') or 'null')}, 'gifs')
+            open_file = request.files.get
+        else:
+            items = get_batch_list(request.get_json(silent=True), 'gifs')
+            open_file = None
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    charge_batch_items(len(items))
+    payload, status = batch_add_gifs(user_id, items, open_file)
+    return jsonify(payload), status
+
+def batch_delete_response(user_id: str):
+    """배치 삭제 요청 처리 (JSON 본문: {"ids": [gif_id, ...]})"""
+    try:
+        gif_ids = get_batch_list(request.get_json(silent=True), 'ids')
+        charge_batch_items(len(gif_ids))
+        payload, status = batch_delete_gifs(user_id, gif_ids)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    return jsonify(payload), status
 
 def get_user_id_from_request() -> str:
     """요청에서 사용자 ID 추출"""
@@ -114,9 +1269,10 @@ def get_user_id_from_request() -> str:
     if user_id:
         return user_id
     
-    # POST 요청의 경우 body에서 확인
-    if request.method == 'POST' and request.json:
-        user_id = request.json.get('userId')
+    # POST 요청의 경우 body에서 확인 (JSON 본문일 때만)
+    body = request.get_json(silent=True) if request.method == 'POST' else None
+    if body:
+        user_id = body.get('userId')
         if user_id:
             return user_id
     
@@ -141,13 +1297,16 @@ def get_gifs():
                 'error': '사용자 ID가 필요합니다.'
             }), 400
         
-        gifs = get_user_gifs(user_id)
-        return jsonify({
-            'success': True,
-            'data': gifs,
-            'count': len(gifs),
-            'userId': user_id
-        })
+        try:
+            paging = get_paging_args()
+            view = get_view_args()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        return cached_json_response(user_id, lambda: user_gifs_payload(user_id, paging, view))
     except Exception as e:
         return jsonify({
             'success': False,
@@ -158,8 +1317,6 @@ def get_gifs():
 def add_gif():
     """사용자별 새 GIF 추가"""
     try:
-        data = request.json
-        
         # 사용자 ID 확인 (쿼리 파라미터 또는 body에서)
         user_id = get_user_id_from_request()
         if not user_id:
@@ -168,65 +1325,27 @@ def add_gif():
                 'error': '사용자 ID가 필요합니다.'
             }), 400
         
-        # 필수 필드 확인
-        required_fields = ['title', 'tags']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'error': f'필수 필드 누락: {field}'
-                }), 400
-        
-        # 고유 ID 생성
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        gif_id = f"{user_id}_{data.get('title')}_{timestamp}"
-        # gif_id = data.get('id', str(uuid.uuid4()))
-        
-        # 사용자별 디렉토리 가져오기
-        user_gif_dir = get_user_gif_directory(user_id)
-        
-        # 파일명 생성
-        filename = f"{gif_id}.gif"
-        
-        gif_path = os.path.join(user_gif_dir, filename)
-        
-        # base64 GIF 데이터가 있으면 저장
-        if 'base64_data' in data:
-            if not save_base64_to_file(data['base64_data'], gif_path):
-                return jsonify({
-                    'success': False,
-                    'error': 'GIF 파일 저장 실패'
-                }), 500
-        
-        # LocalGif 객체 생성 (thumbnailUrl을 url과 동일하게 설정)
-        # gif_url = f'/gifs/{user_id}/{filename}' if 'base64_data' in data else data.get('url', '')
-        gif_url = f'/static/gifs/{user_id}/{filename}' if 'base64_data' in data else data.get('url', '')
-        new_gif = {
-            'id': gif_id,
-            'title': data['title'],
-            'url': gif_url,
-            'thumbnailUrl': gif_url,  # thumbnail과 gif를 같은 경로로 설정
-            'tags': data['tags'],
-            'userId': user_id
-        }
-        
-        # 사용자의 기존 GIF 목록에 추가
-        user_gifs = get_user_gifs(user_id)
-        user_gifs.append(new_gif)
-        
-        # 저장
-        if save_user_gifs(user_id, user_gifs):
-            return jsonify({
-                'success': True,
-                'message': 'GIF가 성공적으로 추가되었습니다.',
-                'data': new_gif
-            })
-        else:
+        return handle_json_add(user_id, request.json)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/gifs/upload', methods=['POST'])
+def upload_gif():
+    """사용자별 GIF 스트리밍 업로드 (raw 바이너리 또는 multipart)"""
+    try:
+        user_id = get_user_id_from_request()
+        if not user_id:
             return jsonify({
                 'success': False,
-                'error': 'GIF 목록 저장 실패'
-            }), 500
-            
+                'error': '사용자 ID가 필요합니다.'
+            }), 400
+        
+        return handle_stream_upload(user_id)
+    except RequestEntityTooLarge:
+        return too_large_response()
     except Exception as e:
         return jsonify({
             'success': False,
@@ -245,15 +1364,10 @@ def delete_gif(gif_id: str):
                 'error': '사용자 ID가 필요합니다.'
             }), 400
         
-        user_gifs = get_user_gifs(user_id)
-        user_gif_dir = get_user_gif_directory(user_id)
+        get_user_gifs(user_id)
         
-        # 삭제할 GIF 찾기 (해당 사용자의 GIF만)
-        gif_to_delete = None
-        for gif in user_gifs:
-            if gif['id'] == gif_id and gif['userId'] == user_id:
-                gif_to_delete = gif
-                break
+        # 삭제할 GIF 찾기 (해당 사용자의 GIF만, id 인덱스 사용)
+        gif_to_delete = catalog.find_user_gif(user_id, gif_id)
         
         if not gif_to_delete:
             return jsonify({
@@ -261,26 +1375,14 @@ def delete_gif(gif_id: str):
                 'error': 'GIF를 찾을 수 없거나 삭제 권한이 없습니다.'
             }), 404
         
-        # 파일 삭제 시도 (사용자 폴더에서)
-        try:
-            if gif_to_delete['url'].startswith(f'/gifs/{user_id}/'):
-                filename = gif_to_delete['url'].split('/')[-1]  # 파일명만 추출
-                file_path = os.path.join(user_gif_dir, filename)
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    print(f"파일 삭제됨: {file_path}")
-        except Exception as e:
-            print(f"파일 삭제 중 오류 (무시됨): {e}")
-        
-        # 사용자 목록에서 제거
-        user_gifs = [gif for gif in user_gifs if gif['id'] != gif_id]
-        
-        # 저장
-        if save_user_gifs(user_id, user_gifs):
+        # 사용자 목록에서 제거 후 저장
+        if remove_user_gif(user_id, gif_id) is not None:
+            # 파일 삭제 시도 (blob 은 참조가 모두 사라진 뒤에만, 썸네일 포함)
+            delete_gif_files(user_id, gif_to_delete)
             return jsonify({
                 'success': True,
                 'message': 'GIF가 성공적으로 삭제되었습니다.',
-                'deleted_gif': gif_to_delete
+                'deleted_gif': public(gif_to_delete)
             })
         else:
             return jsonify({
@@ -294,6 +1396,44 @@ def delete_gif(gif_id: str):
             'error': str(e)
         }), 500
 
+@app.route('/gifs/batch', methods=['POST'])
+def add_gifs_batch():
+    """사용자별 GIF 여러 개 추가 (한 번의 저장, 항목별 결과)"""
+    try:
+        user_id = get_user_id_from_request()
+        if not user_id:
+            return jsonify({
+                'success': False,
+                'error': '사용자 ID가 필요합니다.'
+            }), 400
+        
+        return batch_add_response(user_id)
+    except RequestEntityTooLarge:
+        return too_large_response()
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/gifs/batch/delete', methods=['POST'])
+def delete_gifs_batch():
+    """사용자별 GIF 여러 개 삭제 (한 번의 저장, 항목별 결과)"""
+    try:
+        user_id = get_user_id_from_request()
+        if not user_id:
+            return jsonify({
+                'success': False,
+                'error': '사용자 ID가 필요합니다.'
+            }), 400
+        
+        return batch_delete_response(user_id)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/gifs/search', methods=['GET'])
 def search_gifs():
     """사용자별 태그로 GIF 검색"""
@@ -307,31 +1447,82 @@ def search_gifs():
             }), 400
         
         query = request.args.get('q', '').lower()
-        user_gifs = get_user_gifs(user_id)
+        try:
+            paging = get_paging_args()
+            view = get_view_args()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
         
-        if not query:
+        return cached_json_response(user_id, lambda: search_payload(user_id, query, paging, view))
+        
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/gifs/trending', methods=['GET'])
+def get_trending_gifs():
+    """전체 사용자 대상 인기 GIF (tag=<tag> 면 태그별)"""
+    try:
+        try:
+            args = get_trending_args()
+            view = get_view_args()
+        except ValueError as e:
             return jsonify({
-                'success': True,
-                'data': user_gifs,
-                'count': len(user_gifs),
-                'userId': user_id
-            })
+                'success': False,
+                'error': str(e)
+            }), 400
         
-        # 제목이나 태그에서 검색
-        filtered_gifs = []
-        for gif in user_gifs:
-            if (query in gif['title'].lower() or 
-                any(query in tag.lower() for tag in gif['tags'])):
-                filtered_gifs.append(gif)
+        return jsonify(trending_payload(args['tag'], args['limit'], view))
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/gifs/changes', methods=['GET'])
+def get_gif_changes():
+    """사용자별 GIF 변경 조회 (since=<cursor>, wait=<초> 면 long-poll, Accept: text/event-stream 이면 SSE)"""
+    try:
+        user_id = get_user_id_from_request()
+        
+        if not user_id:
+            return jsonify({
+                'success': False,
+                'error': '사용자 ID가 필요합니다.'
+            }), 400
         
+        return changes_response(user_id)
+    except Exception as e:
         return jsonify({
-            'success': True,
-            'data': filtered_gifs,
-            'count': len(filtered_gifs),
-            'query': query,
-            'userId': user_id
-        })
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/gifs/<gif_id>/sends', methods=['POST'])
+def record_send(gif_id: str):
+    """사용자별 GIF 전송 기록 (인기 순위 반영)"""
+    try:
+        user_id = get_user_id_from_request()
         
+        if not user_id:
+            return jsonify({
+                'success': False,
+                'error': '사용자 ID가 필요합니다.'
+            }), 400
+        
+        get_user_gifs(user_id)
+        payload = record_gif_send(user_id, gif_id)
+        if payload is None:
+            return jsonify({
+                'success': False,
+                'error': 'GIF를 찾을 수 없습니다.'
+            }), 404
+        return jsonify(payload)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -342,13 +1533,16 @@ def search_gifs():
 def get_user_gifs_by_path(user_id: str):
     """경로로 사용자별 GIF 목록 반환"""
     try:
-        gifs = get_user_gifs(user_id)
-        return jsonify({
-            'success': True,
-            'data': gifs,
-            'count': len(gifs),
-            'userId': user_id
-        })
+        try:
+            paging = get_paging_args()
+            view = get_view_args()
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        return cached_json_response(user_id, lambda: user_gifs_payload(user_id, paging, view))
     except Exception as e:
         return jsonify({
             'success': False,
@@ -359,66 +1553,20 @@ def get_user_gifs_by_path(user_id: str):
 def add_user_gif_by_path(user_id: str):
     """경로로 사용자별 새 GIF 추가"""
     try:
-        data = request.json
-        
-        # 필수 필드 확인
-        required_fields = ['title', 'tags']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({
-                    'success': False,
-                    'error': f'필수 필드 누락: {field}'
-                }), 400
-        
-        # 고유 ID 생성
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        gif_id = f"{user_id}_{data.get('title')}_{timestamp}"
-        # gif_id = data.get('id', str(uuid.uuid4()))
-        
-        # 사용자별 디렉토리 가져오기
-        user_gif_dir = get_user_gif_directory(user_id)
-        
-        # 파일명 생성
-        filename = f"{gif_id}.gif"
-        
-        gif_path = os.path.join(user_gif_dir, filename)
-        
-        # base64 GIF 데이터가 있으면 저장
-        if 'base64_data' in data:
-            if not save_base64_to_file(data['base64_data'], gif_path):
-                return jsonify({
-                    'success': False,
-                    'error': 'GIF 파일 저장 실패'
-                }), 500
-        
-        # LocalGif 객체 생성 (thumbnailUrl을 url과 동일하게 설정)
-        gif_url = f'/gifs/{user_id}/{filename}' if 'base64_data' in data else data.get('url', '')
-        new_gif = {
-            'id': gif_id,
-            'title': data['title'],
-            'url': gif_url,
-            'thumbnailUrl': gif_url,  # thumbnail과 gif를 같은 경로로 설정
-            'tags': data['tags'],
-            'userId': user_id
-        }
-        
-        # 사용자의 기존 GIF 목록에 추가
-        user_gifs = get_user_gifs(user_id)
-        user_gifs.append(new_gif)
-        
-        # 저장
-        if save_user_gifs(user_id, user_gifs):
-            return jsonify({
-                'success': True,
-                'message': 'GIF가 성공적으로 추가되었습니다.',
-                'data': new_gif
-            })
-        else:
-            return jsonify({
-                'success': False,
-                'error': 'GIF 목록 저장 실패'
-            }), 500
-        
+        return handle_json_add(user_id, request.json)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/users/<user_id>/gifs/upload', methods=['POST'])
+def upload_user_gif_by_path(user_id: str):
+    """경로로 사용자별 GIF 스트리밍 업로드 (raw 바이너리 또는 multipart)"""
+    try:
+        return handle_stream_upload(user_id)
+    except RequestEntityTooLarge:
+        return too_large_response()
     except Exception as e:
         return jsonify({
             'success': False,
@@ -429,15 +1577,10 @@ def add_user_gif_by_path(user_id: str):
 def delete_user_gif_by_path(user_id: str, gif_id: str):
     """경로로 사용자별 GIF 삭제"""
     try:
-        user_gifs = get_user_gifs(user_id)
-        user_gif_dir = get_user_gif_directory(user_id)
+        get_user_gifs(user_id)
         
-        # 삭제할 GIF 찾기 (해당 사용자의 GIF만)
-        gif_to_delete = None
-        for gif in user_gifs:
-            if gif['id'] == gif_id and gif['userId'] == user_id:
-                gif_to_delete = gif
-                break
+        # 삭제할 GIF 찾기 (해당 사용자의 GIF만, id 인덱스 사용)
+        gif_to_delete = catalog.find_user_gif(user_id, gif_id)
         
         if not gif_to_delete:
             return jsonify({
@@ -445,26 +1588,14 @@ def delete_user_gif_by_path(user_id: str, gif_id: str):
                 'error': 'GIF를 찾을 수 없습니다.'
             }), 404
         
-        # 파일 삭제 시도 (사용자 폴더에서)
-        try:
-            if gif_to_delete['url'].startswith(f'/gifs/{user_id}/'):
-                filename = gif_to_delete['url'].split('/')[-1]  # 파일명만 추출
-                file_path = os.path.join(user_gif_dir, filename)
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-                    print(f"파일 삭제됨: {file_path}")
-        except Exception as e:
-            print(f"파일 삭제 중 오류 (무시됨): {e}")
-        
-        # 사용자 목록에서 제거
-        user_gifs = [gif for gif in user_gifs if gif['id'] != gif_id]
-        
-        # 저장
-        if save_user_gifs(user_id, user_gifs):
+        # 사용자 목록에서 제거 후 저장
+        if remove_user_gif(user_id, gif_id) is not None:
+            # 파일 삭제 시도 (blob 은 참조가 모두 사라진 뒤에만, 썸네일 포함)
+            delete_gif_files(user_id, gif_to_delete)
             return jsonify({
                 'success': True,
                 'message': 'GIF가 성공적으로 삭제되었습니다.',
-                'deleted_gif': gif_to_delete
+                'deleted_gif': public(gif_to_delete)
             })
         else:
             return jsonify({
@@ -478,42 +1609,144 @@ def delete_user_gif_by_path(user_id: str, gif_id: str):
             'error': str(e)
         }), 500
 
+@app.route('/users/<user_id>/gifs/batch', methods=['POST'])
+def add_user_gifs_batch_by_path(user_id: str):
+    """경로로 사용자별 GIF 여러 개 추가"""
+    try:
+        return batch_add_response(user_id)
+    except RequestEntityTooLarge:
+        return too_large_response()
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/users/<user_id>/gifs/batch/delete', methods=['POST'])
+def delete_user_gifs_batch_by_path(user_id: str):
+    """경로로 사용자별 GIF 여러 개 삭제"""
+    try:
+        return batch_delete_response(user_id)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/users/gifs', methods=['GET'])
+def get_users_gifs():
+    """여러 사용자의 GIF 목록을 한 번에 반환 (userIds=a,b,c, limit/offset/fields/count 는 사용자별 적용)"""
+    try:
+        try:
+            user_ids = parse_batch_user_ids(request.args.getlist('userIds'))
+            paging = get_paging_args()
+            view = get_view_args()
+            if paging['cursor']:
+                raise ValueError('여러 사용자 조회에는 cursor 를 쓸 수 없습니다.')
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'error': str(e)
+            }), 400
+        
+        variant = (request.path, tuple(sorted(item for item in request.args.items(multi=True) if item[0] != 'userIds')))
+        etag = users_gifs_etag(user_ids, variant)
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
+        else:
+            response = app.response_class(users_gifs_body(user_ids, paging, view, variant), mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = RESPONSE_CACHE_CONTROL
+        return response
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/users/<user_id>/gifs/changes', methods=['GET'])
+def get_user_gif_changes_by_path(user_id: str):
+    """경로로 사용자별 GIF 변경 조회"""
+    try:
+        return changes_response(user_id)
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @app.route('/users/<user_id>/gifs/search', methods=['GET'])
 def search_user_gifs_by_path(user_id: str):
     """경로로 사용자별 태그로 GIF 검색"""
     try:
         query = request.args.get('q', '').lower()
-        user_gifs = get_user_gifs(user_id)
-        
-        if not query:
+        try:
+            paging = get_paging_args()
+            view = get_view_args()
+        except ValueError as e:
             return jsonify({
-                'success': True,
-                'data': user_gifs,
-                'count': len(user_gifs),
-                'userId': user_id
-            })
+                'success': False,
+                'error': str(e)
+            }), 400
         
-        # 제목이나 태그에서 검색
-        filtered_gifs = []
-        for gif in user_gifs:
-            if (query in gif['title'].lower() or 
-                any(query in tag.lower() for tag in gif['tags'])):
-                filtered_gifs.append(gif)
+        return cached_json_response(user_id, lambda: search_payload(user_id, query, paging, view))
         
+    except Exception as e:
         return jsonify({
-            'success': True,
-            'data': filtered_gifs,
-            'count': len(filtered_gifs),
-            'query': query,
-            'userId': user_id
-        })
-        
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/users/<user_id>/gifs/<gif_id>/sends', methods=['POST'])
+def record_user_send_by_path(user_id: str, gif_id: str):
+    """경로로 사용자별 GIF 전송 기록"""
+    try:
+        get_user_gifs(user_id)
+        payload = record_gif_send(user_id, gif_id)
+        if payload is None:
+            return jsonify({
+                'success': False,
+                'error': 'GIF를 찾을 수 없습니다.'
+            }), 404
+        return jsonify(payload)
     except Exception as e:
         return jsonify({
             'success': False,
             'error': str(e)
         }), 500
 
+def serve_gif_file(filename: str):
+    """BASE_GIF_DIRECTORY 아래 GIF/썸네일 서빙
+
+    wsgi.file_wrapper 를 쓰므로 gunicorn 에서는 sendfile 로 복사 없이 보내고, Range 와 조건부 GET 을 지원한다.
+    blob 원본은 내용 해시 이름이라 immutable 로 오래 캐시하고, 썸네일/변형을 포함한 나머지는 STATIC_MAX_AGE 만큼 캐시한다.
+    """
+    path = resolve_path(BASE_GIF_DIRECTORY, filename)
+    if path is None:
+        abort(404)
+    if is_blob_file(filename):
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        cache_control = f'public, max-age={STATIC_MAX_AGE}'
+    response = send_gif_file(request, app.response_class, open_files, path, cache_control)
+    if response is None:
+        abort(404)
+    return response
+
+@app.route('/gifs/<path:filename>', methods=['GET', 'HEAD'])
+def serve_legacy_gif_file(filename: str):
+    """예전 '/gifs/...' URL 로 저장된 레코드용"""
+    return serve_gif_file(filename)
+
+@app.route('/static/gifs/<path:filename>', methods=['GET', 'HEAD'])
+def serve_static_gif_file(filename: str):
+    return serve_gif_file(filename)
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """Prometheus 텍스트 형식 메트릭 (이 워커 프로세스 기준)"""
+    return app.response_class(registry.render(), content_type=registry.content_type)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """헬스 체크"""
@@ -527,6 +1760,12 @@ if __name__ == '__main__':
     print("🎬 사용자별 GIF 관리 서버 시작...")
     print("📁 기본 GIF 디렉토리:", BASE_GIF_DIRECTORY)
     print("📄 JSON 파일:", JSON_FILE_PATH)
+    if catalog.lazy:
+        print(f"🗂️  카탈로그 지연 로드: {storage.name} 저장소, 메모리 최대 GIF {CATALOG_CACHE_GIFS}개")
+    print(f"🚦 업로드 제한: 본문 {MAX_UPLOAD_SIZE} 바이트 (JSON {MAX_JSON_BODY_SIZE}), "
+          f"사용자별 초당 {RATE_LIMIT_PER_SECOND}회 (연속 {RATE_LIMIT_BURST:g}회), 동시 {MAX_CONCURRENT_UPLOADS}개")
+    if transcodes.enabled:
+        print(f"🗜️  전송용 변형 생성: {', '.join(transcodes.formats)} (워커 {TRANSCODE_WORKERS}개)")
     print("🌐 서버 주소: http://chlee.postech.ac.kr:5000")
     print("\n폴더 구조:")
     print("  ./public/gifs/")
@@ -538,13 +1777,29 @@ if __name__ == '__main__':
     print("        └── gif4_20241201_123459.gif")
     print("\n사용 가능한 엔드포인트:")
     print("  GET    /gifs?userId=<id>              - 사용자별 GIF 목록 조회")
+    print("         (공통: limit=<n>&cursor=<nextCursor> 페이지, fields=id,title,thumbnailUrl 필드 선택, count=1 개수만)")
     print("  POST   /gifs                          - 사용자별 GIF 추가 (userId 필요)")
+    print("  POST   /gifs/upload?userId=<id>&title=<t>&tags=<a,b> - 사용자별 GIF 스트리밍 업로드")
     print("  DELETE /gifs/<id>?userId=<id>         - 사용자별 GIF 삭제")
+    print("  POST   /gifs/batch?userId=<id>        - 사용자별 GIF 여러 개 추가 ({gifs: [...]} 또는 multipart)")
+    print("  POST   /gifs/batch/delete?userId=<id> - 사용자별 GIF 여러 개 삭제 ({ids: [...]})")
     print("  GET    /gifs/search?q=<query>&userId=<id> - 사용자별 GIF 검색")
+    print("  POST   /gifs/<id>/sends?userId=<id>   - 사용자별 GIF 전송 기록")
+    print("  GET    /gifs/changes?userId=<id>&since=<cursor> - 사용자별 GIF 변경 (wait=<초> long-poll, SSE)")
+    print("  GET    /gifs/trending?tag=<tag>&limit=<n> - 전체 사용자 인기 GIF (시간 감쇠)")
     print("  GET    /users/<userId>/gifs           - 특정 사용자 GIF 목록")
     print("  POST   /users/<userId>/gifs           - 특정 사용자 GIF 추가")
+    print("  POST   /users/<userId>/gifs/upload    - 특정 사용자 GIF 스트리밍 업로드")
     print("  DELETE /users/<userId>/gifs/<id>      - 특정 사용자 GIF 삭제")
+    print("  POST   /users/<userId>/gifs/batch     - 특정 사용자 GIF 여러 개 추가")
+    print("  POST   /users/<userId>/gifs/batch/delete - 특정 사용자 GIF 여러 개 삭제")
+    print("  GET    /users/gifs?userIds=<a,b,c>    - 여러 사용자 GIF 목록 한 번에 조회")
+    print("  GET    /users/<userId>/gifs/changes   - 특정 사용자 GIF 변경 (since=<cursor>)")
     print("  GET    /users/<userId>/gifs/search    - 특정 사용자 GIF 검색")
+    print("  POST   /users/<userId>/gifs/<id>/sends - 특정 사용자 GIF 전송 기록")
+    print("  GET    /static/gifs/<userId>/<file>   - 저장된 GIF/썸네일/변형 (Range, 조건부 GET 지원)")
+    print("  GET    /metrics                       - Prometheus 메트릭")
     print("  GET    /health                        - 헬스 체크")
+    print("\n⚠️  개발용 서버입니다. 운영 환경에서는 python wsgi.py (gunicorn 멀티 워커) 를 사용하세요.")
     
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,890 @@
+"""asyncio(aiohttp) 기반 GIF 서버
+
+server.py 와 같은 경로, 같은 JSON 응답 형식을 제공한다. 카탈로그, 검색 색인, blob 저장소,
+응답 캐시는 server.py 의 것을 그대로 쓰고, 파일 쓰기/삭제와 base64 디코딩처럼 막히는 작업만
+전용 스레드 풀로 넘겨 이벤트 루프가 멈추지 않게 한다. 스트리밍 업로드는 요청 본문을
+비동기로 읽으면서 스레드 풀 쪽에서 바로 디스크에 쓴다.
+
+    python server_async.py [--host 0.0.0.0] [--port 5000]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
+
+try:
+    from aiohttp import web
+except ImportError:
+    print("❌ aiohttp 가 설치되어 있지 않습니다: pip install aiohttp")
+    raise
+from werkzeug.exceptions import RequestEntityTooLarge
+
+import server
+from gif_admission import admission_key, retry_after
+from gif_records import public
+from gif_serialization import encode_payload, serializer
+from gif_blobs import is_blob_file
+from gif_metrics import ADMISSION_REJECTIONS, JSON_BYTES, JSON_SECONDS, REQUEST_BYTES, REQUEST_SECONDS, RESPONSE_BYTES, registry
+from gif_static import IMMUTABLE_CACHE_CONTROL, resolve_path
+from gif_uploads import StagedFile
+from server import (
+    BASE_GIF_DIRECTORY,
+    CHANGES_HEARTBEAT,
+    CHANGES_STREAM_SECONDS,
+    GIF_URL_PREFIX,
+    MAX_JSON_BODY_SIZE,
+    MAX_UPLOAD_SIZE,
+    PROFILE_HEADER,
+    RATE_LIMITED_ENDPOINTS,
+    RESPONSE_CACHE_CONTROL,
+    STATIC_MAX_AGE,
+    UPLOAD_CHUNK_SIZE,
+    UPLOAD_ENDPOINTS,
+    UPLOAD_QUEUE_TIMEOUT,
+    UPLOAD_RETRY_AFTER,
+    add_stored_gif,
+    batch_add_gifs,
+    batch_delete_gifs,
+    catalog,
+    change_events,
+    changes,
+    changes_payload,
+    commit_gif_upload,
+    delete_gif_files,
+    fragment_cache,
+    get_batch_list,
+    get_changes_args,
+    get_paging_args,
+    get_trending_args,
+    get_user_gifs,
+    get_view_args,
+    is_streaming_upload,
+    new_gif_record,
+    new_user_gif_id,
+    parse_batch_user_ids,
+    profiler,
+    rate_limiter,
+    record_gif_send,
+    remove_user_gif,
+    response_cache,
+    save_base64_to_file,
+    stage_gif_upload,
+    search_payload,
+    trending_payload,
+    upload_gate,
+    user_gifs_payload,
+    user_versions,
+    users_gifs_body,
+    users_gifs_etag,
+)
+
+# 파일 I/O, base64 디코딩을 처리할 스레드 수
+ASYNC_IO_THREADS = int(os.environ.get('GIF_ASYNC_IO_THREADS', '16'))
+# JSON 본문(base64 업로드 포함) 최대 크기 (바이트, 스트리밍 업로드는 server.py 의 MAX_UPLOAD_SIZE)
+ASYNC_MAX_BODY_SIZE = int(os.environ.get('GIF_ASYNC_MAX_BODY_SIZE', str(MAX_JSON_BODY_SIZE)))
+# multipart 배치 추가에서 파일 파트를 메모리에 두는 최대 크기 (넘으면 임시 파일로)
+BATCH_SPOOL_SIZE = int(os.environ.get('GIF_ASYNC_BATCH_SPOOL_SIZE', str(1024 * 1024)))
+# 동시 업로드 자리를 기다릴 때 다시 확인하는 간격 (초)
+UPLOAD_SLOT_POLL_INTERVAL = 0.01
+# 변경 long-poll/SSE 에서 새 변경을 확인하는 간격 (초)
+CHANGES_POLL_INTERVAL = 0.1
+
+io_executor = ThreadPoolExecutor(max_workers=ASYNC_IO_THREADS, thread_name_prefix='gif-io')
+
+routes = web.RouteTableDef()
+
+
+async def run_blocking(fn, *args):
+    """막히는 함수를 I/O 스레드 풀에서 실행"""
+    return await asyncio.get_running_loop().run_in_executor(io_executor, fn, *args)
+
+
+def json_response(payload: Dict[str, Any], status: int = 200) -> web.Response:
+    """jsonify 와 같은 직렬화로 JSON 응답 생성"""
+    with JSON_SECONDS.time(operation='dumps'):
+        body = serializer.dumps(payload)
+    JSON_BYTES.observe(len(body), operation='dumps')
+    return web.Response(
+        body=body,
+        status=status,
+        content_type='application/json',
+    )
+
+
+def error_response(message: str, status: int) -> web.Response:
+    return json_response({'success': False, 'error': message}, status)
+
+
+def admission_error(route: str, message: str, status: int, reason: str,
+                    retry_after_seconds: Optional[float] = None) -> web.Response:
+    """제한으로 거절하는 응답 (retry_after_seconds 가 있으면 Retry-After 헤더 포함)"""
+    ADMISSION_REJECTIONS.inc(route=route, reason=reason)
+    response = error_response(message, status)
+    if retry_after_seconds is not None:
+        response.headers['Retry-After'] = retry_after(retry_after_seconds)
+    return response
+
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더에 주어진 ETag (또는 *) 가 있는지 확인"""
+    if not header:
+        return False
+    for value in header.split(','):
+        value = value.strip()
+        if value.startswith('W/'):
+            value = value[2:]
+        if value == '*' or value.strip('"') == etag:
+            return True
+    return False
+
+
+def cached_json_response(request: web.Request, user_id: str, build_payload) -> web.Response:
+    """server.cached_json_response 와 같은 ETag/304, 직렬화 본문 LRU 캐시 적용"""
+    get_user_gifs(user_id)  # 새 사용자 초기화로 버전이 바뀌기 전에 먼저 처리
+    version = user_versions.get(user_id)
+    variant = (request.path, tuple(sorted(request.query.items())))
+    etag = user_versions.etag(user_id, version, variant)
+
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = web.Response(status=304)
+    else:
+        key = (user_id, version, variant)
+        body = response_cache.get(key)
+        if body is None:
+            payload = build_payload()
+            with JSON_SECONDS.time(operation='encode_payload'):
+                body = encode_payload(payload, fragment_cache)
+            JSON_BYTES.observe(len(body), operation='encode_payload')
+            response_cache.put(key, body)
+        response = web.Response(body=body, content_type='application/json')
+
+    response.headers['ETag'] = f'"{etag}"'
+    response.headers['Cache-Control'] = RESPONSE_CACHE_CONTROL
+    return response
+
+
+def timed_loads(text: str) -> Any:
+    JSON_BYTES.observe(len(text), operation='loads')
+    with JSON_SECONDS.time(operation='loads'):
+        return serializer.loads(text)
+
+
+async def read_json(request: web.Request) -> Optional[Dict[str, Any]]:
+    """JSON 본문 파싱 (JSON 이 아니거나 잘못되었으면 None)"""
+    if request.content_type != 'application/json' or not request.body_exists:
+        return None
+    try:
+        return await request.json(loads=timed_loads)
+    except ValueError:
+        return None
+
+
+async def get_user_id_from_request(request: web.Request) -> Optional[str]:
+    """요청에서 사용자 ID 추출 (쿼리 파라미터 > POST JSON 본문 > Bearer 토큰)"""
+    user_id = request.query.get('userId')
+    if user_id:
+        return user_id
+
+    body = await read_json(request) if request.method == 'POST' else None
+    if body:
+        user_id = body.get('userId')
+        if user_id:
+            return user_id
+
+    auth_header = request.headers.get('Authorization')
+    if auth_header and auth_header.startswith('Bearer '):
+        # 실제 환경에서는 토큰을 검증하여 사용자 ID를 추출해야 함
+        return auth_header.replace('Bearer ', '')
+    return None
+
+
+async def finish_add(user_id: str, new_gif: Dict[str, Any], stored: Optional[Dict[str, str]]) -> web.Response:
+    if await run_blocking(add_stored_gif, user_id, new_gif, stored):
+        return json_response({
+            'success': True,
+            'message': 'GIF가 성공적으로 추가되었습니다.',
+            'data': public(new_gif)
+        })
+    return error_response('GIF 목록 저장 실패', 500)
+
+
+# ----------------------------------------------------------------------
+# 스트리밍 업로드
+# ----------------------------------------------------------------------
+async def receive_async_stream(user_id: str, read_chunk) -> Optional[StagedFile]:
+    """이벤트 루프에서 read_chunk() 로 읽은 청크를 하나씩 I/O 스레드에서 임시 파일에 기록
+
+    I/O 스레드는 청크 하나를 쓰는 동안만 쓰므로 느린 클라이언트가 스레드를 붙잡지 않는다.
+    MAX_UPLOAD_SIZE 를 넘으면 RequestEntityTooLarge, 기록 실패 시 None.
+    """
+    staged = None
+    total = 0
+    try:
+        staged = await run_blocking(stage_gif_upload, user_id)
+        while True:
+            chunk = await read_chunk()
+            if not chunk:
+                break
+            total += len(chunk)
+            if total > MAX_UPLOAD_SIZE:
+                raise RequestEntityTooLarge()
+            await run_blocking(staged.write, chunk)
+        await run_blocking(staged.close)
+        return staged
+    except Exception as e:
+        if staged is not None:
+            staged.discard()
+        if isinstance(e, RequestEntityTooLarge):
+            raise
+        print(f"파일 저장 중 오류: {e}")
+        return None
+    except BaseException:
+        if staged is not None:
+            staged.discard()
+        raise
+
+
+async def discard_staged(staged: Optional[StagedFile]) -> None:
+    """레코드를 추가하지 못한 업로드 임시 파일 정리"""
+    if staged is not None:
+        await run_blocking(staged.discard)
+
+
+def parse_tags(values: List[str]) -> List[str]:
+    """반복 파라미터 또는 쉼표 구분 문자열로 받은 tags 정리"""
+    return [tag.strip() for value in values for tag in value.split(',') if tag.strip()]
+
+
+async def read_multipart_upload(request: web.Request, user_id: str):
+    """multipart 파트를 모두 읽어 (필드, 받은 임시 파일, file 파트 존재 여부) 반환
+
+    file 파트는 메모리에 모으지 않고 읽는 즉시 임시 파일에 쓴다. 파일 이름(gif id)은 title 이
+    file 파트 뒤에 와도 되도록 모든 파트를 읽은 뒤 정한다.
+    """
+    fields: Dict[str, List[str]] = {}
+    staged = None
+    has_file = False
+    try:
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == 'file' and not has_file:
+                has_file = True
+                staged = await receive_async_stream(user_id, lambda: part.read_chunk(UPLOAD_CHUNK_SIZE))
+            elif part.name:
+                fields.setdefault(part.name, []).append(await part.text())
+    except BaseException:
+        if staged is not None:
+            staged.discard()
+        raise
+    return fields, staged, has_file
+
+
+async def handle_stream_upload(request: web.Request, user_id: str) -> web.Response:
+    """스트리밍 업로드 공통 처리 (multipart 는 form 필드 + 'file' 파트, raw 는 쿼리 파라미터 + 본문)"""
+    multipart = request.content_type == 'multipart/form-data'
+    if multipart:
+        fields, staged, has_file = await read_multipart_upload(request, user_id)
+        if has_file and staged is None:
+            return error_response('GIF 파일 저장 실패', 500)
+    else:
+        fields = {key: request.query.getall(key) for key in request.query.keys()}
+        staged, has_file = None, True
+
+    title = fields['title'][0] if 'title' in fields else None
+    tags = parse_tags(fields['tags']) if 'tags' in fields else None
+
+    # 필수 필드 확인
+    for field, missing in (('title', title is None), ('tags', tags is None), ('file', not has_file)):
+        if missing:
+            await discard_staged(staged)
+            return error_response(f'필수 필드 누락: {field}', 400)
+
+    if not multipart:
+        staged = await receive_async_stream(user_id, lambda: request.content.read(UPLOAD_CHUNK_SIZE))
+        if staged is None:
+            return error_response('GIF 파일 저장 실패', 500)
+
+    gif_id = new_user_gif_id(user_id, title)
+    stored = await run_blocking(commit_gif_upload, staged, user_id, gif_id, GIF_URL_PREFIX)
+    if stored is None:
+        return error_response('GIF 파일 저장 실패', 500)
+
+    new_gif = new_gif_record(gif_id, title, tags, user_id, stored)
+    return await finish_add(user_id, new_gif, stored)
+
+
+async def add_json_gif(request: web.Request, user_id: str, url_prefix: str) -> web.Response:
+    """JSON 본문(base64_data 선택)으로 GIF 추가"""
+    data = await read_json(request)
+    if data is None:
+        return error_response('JSON 본문이 필요합니다.', 400)
+
+    # 필수 필드 확인
+    for field in ('title', 'tags'):
+        if field not in data:
+            return error_response(f'필수 필드 누락: {field}', 400)
+
+    gif_id = new_user_gif_id(user_id, data.get('title'))
+
+    # base64 GIF 데이터가 있으면 I/O 스레드에서 디코딩 후 저장
+    stored = None
+    if 'base64_data' in data:
+        stored = await run_blocking(save_base64_to_file, user_id, gif_id, data['base64_data'], url_prefix)
+        if stored is None:
+            return error_response('GIF 파일 저장 실패', 500)
+
+    new_gif = new_gif_record(gif_id, data['title'], data['tags'], user_id, stored, data.get('url', ''))
+    return await finish_add(user_id, new_gif, stored)
+
+
+async def delete_gif_response(user_id: str, gif_id: str, not_found_message: str) -> web.Response:
+    get_user_gifs(user_id)
+
+    # 삭제할 GIF 찾기 (해당 사용자의 GIF만, id 인덱스 사용)
+    gif_to_delete = catalog.find_user_gif(user_id, gif_id)
+    if not gif_to_delete:
+        return error_response(not_found_message, 404)
+
+    if await run_blocking(remove_user_gif, user_id, gif_id) is not None:
+        # 파일 삭제 (blob 은 참조가 모두 사라진 뒤에만, 썸네일 포함)
+        await run_blocking(delete_gif_files, user_id, gif_to_delete)
+        return json_response({
+            'success': True,
+            'message': 'GIF가 성공적으로 삭제되었습니다.',
+            'deleted_gif': public(gif_to_delete)
+        })
+    return error_response('GIF 목록 저장 실패', 500)
+
+
+async def read_multipart_batch(request: web.Request) -> Tuple[Optional[str], Dict[str, BinaryIO]]:
+    """multipart 배치 본문에서 (gifs 필드 JSON 문자열, 파트 이름 -> 파일) 반환
+
+    파일 파트는 병렬 저장을 위해 순서대로 받아 임시 파일(작으면 메모리)에 모아 둔다.
+    전체 크기가 MAX_UPLOAD_SIZE 를 넘으면 RequestEntityTooLarge.
+    """
+    gifs_field = None
+    files: Dict[str, BinaryIO] = {}
+    total = 0
+    try:
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == 'gifs' and part.filename is None:
+                gifs_field = await part.text()
+            elif part.name and part.name not in files:
+                spool = files[part.name] = tempfile.SpooledTemporaryFile(max_size=BATCH_SPOOL_SIZE)
+                while True:
+                    chunk = await part.read_chunk(UPLOAD_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    total += len(chunk)
+                    if total > MAX_UPLOAD_SIZE:
+                        raise RequestEntityTooLarge()
+                    await run_blocking(spool.write, chunk)
+                spool.seek(0)
+    except BaseException:
+        close_files(files)
+        raise
+    return gifs_field, files
+
+
+def close_files(files: Dict[str, BinaryIO]) -> None:
+    for f in files.values():
+        f.close()
+
+
+def charge_batch_items(request: web.Request, count: int) -> None:
+    """server.charge_batch_items 와 같이 두 번째 항목부터 항목마다 토큰 하나씩 추가로 쓴다"""
+    rate_limiter.charge(request.get('admission_key', ''), count - 1)
+
+
+async def batch_add_response(request: web.Request, user_id: str) -> web.Response:
+    """server.batch_add_response 와 같은 배치 추가 (JSON 또는 multipart)"""
+    files: Dict[str, BinaryIO] = {}
+    try:
+        if request.content_type == 'multipart/form-data':
+            gifs_field, files = await read_multipart_batch(request)
+            items = get_batch_list({'gifs': timed_loads(gifs_field or 'null')}, 'gifs')
+        else:
+            items = get_batch_list(await read_json(request), 'gifs')
+    except ValueError as e:
+        close_files(files)
+        return error_response(str(e), 400)
+    charge_batch_items(request, len(items))
+    try:
+        payload, status = await run_blocking(batch_add_gifs, user_id, items, files.get if files else None)
+    finally:
+        close_files(files)
+    return json_response(payload, status)
+
+
+async def batch_delete_response(request: web.Request, user_id: str) -> web.Response:
+    """server.batch_delete_response 와 같은 배치 삭제 (JSON 본문: {"ids": [...]})"""
+    try:
+        gif_ids = get_batch_list(await read_json(request), 'ids')
+        charge_batch_items(request, len(gif_ids))
+        payload, status = await run_blocking(batch_delete_gifs, user_id, gif_ids)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    return json_response(payload, status)
+
+
+def list_response(request: web.Request, user_id: str) -> web.Response:
+    try:
+        paging = get_paging_args(request.query)
+        view = get_view_args(request.query)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    return cached_json_response(request, user_id, lambda: user_gifs_payload(user_id, paging, view))
+
+
+def send_response(user_id: str, gif_id: str) -> web.Response:
+    get_user_gifs(user_id)
+    payload = record_gif_send(user_id, gif_id)
+    if payload is None:
+        return error_response('GIF를 찾을 수 없습니다.', 404)
+    return json_response(payload)
+
+
+def search_response(request: web.Request, user_id: str) -> web.Response:
+    query = request.query.get('q', '').lower()
+    try:
+        paging = get_paging_args(request.query)
+        view = get_view_args(request.query)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    return cached_json_response(request, user_id, lambda: search_payload(user_id, query, paging, view))
+
+
+async def wait_newer(seen: int, timeout: float) -> int:
+    """이벤트 루프를 막지 않고 changes.latest 가 seen 보다 커질 때까지 최대 timeout 초 기다림"""
+    deadline = time.monotonic() + timeout
+    while changes.latest <= seen:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        await asyncio.sleep(min(CHANGES_POLL_INTERVAL, remaining))
+    return changes.latest
+
+
+async def stream_changes(request: web.Request, user_id: str, since: Optional[int], limit: int) -> web.StreamResponse:
+    """server.stream_changes 와 같은 SSE 응답 (연결 수 제한 없음)"""
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-store',
+        'X-Accel-Buffering': 'no',
+        'Access-Control-Allow-Origin': '*',
+    })
+    await response.prepare(request)
+    deadline = time.monotonic() + CHANGES_STREAM_SECONDS
+    first = True
+    try:
+        await response.write(b'retry: 3000\n\n')
+        while True:
+            seen = changes.latest
+            payload = await run_blocking(changes_payload, user_id, since, limit)
+            await response.write(change_events(payload, first))
+            if payload['reset']:
+                break
+            first = first and payload['hasMore']
+            since = payload['cursor']
+            if payload['hasMore']:
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if await wait_newer(seen, min(remaining, CHANGES_HEARTBEAT)) <= seen:
+                await response.write(b': keepalive\n\n')
+    except ConnectionResetError:
+        # 클라이언트가 연결을 끊음
+        return response
+    await response.write_eof()
+    return response
+
+
+async def changes_response(request: web.Request, user_id: str) -> web.StreamResponse:
+    """server.changes_response 와 같은 변경 조회 (long-poll 과 SSE 는 이벤트 루프에서 기다림)"""
+    try:
+        args = get_changes_args(request.query, request.headers.get('Last-Event-ID'))
+    except ValueError as e:
+        return error_response(str(e), 400)
+    since, limit = args['since'], args['limit']
+    if request.query.get('stream') in ('1', 'true') or request.headers.get('Accept', '').startswith('text/event-stream'):
+        return await stream_changes(request, user_id, since, limit)
+    deadline = time.monotonic() + args['wait']
+    while True:
+        seen = changes.latest
+        payload = await run_blocking(changes_payload, user_id, since, limit)
+        remaining = deadline - time.monotonic()
+        if payload['changes'] or payload['reset'] or since is None or remaining <= 0:
+            break
+        since = payload['cursor']
+        await wait_newer(seen, remaining)
+    response = json_response(payload)
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+# ----------------------------------------------------------------------
+# 라우트 (server.py 와 동일)
+# ----------------------------------------------------------------------
+@routes.get('/gifs')
+async def get_gifs(request: web.Request) -> web.Response:
+    """사용자별 GIF 목록 반환"""
+    user_id = await get_user_id_from_request(request)
+    if not user_id:
+        return error_response('사용자 ID가 필요합니다.', 400)
+    return list_response(request, user_id)
+
+
+@routes.post('/gifs')
+async def add_gif(request: web.Request) -> web.Response:
+    """사용자별 새 GIF 추가"""
+    user_id = await get_user_id_from_request(request)
+    if not user_id:
+        return error_response('사용자 ID가 필요합니다.', 400)
+    return await add_json_gif(request, user_id, GIF_URL_PREFIX)
+
+
+@routes.post('/gifs/upload')
+async def upload_gif(request: web.Request) -> web.Response:
+    """사용자별 GIF 스트리밍 업로드 (raw 바이너리 또는 multipart)"""
+    user_id = await get_user_id_from_request(request)
+    if not user_id:
+        return error_response('사용자 ID가 필요합니다.', 400)
+    return await handle_stream_upload(request, user_id)
+
+
+@routes.post('/gifs/batch')
+async def add_gifs_batch(request: web.Request) -> web.Response:
+    """사용자별 GIF 여러 개 추가 (한 번의 저장, 항목별 결과)"""
+    user_id = await get_user_id_from_request(request)
+    if not user_id:
+        return error_response('사용자 ID가 필요합니다.', 400)
+    return await batch_add_response(request, user_id)
+
+
+@routes.post('/gifs/batch/delete')
+async def delete_gifs_batch(request: web.Request) -> web.Response:
+    """사용자별 GIF 여러 개 삭제 (한 번의 저장, 항목별 결과)"""
+    user_id = await get_user_id_from_request(request)
+    if not user_id:
+        return error_response('사용자 ID가 필요합니다.', 400)
+    return await batch_delete_response(request, user_id)
+
+
+@routes.get('/gifs/search')
+async def search_gifs(request: web.Request) -> web.Response:
+    """사용자별 태그로 GIF 검색"""
+    user_id = await get_user_id_from_request(request)
+    if not user_id:
+        return error_response('사용자 ID가 필요합니다.', 400)
+    return search_response(request, user_id)
+
+
+@routes.get('/gifs/trending')
+async def get_trending_gifs(request: web.Request) -> web.Response:
+    """전체 사용자 대상 인기 GIF (tag=<tag> 면 태그별)"""
+    try:
+        args = get_trending_args(request.query)
+        view = get_view_args(request.query)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    return json_response(trending_payload(args['tag'], args['limit'], view))
+
+
+@routes.get('/gifs/changes')
+async def get_gif_changes(request: web.Request) -> web.StreamResponse:
+    """사용자별 GIF 변경 조회 (since=<cursor>, wait=<초> 면 long-poll, Accept: text/event-stream 이면 SSE)"""
+    user_id = await get_user_id_from_request(request)
+    if not user_id:
+        return error_response('사용자 ID가 필요합니다.', 400)
+    return await changes_response(request, user_id)
+
+
+@routes.post('/gifs/{gif_id}/sends')
+async def record_send(request: web.Request) -> web.Response:
+    """사용자별 GIF 전송 기록 (인기 순위 반영)"""
+    user_id = await get_user_id_from_request(request)
+    if not user_id:
+        return error_response('사용자 ID가 필요합니다.', 400)
+    return send_response(user_id, request.match_info['gif_id'])
+
+
+@routes.delete('/gifs/{gif_id}')
+async def delete_gif(request: web.Request) -> web.Response:
+    """사용자별 GIF 삭제"""
+    user_id = await get_user_id_from_request(request)
+    if not user_id:
+        return error_response('사용자 ID가 필요합니다.', 400)
+    return await delete_gif_response(
+        user_id, request.match_info['gif_id'], 'GIF를 찾을 수 없거나 삭제 권한이 없습니다.')
+
+
+@routes.get('/users/{user_id}/gifs')
+async def get_user_gifs_by_path(request: web.Request) -> web.Response:
+    """경로로 사용자별 GIF 목록 반환"""
+    return list_response(request, request.match_info['user_id'])
+
+
+@routes.post('/users/{user_id}/gifs')
+async def add_user_gif_by_path(request: web.Request) -> web.Response:
+    """경로로 사용자별 새 GIF 추가"""
+    return await add_json_gif(request, request.match_info['user_id'], GIF_URL_PREFIX)
+
+
+@routes.post('/users/{user_id}/gifs/upload')
+async def upload_user_gif_by_path(request: web.Request) -> web.Response:
+    """경로로 사용자별 GIF 스트리밍 업로드 (raw 바이너리 또는 multipart)"""
+    return await handle_stream_upload(request, request.match_info['user_id'])
+
+
+@routes.post('/users/{user_id}/gifs/batch')
+async def add_user_gifs_batch_by_path(request: web.Request) -> web.Response:
+    """경로로 사용자별 GIF 여러 개 추가"""
+    return await batch_add_response(request, request.match_info['user_id'])
+
+
+@routes.post('/users/{user_id}/gifs/batch/delete')
+async def delete_user_gifs_batch_by_path(request: web.Request) -> web.Response:
+    """경로로 사용자별 GIF 여러 개 삭제"""
+    return await batch_delete_response(request, request.match_info['user_id'])
+
+
+@routes.get('/users/gifs')
+async def get_users_gifs(request: web.Request) -> web.Response:
+    """여러 사용자의 GIF 목록을 한 번에 반환 (userIds=a,b,c, limit/offset/fields/count 는 사용자별 적용)"""
+    try:
+        user_ids = parse_batch_user_ids(request.query.getall('userIds', []))
+        paging = get_paging_args(request.query)
+        view = get_view_args(request.query)
+        if paging['cursor']:
+            raise ValueError('여러 사용자 조회에는 cursor 를 쓸 수 없습니다.')
+    except ValueError as e:
+        return error_response(str(e), 400)
+
+    variant = (request.path, tuple(sorted(item for item in request.query.items() if item[0] != 'userIds')))
+    etag = users_gifs_etag(user_ids, variant)
+    if etag_matches(request.headers.get('If-None-Match'), etag):
+        response = web.Response(status=304)
+    else:
+        response = web.Response(body=users_gifs_body(user_ids, paging, view, variant), content_type='application/json')
+    response.headers['ETag'] = f'"{etag}"'
+    response.headers['Cache-Control'] = RESPONSE_CACHE_CONTROL
+    return response
+
+
+@routes.get('/users/{user_id}/gifs/changes')
+async def get_user_gif_changes_by_path(request: web.Request) -> web.StreamResponse:
+    """경로로 사용자별 GIF 변경 조회"""
+    return await changes_response(request, request.match_info['user_id'])
+
+
+@routes.get('/users/{user_id}/gifs/search')
+async def search_user_gifs_by_path(request: web.Request) -> web.Response:
+    """경로로 사용자별 태그로 GIF 검색"""
+    return search_response(request, request.match_info['user_id'])
+
+
+@routes.delete('/users/{user_id}/gifs/{gif_id}')
+async def delete_user_gif_by_path(request: web.Request) -> web.Response:
+    """경로로 사용자별 GIF 삭제"""
+    return await delete_gif_response(
+        request.match_info['user_id'], request.match_info['gif_id'], 'GIF를 찾을 수 없습니다.')
+
+
+@routes.post('/users/{user_id}/gifs/{gif_id}/sends')
+async def record_user_send_by_path(request: web.Request) -> web.Response:
+    """경로로 사용자별 GIF 전송 기록"""
+    return send_response(request.match_info['user_id'], request.match_info['gif_id'])
+
+
+# 파일 경로에는 '/' 가 있어야 하므로 /gifs/search 등과 겹치지 않는다
+@routes.get('/gifs/{filename:[^/]+/.+}')
+@routes.get('/static/gifs/{filename:[^/]+/.+}')
+async def serve_gif_file(request: web.Request) -> web.StreamResponse:
+    """저장된 GIF/썸네일 서빙 (FileResponse 가 sendfile, Range, 조건부 GET 을 처리)"""
+    filename = request.match_info['filename']
+    path = resolve_path(BASE_GIF_DIRECTORY, filename)
+    if path is None or not await run_blocking(os.path.isfile, path):
+        raise web.HTTPNotFound()
+    if is_blob_file(filename):
+        cache_control = IMMUTABLE_CACHE_CONTROL
+    else:
+        cache_control = f'public, max-age={STATIC_MAX_AGE}'
+    return web.FileResponse(path, headers={'Cache-Control': cache_control})
+
+
+@routes.get('/metrics')
+async def metrics(request: web.Request) -> web.Response:
+    """Prometheus 텍스트 형식 메트릭 (이 프로세스 기준)"""
+    body = await run_blocking(registry.render)
+    return web.Response(body=body, headers={'Content-Type': registry.content_type})
+
+
+@routes.get('/health')
+async def health_check(request: web.Request) -> web.Response:
+    """헬스 체크"""
+    return json_response({
+        'success': True,
+        'message': '사용자별 GIF 관리 서버가 정상적으로 동작 중입니다.',
+        'timestamp': datetime.now().isoformat()
+    })
+
+
+# ----------------------------------------------------------------------
+# 미들웨어 / 앱 생성
+# ----------------------------------------------------------------------
+@web.middleware
+async def cors_middleware(request: web.Request, handler):
+    """flask_cors 기본 설정과 같이 모든 출처 허용 (preflight 포함)"""
+    if request.method == 'OPTIONS' and 'Access-Control-Request-Method' in request.headers:
+        response = web.Response()
+        response.headers['Access-Control-Allow-Methods'] = 'DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT'
+        requested_headers = request.headers.get('Access-Control-Request-Headers')
+        if requested_headers:
+            response.headers['Access-Control-Allow-Headers'] = requested_headers
+    else:
+        response = await handler(request)
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    return response
+
+
+@web.middleware
+async def metrics_middleware(request: web.Request, handler):
+    """라우트별 처리 시간/크기 기록, 프로파일 헤더가 맞으면 cProfile 측정
+
+    이벤트 루프 스레드 전체를 측정하므로 같은 시간에 처리된 다른 요청도 프로파일에 섞일 수 있다.
+    이미 다른 요청을 측정 중이면 프로파일 요청은 409 로 거절한다.
+    """
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource is not None else 'unmatched'
+    profile = None
+    if profiler.wants(request.headers.get(PROFILE_HEADER)):
+        profile = profiler.start()
+        if profile is None:
+            return admission_error(route, '다른 요청을 프로파일링 중입니다. 잠시 후 다시 시도하세요.', 409, 'profile_busy')
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await handler(request)
+        status = response.status
+    except web.HTTPException as e:
+        status = e.status
+        raise
+    finally:
+        REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method, route=route, status=status)
+        if request.content_length:
+            REQUEST_BYTES.observe(request.content_length, method=request.method, route=route)
+        if profile is not None:
+            path = profiler.finish(profile, route)
+    if profile is not None and path:
+        # 서버 경로는 로그에만 남기고 응답에는 파일 이름만
+        print(f"프로파일 저장: {path}")
+        response.headers['X-Gif-Profile-File'] = os.path.basename(path)
+    if response.content_length is not None:
+        RESPONSE_BYTES.observe(response.content_length, method=request.method, route=route)
+    return response
+
+
+async def acquire_upload_slot() -> bool:
+    """이벤트 루프를 막지 않고 UPLOAD_QUEUE_TIMEOUT 초까지 업로드 자리를 기다림"""
+    deadline = time.monotonic() + UPLOAD_QUEUE_TIMEOUT
+    while not upload_gate.try_acquire():
+        if time.monotonic() >= deadline:
+            return False
+        await asyncio.sleep(UPLOAD_SLOT_POLL_INTERVAL)
+    return True
+
+
+@web.middleware
+async def admission_middleware(request: web.Request, handler):
+    """server.py 의 admit_request 와 같은 본문 크기/사용자별 요청 수/동시 업로드 제한"""
+    endpoint = getattr(request.match_info.handler, '__name__', None)
+    if endpoint not in RATE_LIMITED_ENDPOINTS:
+        return await handler(request)
+    resource = request.match_info.route.resource
+    route = resource.canonical if resource is not None else 'unmatched'
+    streaming = is_streaming_upload(endpoint, request.content_type)
+    limit = MAX_UPLOAD_SIZE if streaming else ASYNC_MAX_BODY_SIZE
+    too_large = f'요청 본문이 너무 큽니다. (최대 {limit} 바이트)'
+    if request.content_length is not None and request.content_length > limit:
+        return admission_error(route, too_large, 413, 'too_large')
+
+    # 본문을 읽지 않고 경로/쿼리의 사용자 ID, Bearer 토큰, 클라이언트 주소 순으로 키를 정한다
+    key = request['admission_key'] = admission_key(
+        request.match_info.get('user_id'), request.query.get('userId'),
+        request.headers.get('Authorization'), request.remote)
+    wait = rate_limiter.acquire(key)
+    if wait > 0:
+        return admission_error(route, '요청이 너무 많습니다. 잠시 후 다시 시도하세요.', 429, 'rate_limited', wait)
+    if endpoint not in UPLOAD_ENDPOINTS:
+        return await handler(request)
+
+    if not await acquire_upload_slot():
+        return admission_error(route, '처리 중인 업로드가 많습니다. 잠시 후 다시 시도하세요.', 503, 'busy',
+                               UPLOAD_RETRY_AFTER)
+    try:
+        if not streaming:
+            await request.read()  # 자리를 잡은 뒤 client_max_size 안에서 미리 읽기
+        return await handler(request)
+    except (web.HTTPRequestEntityTooLarge, RequestEntityTooLarge):
+        return admission_error(route, too_large, 413, 'too_large')
+    finally:
+        upload_gate.release()
+
+
+@web.middleware
+async def catalog_middleware(request: web.Request, handler):
+    """카탈로그 지연 로드 모드에서 메모리에 없는 사용자 목록은 I/O 스레드에서 미리 읽어 둠
+
+    경로나 쿼리의 사용자만 처리하고, 이벤트 루프에서 저장소를 읽는 일은 나머지 경우로 줄인다.
+    """
+    if catalog.lazy:
+        user_id = request.match_info.get('user_id') or request.query.get('userId')
+        if user_id and not catalog.is_resident(user_id):
+            await run_blocking(catalog.get_user_gifs, user_id)
+    return await handler(request)
+
+
+@web.middleware
+async def error_middleware(request: web.Request, handler):
+    """처리되지 않은 예외는 server.py 와 같은 형식의 500 응답으로 변환"""
+    try:
+        return await handler(request)
+    except (web.HTTPException, RequestEntityTooLarge):
+        # 본문 크기 초과는 admission_middleware 가 413 으로 응답
+        raise
+    except Exception as e:
+        return error_response(str(e), 500)
+
+
+async def on_cleanup(app: web.Application) -> None:
+    io_executor.shutdown(wait=True)
+
+
+def create_app() -> web.Application:
+    app = web.Application(
+        middlewares=[cors_middleware, metrics_middleware, admission_middleware, catalog_middleware, error_middleware],
+        client_max_size=ASYNC_MAX_BODY_SIZE,
+    )
+    app.add_routes(routes)
+    app.on_cleanup.append(on_cleanup)
+    return app
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="GIF 서버를 asyncio(aiohttp) 로 실행합니다.")
+    parser.add_argument("--host", default='0.0.0.0')
+    parser.add_argument("--port", type=int, default=5000)
+    return parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    print("🎬 사용자별 GIF 관리 서버 시작 (asyncio)...")
+    print(f"🧵 I/O 스레드 {ASYNC_IO_THREADS}개, 최대 JSON 본문 {ASYNC_MAX_BODY_SIZE} bytes")
+    web.run_app(create_app(), host=args.host, port=args.port)
@@ -0,0 +1,40 @@
+import importlib
+import os
+import sys
+from unittest import mock
+
+import pytest
+
+# gif_*.py 는 webapp/channels 에 평평하게 있으므로 테스트에서 바로 import 할 수 있게 경로 추가
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def server(tmp_path_factory):
+    """임시 디렉터리에서 띄운 Flask 서버 모듈
+
+    설정은 import 시점에 환경 변수에서 읽고 users_gifs.json 은 작업 디렉터리 기준이므로 세션 동안
+    작업 디렉터리를 임시 디렉터리로 바꿔 둔다. 종료 시(atexit) 기록하는 파일은 작업 디렉터리가 돌아간 뒤에도
+    임시 디렉터리에 남도록 절대 경로로 준다. 썸네일/변형 생성과 요청 제한은 끄고 카탈로그는 바로 기록한다.
+    """
+    directory = tmp_path_factory.mktemp('server')
+    previous = os.getcwd()
+    os.chdir(directory)
+    env = {
+        'GIF_BASE_DIRECTORY': str(directory / 'gifs'),
+        'GIF_STORAGE_BACKEND': 'json',
+        'GIF_THUMBNAIL_WORKERS': '0',
+        'GIF_TRANSCODE_WORKERS': '0',
+        'GIF_BLOB_SWEEP_INTERVAL': '0',
+        'GIF_CATALOG_FLUSH_INTERVAL': '0',
+        'GIF_RATE_LIMIT_PER_SECOND': '0',
+        'GIF_TRENDING_PATH': str(directory / 'gif_trending.json'),
+        'GIF_CHANGES_PATH': str(directory / 'gif_changes.db'),
+        'GIF_PROFILE_DIR': str(directory / 'profiles'),
+    }
+    try:
+        with mock.patch.dict(os.environ, env):
+            module = importlib.import_module('server')
+        yield module
+    finally:
+        os.chdir(previous)
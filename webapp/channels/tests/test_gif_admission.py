@@ -0,0 +1,101 @@
+import threading
+
+import pytest
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from gif_admission import RateLimiter, UploadGate, admission_key, limit_chunks, retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limiter_allows_burst_then_waits_for_refill():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=2, burst=3, clock=clock)
+    assert [limiter.acquire('u') for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert limiter.acquire('u') == pytest.approx(0.5)
+    # 다른 키는 따로 센다
+    assert limiter.acquire('v') == 0.0
+
+    clock.now += 0.5
+    assert limiter.acquire('u') == 0.0
+    assert limiter.acquire('u') == pytest.approx(0.5)
+
+    # 오래 쉬어도 burst 이상 쌓이지 않는다
+    clock.now += 60
+    assert [limiter.acquire('u') for _ in range(4)][-1] == pytest.approx(0.5)
+
+
+def test_rate_limiter_charge_goes_into_debt():
+    clock = FakeClock()
+    limiter = RateLimiter(rate=1, burst=5, clock=clock)
+    assert limiter.acquire('u') == 0.0
+    # burst 보다 큰 배치도 한 번은 처리되고, 빚만큼 다음 요청이 기다린다
+    limiter.charge('u', 9)
+    assert limiter.acquire('u') == pytest.approx(6.0)
+    clock.now += 6
+    assert limiter.acquire('u') == 0.0
+    limiter.charge('u', 0)
+    limiter.charge('u', -3)
+    assert limiter.acquire('u') == pytest.approx(1.0)
+
+
+def test_rate_limiter_disabled_and_key_eviction():
+    assert RateLimiter(rate=0, burst=1).acquire('u', cost=100) == 0.0
+    limiter = RateLimiter(rate=1, burst=1, max_keys=2, clock=FakeClock())
+    for key in ('a', 'b', 'c'):
+        limiter.acquire(key)
+    assert len(limiter) == 2
+    # 버려진 키는 가득 찬 버킷으로 다시 시작
+    assert limiter.acquire('a') == 0.0
+
+
+def test_admission_key_order():
+    assert admission_key('path', 'query', 'Bearer token', '1.2.3.4') == 'path'
+    assert admission_key(None, 'query', 'Bearer token', '1.2.3.4') == 'query'
+    assert admission_key(None, None, 'Bearer token', '1.2.3.4') == 'token'
+    assert admission_key(None, None, 'Basic abc', '1.2.3.4') == '1.2.3.4'
+    assert admission_key(None, None, None, None) == ''
+
+
+def test_upload_gate_limits_concurrency():
+    gate = UploadGate(2)
+    assert gate.try_acquire() and gate.try_acquire()
+    assert gate.active == 2
+    assert not gate.try_acquire()
+    assert not gate.try_acquire(timeout=0.01)
+
+    released = threading.Timer(0.05, gate.release)
+    released.start()
+    assert gate.try_acquire(timeout=2)
+    released.join()
+    gate.release()
+    gate.release()
+    assert gate.active == 0
+
+
+def test_upload_gate_unlimited():
+    gate = UploadGate(0)
+    assert all(gate.try_acquire() for _ in range(100))
+    assert gate.active == 100
+
+
+def test_limit_chunks():
+    assert list(limit_chunks([b'ab', b'cd'], 4)) == [b'ab', b'cd']
+    assert list(limit_chunks([b'ab', b'cd'], None)) == [b'ab', b'cd']
+    chunks = limit_chunks(iter([b'ab', b'cd', b'e']), 4)
+    assert next(chunks) == b'ab'
+    assert next(chunks) == b'cd'
+    with pytest.raises(RequestEntityTooLarge):
+        next(chunks)
+
+
+def test_retry_after_rounds_up_to_whole_seconds():
+    assert retry_after(0) == '1'
+    assert retry_after(0.2) == '1'
+    assert retry_after(2.01) == '3'
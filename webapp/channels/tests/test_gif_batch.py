@@ -0,0 +1,56 @@
+import base64
+
+
+def encoded(content):
+    return base64.b64encode(b'GIF89a' + content).decode()
+
+
+def test_batch_add_reports_each_item(server):
+    client = server.app.test_client()
+    response = client.post('/users/batch_user/gifs/batch', json={'gifs': [
+        {'title': 'stored', 'tags': ['a'], 'base64_data': encoded(b'batch-1')},
+        {'title': 'no tags'},
+        {'title': 'broken', 'tags': [], 'base64_data': '@@@ not base64 @@@'},
+        {'title': 'linked', 'tags': [], 'url': '/gifs/linked.gif'},
+        'not an object',
+    ]})
+    assert response.status_code == 200
+    body = response.json
+    assert (body['success'], body['added'], body['failed']) == (True, 2, 3)
+    results = body['results']
+    assert [result['index'] for result in results] == [0, 1, 2, 3, 4]
+    assert [result['success'] for result in results] == [True, False, False, True, False]
+    assert results[2]['error'] == 'GIF 파일 저장 실패'
+    assert results[3]['data']['url'] == '/gifs/linked.gif'
+
+    # 성공한 항목만 목록에 들어가고, 실패한 항목의 임시 파일은 남지 않는다
+    titles = [gif['title'] for gif in server.get_user_gifs('batch_user')]
+    assert titles[-2:] == ['stored', 'linked']
+    assert 'broken' not in titles
+    leftovers = [name for name in server.os.listdir(server.blobs.root) if name.endswith('.part')]
+    assert leftovers == []
+
+
+def test_batch_add_fails_every_item_when_the_commit_fails(server, monkeypatch):
+    client = server.app.test_client()
+    monkeypatch.setattr(server, 'commit_changes', lambda: False)
+    response = client.post('/users/batch_fail/gifs/batch', json={'gifs': [
+        {'title': 'one', 'tags': [], 'base64_data': encoded(b'batch-2')},
+        {'title': 'two'},
+    ]})
+    assert response.status_code == 500
+    body = response.json
+    assert (body['success'], body['added'], body['failed']) == (False, 0, 2)
+    assert [result['error'] for result in body['results']] == ['GIF 목록 저장 실패', '필수 필드 누락: tags']
+
+
+def test_batch_delete_reports_missing_ids(server):
+    client = server.app.test_client()
+    added = client.post('/users/batch_delete/gifs', json={'title': 'gone', 'tags': [], 'url': '/gifs/x.gif'})
+    gif_id = added.json['data']['id']
+    response = client.post('/users/batch_delete/gifs/batch/delete', json={'ids': [gif_id, 'missing']})
+    assert response.status_code == 200
+    results = response.json['results']
+    assert [result['success'] for result in results] == [True, False]
+    assert results[0]['deleted_gif']['id'] == gif_id
+    assert server.catalog.find_user_gif('batch_delete', gif_id) is None
@@ -0,0 +1,124 @@
+import os
+import time
+
+from gif_blobs import BlobStore, referenced_digests
+from gif_catalog import GifCatalog
+from gif_changes import ChangeLog
+from gif_records import pack, public, unpack
+from gif_serialization import FragmentCache, encode_payload, serializer
+
+
+def gif(gif_id, digest, user_id='u'):
+    return {'id': gif_id, 'title': 't', 'url': f'/gifs/{gif_id}.gif', 'thumbnailUrl': '', 'tags': [],
+            'userId': user_id, 'blob': digest}
+
+
+def age(path, seconds):
+    old = time.time() - seconds
+    os.utime(path, (old, old))
+
+
+def test_same_content_is_stored_once_and_pinned(tmp_path):
+    blobs = BlobStore(str(tmp_path))
+    digest, path = blobs.put_chunks([b'GIF89a', b'same'])
+    again, again_path = blobs.put_chunks([b'GIF89a', b'same'])
+    assert (again, again_path) == (digest, path)
+    assert list(blobs.digests()) == [digest]
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.part')]
+
+    # 두 번 pin 되었으므로 한 번 풀어도 지워지지 않는다
+    blobs.unpin(digest)
+    assert not blobs.release(digest)
+    blobs.unpin(digest)
+    assert blobs.release(digest)
+    assert not os.path.exists(path)
+
+
+def test_catalog_references_keep_blob_until_last_record_is_removed(tmp_path):
+    blobs = BlobStore(str(tmp_path))
+    digest, path = blobs.put_chunks([b'GIF89a'])
+    catalog = GifCatalog(lambda: {}, lambda user_ids: {}, lambda users: True, flush_interval=60)
+    catalog.load()
+    catalog.add_listener(blobs)
+    catalog.add_user_gif('u', gif('a', digest))
+    catalog.add_user_gif('v', gif('b', digest, user_id='v'))
+    blobs.unpin(digest)
+    assert blobs.ref_count(digest) == 2
+
+    catalog.remove_user_gif('u', 'a')
+    assert not blobs.release(digest)
+    catalog.set_user_gifs('v', [])
+    assert blobs.ref_count(digest) == 0
+    assert blobs.release(digest)
+    assert not os.path.exists(path)
+
+
+def test_release_grace_and_partial_refs_keep_files(tmp_path):
+    grace = BlobStore(str(tmp_path / 'grace'), release_grace=60)
+    digest, path = grace.put_chunks([b'GIF89a'])
+    grace.unpin(digest)
+    assert not grace.release(digest)
+    age(path, 120)
+    assert grace.release(digest)
+
+    partial = BlobStore(str(tmp_path / 'partial'), partial_refs=True)
+    digest, path = partial.put_chunks([b'GIF89a'])
+    partial.unpin(digest)
+    assert not partial.release(digest)
+    assert os.path.exists(path)
+
+
+def test_sweep_removes_only_old_unreferenced_blobs(tmp_path):
+    blobs = BlobStore(str(tmp_path))
+    kept, kept_path = blobs.put_chunks([b'kept'])
+    orphan, orphan_path = blobs.put_chunks([b'orphan'])
+    fresh, fresh_path = blobs.put_chunks([b'fresh'])
+    pinned, pinned_path = blobs.put_chunks([b'pinned'])
+    for digest in (kept, orphan, fresh):
+        blobs.unpin(digest)
+    for path in (kept_path, orphan_path, pinned_path):
+        age(path, 7200)
+
+    referenced = referenced_digests([gif('a', kept), {'id': 'remote', 'url': '/x.gif'}])
+    assert blobs.sweep(referenced, min_age=3600) == [orphan]
+    assert not os.path.exists(orphan_path)
+    assert all(os.path.exists(path) for path in (kept_path, fresh_path, pinned_path))
+
+
+def test_blob_stays_out_of_public_records(tmp_path):
+    record = pack(gif('a', 'ab' * 32))
+    assert unpack(record)['blob'] == 'ab' * 32
+    assert 'blob' not in public(record)
+    assert 'blob' not in public(gif('a', 'ab' * 32))
+    assert 'blob' not in serializer.loads(serializer.dumps({'data': [record]}))['data'][0]
+    assert 'blob' not in serializer.loads(encode_payload({'data': [record]}, FragmentCache()))['data'][0]
+
+    changes = ChangeLog(str(tmp_path / 'changes.db'), unpack=public)
+    changes.on_add('u', record)
+    assert changes.flush()
+    rows, _ = changes.read('u', 0, 10)
+    assert rows[0]['gif']['id'] == 'a' and 'blob' not in rows[0]['gif']
+
+
+def test_sweep_orphans_removes_derived_files_without_a_blob(tmp_path):
+    blobs = BlobStore(str(tmp_path))
+    kept, kept_path = blobs.put_chunks([b'kept'])
+    blobs.unpin(kept)
+    gone = 'ab' + '0' * 62
+    files = {
+        'kept': os.path.join(os.path.dirname(kept_path), 'thumbnails', kept + '.png'),
+        'orphan': os.path.join(str(tmp_path), 'ab', 'thumbnails', gone + '_preview.gif'),
+        'orphan_variant': os.path.join(str(tmp_path), 'ab', 'variants', gone + '.webp'),
+        'fresh': os.path.join(str(tmp_path), 'ab', 'variants', gone + '.mp4'),
+        'other': os.path.join(str(tmp_path), 'ab', 'thumbnails', 'notes.txt'),
+    }
+    for name, path in files.items():
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'x')
+        if name != 'fresh':
+            age(path, 7200)
+
+    removed = blobs.sweep_orphans(('thumbnails', 'variants'), min_age=3600)
+    assert sorted(removed) == sorted([files['orphan'], files['orphan_variant']])
+    assert all(os.path.exists(files[name]) for name in ('kept', 'fresh', 'other'))
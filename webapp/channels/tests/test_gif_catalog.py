@@ -0,0 +1,276 @@
+import copy
+import random
+import threading
+
+from gif_catalog import GifCatalog, apply_operation, build_id_index
+from gif_records import new_gif_id
+
+
+class MemoryStorage:
+    """여러 카탈로그(워커)가 함께 쓰는 dict 저장소"""
+
+    def __init__(self, users=None):
+        self.users = copy.deepcopy(users or {})
+        self.saves = 0
+        self.fail = False
+        self.before_save = None
+
+    def load_all(self):
+        return copy.deepcopy(self.users)
+
+    def load_users(self, user_ids):
+        return {user_id: copy.deepcopy(self.users[user_id]) for user_id in user_ids if user_id in self.users}
+
+    def save(self, users):
+        if self.before_save is not None:
+            self.before_save()
+        if self.fail:
+            return False
+        self.users.update(copy.deepcopy(users))
+        self.saves += 1
+        return True
+
+
+def make_catalog(storage, **kwargs):
+    catalog = GifCatalog(storage.load_all, storage.load_users, storage.save,
+                         flush_interval=60, flush_threshold=1000, **kwargs)
+    catalog.load()
+    return catalog
+
+
+def gif(user_id, gif_id, title='t'):
+    return {'id': gif_id, 'title': title, 'url': f'/gifs/{gif_id}.gif', 'tags': ['a'], 'userId': user_id}
+
+
+def ids(gifs):
+    return [g['id'] for g in gifs]
+
+
+def test_flush_writes_pending_operations():
+    storage = MemoryStorage({'u': [gif('u', 'a')]})
+    catalog = make_catalog(storage)
+    catalog.add_user_gif('u', gif('u', 'b'))
+    catalog.update_user_gif('u', 'a', {'title': 'new'})
+    catalog.remove_user_gifs('u', ['missing'])
+    assert storage.saves == 0
+    assert catalog.pending_count() == 2
+
+    assert catalog.flush()
+    assert ids(storage.users['u']) == ['a', 'b']
+    assert storage.users['u'][0]['title'] == 'new'
+    assert catalog.pending_count() == 0
+
+
+def test_flush_merges_changes_from_other_workers():
+    storage = MemoryStorage({'u': [gif('u', 'a')]})
+    first = make_catalog(storage)
+    second = make_catalog(storage)
+    first.add_user_gif('u', gif('u', 'from_first'))
+    second.add_user_gif('u', gif('u', 'from_second'))
+    second.remove_user_gif('u', 'a')
+
+    assert first.flush()
+    assert second.flush()
+    # 서로의 변경을 덮어쓰지 않고, 기록한 쪽의 메모리에도 다른 워커의 변경이 반영된다
+    assert ids(storage.users['u']) == ['from_first', 'from_second']
+    assert ids(second.get_user_gifs('u')) == ['from_first', 'from_second']
+    assert second.find_user_gif('u', 'from_first') is not None
+
+
+def test_flush_reapplies_operations_queued_during_write():
+    storage = MemoryStorage({'u': [gif('u', 'a')]})
+    catalog = make_catalog(storage)
+    catalog.add_user_gif('u', gif('u', 'b'))
+
+    # 저장하는 동안 (카탈로그 잠금 밖) 다른 요청이 추가한 작업
+    def add_during_save():
+        storage.before_save = None
+        catalog.add_user_gif('u', gif('u', 'c'))
+    storage.before_save = add_during_save
+
+    assert catalog.flush()
+    assert ids(storage.users['u']) == ['a', 'b']
+    assert ids(catalog.get_user_gifs('u')) == ['a', 'b', 'c']
+    assert catalog.find_user_gif('u', 'c') is not None
+    assert catalog.pending_count() == 1
+
+    assert catalog.flush()
+    assert ids(storage.users['u']) == ['a', 'b', 'c']
+
+
+def test_failed_flush_keeps_operations_for_retry():
+    storage = MemoryStorage({'u': []})
+    catalog = make_catalog(storage)
+    catalog.add_user_gif('u', gif('u', 'a'))
+    storage.fail = True
+    assert not catalog.flush()
+    assert catalog.pending_count() == 1
+    assert not catalog.sync(timeout=0)
+
+    storage.fail = False
+    assert catalog.flush()
+    assert ids(storage.users['u']) == ['a']
+    assert catalog.sync(timeout=0)
+
+
+def test_init_does_not_overwrite_list_created_by_other_worker():
+    storage = MemoryStorage()
+    first = make_catalog(storage)
+    second = make_catalog(storage)
+    first.init_user_gifs('u', [gif('u', 'default')])
+    second.add_user_gif('u', gif('u', 'mine'))
+    assert second.flush()
+    assert first.flush()
+    assert ids(storage.users['u']) == ['mine']
+    assert ids(first.get_user_gifs('u')) == ['mine']
+
+
+def test_index_snapshot_stays_consistent_for_readers():
+    storage = MemoryStorage({'u': [gif('u', 'a'), gif('u', 'b')]})
+    catalog = make_catalog(storage)
+    assert catalog.find_user_gif('u', 'a') is not None
+    published = catalog._id_index['u']
+
+    catalog.remove_user_gif('u', 'a')
+    catalog.add_user_gif('u', gif('u', 'c'))
+    # 잠금 없이 읽던 (목록, 인덱스) 는 그대로이고 새 쌍이 한 번에 교체된다
+    assert ids(published[0]) == ['a', 'b']
+    assert set(published[1]) == {'a', 'b'}
+    assert catalog.find_user_gif('u', 'a') is None
+    assert catalog.find_user_gif('u', 'c') is not None
+    assert catalog._id_index['u'][0] is catalog.get_user_gifs('u')
+
+
+def test_incremental_index_matches_rebuild():
+    rng = random.Random(7)
+    users = ['u', 'v']
+    gifs = [gif('u', 'a'), gif('v', 'a'), gif('u', 'b')]
+    index = build_id_index('u', gifs)
+    for step in range(500):
+        existing = [g['id'] for g in gifs] or ['x']
+        kind = rng.choice(['add', 'add_many', 'remove', 'remove_many', 'replace_gif', 'update', 'replace'])
+        if kind == 'add':
+            op = (kind, gif(rng.choice(users), rng.choice(existing + [f'n{step}'])))
+        elif kind == 'add_many':
+            op = (kind, [gif(rng.choice(users), rng.choice(existing + [f'n{step}'])) for _ in range(3)])
+        elif kind == 'remove':
+            op = (kind, rng.choice(existing))
+        elif kind == 'remove_many':
+            op = (kind, rng.sample(existing, min(2, len(existing))))
+        elif kind == 'replace_gif':
+            gif_id = rng.choice(existing)
+            op = (kind, gif_id, gif('u', gif_id, title=f's{step}'))
+        elif kind == 'update':
+            op = (kind, rng.choice(existing), {'title': f's{step}'})
+        else:
+            op = (kind, [gif('u', f'r{step}'), gif('u', f'r{step}')]) if rng.random() < 0.1 else ('update', 'x', {})
+        gifs = apply_operation('u', gifs, op, index)
+        assert index == build_id_index('u', gifs)
+
+
+def test_new_gif_id_is_unique_within_a_second():
+    generated = {new_gif_id('u_title') for _ in range(1000)}
+    assert len(generated) == 1000
+    assert all(gif_id.startswith('u_title_') for gif_id in generated)
+
+
+def test_sync_waits_for_background_flush_and_groups_commits():
+    storage = MemoryStorage({'u': []})
+    catalog = make_catalog(storage)
+    catalog.start()
+    try:
+        assert catalog.sync(timeout=1)
+        assert storage.saves == 0
+
+        results = []
+        added = threading.Barrier(20)
+
+        def add_and_sync(i):
+            catalog.add_user_gif('u', gif('u', f'g{i}'))
+            added.wait()
+            results.append(catalog.sync(timeout=5))
+
+        threads = [threading.Thread(target=add_and_sync, args=(i,)) for i in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert results == [True] * 20
+        assert len(storage.users['u']) == 20
+        # 기다리는 요청들의 변경을 한 번의 기록으로 묶는다
+        assert storage.saves == 1
+    finally:
+        catalog.stop()
+
+
+def test_sync_times_out_while_writes_fail():
+    storage = MemoryStorage({'u': []})
+    catalog = make_catalog(storage)
+    catalog.start()
+    try:
+        storage.fail = True
+        catalog.add_user_gif('u', gif('u', 'a'))
+        assert not catalog.sync(timeout=0.2)
+        storage.fail = False
+        assert catalog.sync(timeout=5)
+        assert ids(storage.users['u']) == ['a']
+    finally:
+        catalog.stop()
+
+
+class Recorder:
+    def __init__(self):
+        self.evicted = []
+
+    def on_evict(self, user_id, gifs):
+        self.evicted.append(user_id)
+
+
+def lazy_storage():
+    return MemoryStorage({user_id: [gif(user_id, f'{user_id}1'), gif(user_id, f'{user_id}2')] for user_id in 'abcd'})
+
+
+def test_lazy_catalog_evicts_least_recently_used_users():
+    storage = lazy_storage()
+    catalog = make_catalog(storage, max_cached_gifs=4)
+    recorder = Recorder()
+    catalog.add_listener(recorder)
+    assert catalog.cached_gifs() == 0
+
+    assert ids(catalog.get_user_gifs('a')) == ['a1', 'a2']
+    catalog.get_user_gifs('b')
+    catalog.get_user_gifs('a')
+    catalog.get_user_gifs('c')
+    assert recorder.evicted == ['b']
+    assert catalog.is_resident('a') and catalog.is_resident('c') and not catalog.is_resident('b')
+    assert catalog.cached_gifs() == 4
+    assert (catalog.hits, catalog.misses, catalog.evictions) == (1, 3, 1)
+    assert catalog.get_user_gifs('missing') is None
+
+
+def test_lazy_catalog_keeps_users_with_pending_writes():
+    storage = lazy_storage()
+    catalog = make_catalog(storage, max_cached_gifs=4)
+    catalog.add_user_gif('a', gif('a', 'a3'))
+    for user_id in 'bcd':
+        catalog.get_user_gifs(user_id)
+    # 기록 대기 중인 a 는 오래됐어도 남는다
+    assert catalog.is_resident('a')
+    assert not catalog.is_resident('b')
+
+    assert catalog.flush()
+    assert ids(storage.users['a']) == ['a1', 'a2', 'a3']
+    catalog.get_user_gifs('b')
+    assert not catalog.is_resident('a')
+
+
+def test_evicted_user_is_reloaded_with_other_workers_changes():
+    storage = lazy_storage()
+    catalog = make_catalog(storage, max_cached_gifs=2)
+    catalog.get_user_gifs('a')
+    catalog.get_user_gifs('b')
+    assert not catalog.is_resident('a')
+
+    storage.users['a'].append(gif('a', 'remote'))
+    assert catalog.find_user_gif('a', 'remote') is not None
+    assert ids(catalog.get_user_gifs('a')) == ['a1', 'a2', 'remote']
@@ -0,0 +1,101 @@
+import base64
+import threading
+
+import pytest
+
+from gif_changes import ChangeLog
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def gif(gif_id):
+    return {'id': gif_id, 'title': 't', 'url': f'/gifs/{gif_id}.gif', 'tags': [], 'userId': 'u'}
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def log(tmp_path, clock):
+    return ChangeLog(str(tmp_path / 'changes.db'), retention=60, clock=clock)
+
+
+def test_flush_and_read_in_order(log):
+    log.on_add('u', gif('a'))
+    log.on_update('u', {**gif('a'), 'title': 'new'})
+    log.on_remove('u', gif('a'))
+    log.on_add('v', gif('b'))
+    log.on_replace('u', [gif('ignored')])
+    assert log.latest == 0
+    assert log.flush()
+    assert log.latest == 4
+
+    changes, more = log.read('u', 0, 10)
+    assert [(c['type'], c['gifId']) for c in changes] == [('add', 'a'), ('update', 'a'), ('remove', 'a')]
+    assert changes[1]['gif']['title'] == 'new'
+    assert 'gif' not in changes[2]
+    assert not more
+
+    changes, more = log.read('u', changes[0]['seq'], 1)
+    assert [c['type'] for c in changes] == ['update']
+    assert more
+
+
+def test_wait_newer_wakes_on_flush(log):
+    assert log.wait_newer(0, timeout=0.01) == 0
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(log.wait_newer(0, timeout=5)))
+    waiter.start()
+    log.on_add('u', gif('a'))
+    log.flush()
+    waiter.join(5)
+    assert result == [1]
+
+
+def test_other_process_changes_visible_after_refresh(tmp_path, clock, log):
+    other = ChangeLog(log.path, clock=clock)
+    other.on_add('u', gif('a'))
+    other.flush()
+    assert log.latest == 0
+    assert log.refresh() == 1
+    assert log.wait_newer(0, timeout=0) == 1
+
+
+def test_prune_marks_older_cursors_stale(log, clock):
+    log.on_add('u', gif('old'))
+    log.flush()
+    clock.now += 120
+    log.on_add('u', gif('new'))
+    log.flush()
+
+    assert log.prune() == 1
+    assert log.pruned_through == 1
+    assert log.is_stale(0)
+    assert not log.is_stale(1)
+    changes, _ = log.read('u', 0, 10)
+    assert [c['gifId'] for c in changes] == ['new']
+    # 아직 없는 seq 도 다시 받아야 한다
+    assert log.is_stale(99)
+    assert log.prune() == 0
+
+
+def test_change_feed_rows_have_no_blob(server):
+    client = server.app.test_client()
+    data = base64.b64encode(b'GIF89a' + b'changes').decode()
+    added = client.post('/users/changes_user/gifs', json={'title': 'c', 'tags': [], 'base64_data': data})
+    gif_id = added.json['data']['id']
+    assert server.catalog.find_user_gif('changes_user', gif_id).get('blob')
+
+    feed = client.get('/users/changes_user/gifs/changes?since=0').json
+    [change] = [change for change in feed['changes'] if change['gifId'] == gif_id]
+    assert change['type'] == 'add'
+    assert change['gif']['id'] == gif_id
+    assert 'blob' not in change['gif']
@@ -0,0 +1,56 @@
+from gif_http_cache import ResponseCache, UserVersions
+
+
+def test_user_versions_change_etag_per_user_and_variant():
+    versions = UserVersions()
+    etag = versions.etag('u', versions.get('u'), ('/gifs', ()))
+    assert versions.etag('u', 0, ('/gifs', ())) == etag
+    assert versions.etag('u', 0, ('/gifs', (('limit', '5'),))) != etag
+
+    versions.on_add('u', {'id': 'a'})
+    versions.on_remove('u', {'id': 'a'})
+    assert versions.get('u') == 2
+    assert versions.get('v') == 0
+    assert versions.etag('u', versions.get('u'), ('/gifs', ())) != etag
+    # 다른 프로세스 시작(boot_id)이면 같은 버전이어도 다른 ETag
+    assert UserVersions().etag('u', 0, ('/gifs', ())) != etag
+
+
+def test_response_cache_evicts_least_recently_used():
+    cache = ResponseCache(max_entries=2)
+    cache.put('a', b'1')
+    cache.put('b', b'2')
+    assert cache.get('a') == b'1'
+    cache.put('c', b'3')
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (b'1', b'3')
+    assert (cache.hits, cache.misses, len(cache)) == (3, 1, 2)
+
+    disabled = ResponseCache(max_entries=0)
+    disabled.put('a', b'1')
+    assert disabled.get('a') is None
+
+
+def test_list_response_revalidates_with_etag(server):
+    client = server.app.test_client()
+    first = client.get('/users/etag_user/gifs')
+    assert first.status_code == 200
+    etag = first.headers['ETag']
+
+    hits = server.response_cache.hits
+    again = client.get('/users/etag_user/gifs')
+    assert again.headers['ETag'] == etag
+    assert again.get_data() == first.get_data()
+    assert server.response_cache.hits == hits + 1
+
+    not_modified = client.get('/users/etag_user/gifs', headers={'If-None-Match': etag})
+    assert not_modified.status_code == 304
+    assert not_modified.get_data() == b''
+    assert client.get('/users/etag_user/gifs?limit=1').headers['ETag'] != etag
+
+    added = client.post('/users/etag_user/gifs', json={'title': 'new', 'tags': [], 'url': '/x.gif'})
+    assert added.status_code == 200
+    changed = client.get('/users/etag_user/gifs', headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.json['count'] == first.json['count'] + 1
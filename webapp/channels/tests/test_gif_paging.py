@@ -0,0 +1,83 @@
+import pytest
+
+from gif_paging import decode_cursor, encode_cursor, page, parse_fields, project
+
+
+def make_gifs(count):
+    return [{'id': f'g{i}', 'title': f't{i}', 'url': f'/gifs/g{i}.gif', 'tags': []} for i in range(count)]
+
+
+def ids(gifs):
+    return [g['id'] for g in gifs]
+
+
+def walk(gifs, limit):
+    """커서를 따라 끝까지 읽은 id 목록"""
+    seen = []
+    items, cursor = page(gifs, limit=limit)
+    seen.extend(ids(items))
+    while cursor:
+        items, cursor = page(gifs, limit=limit, cursor=cursor)
+        seen.extend(ids(items))
+    return seen
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor(12, '사용자_gif_1')
+    assert '=' not in cursor
+    assert decode_cursor(cursor) == (12, '사용자_gif_1')
+
+
+@pytest.mark.parametrize('cursor', ['', '!!!', encode_cursor(-1, 'a'), 'WzEsMl0', 'eyJhIjoxfQ'])
+def test_decode_cursor_rejects_malformed(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+@pytest.mark.parametrize('limit', [1, 3, 10, 11])
+def test_cursor_walk_returns_every_item_once(limit):
+    gifs = make_gifs(10)
+    assert walk(gifs, limit) == ids(gifs)
+
+
+def test_last_page_has_no_cursor():
+    gifs = make_gifs(4)
+    items, cursor = page(gifs, limit=4)
+    assert ids(items) == ids(gifs)
+    assert cursor is None
+    assert page(gifs) == (gifs, None)
+    assert page(gifs, offset=3) == (gifs[3:], None)
+
+
+def test_cursor_survives_insert_before_position():
+    gifs = make_gifs(6)
+    items, cursor = page(gifs, limit=3)
+    assert ids(items) == ['g0', 'g1', 'g2']
+    changed = [{'id': 'new', 'title': '', 'url': '', 'tags': []}] + gifs
+    items, _ = page(changed, limit=3, cursor=cursor)
+    assert ids(items) == ['g3', 'g4', 'g5']
+
+
+def test_cursor_survives_deleting_cursor_item():
+    gifs = make_gifs(6)
+    _, cursor = page(gifs, limit=3)
+    changed = [g for g in gifs if g['id'] != 'g2']
+    items, _ = page(changed, limit=3, cursor=cursor)
+    assert ids(items) == ['g3', 'g4', 'g5']
+
+
+def test_cursor_past_end_returns_empty_page():
+    gifs = make_gifs(3)
+    items, cursor = page(gifs[:1], limit=2, cursor=encode_cursor(5, 'gone'))
+    assert items == [] and cursor is None
+
+
+def test_parse_fields_and_project():
+    assert parse_fields(None) is None
+    fields = parse_fields('id, title,id')
+    assert fields == ('id', 'title')
+    assert project(make_gifs(2), fields) == [{'id': 'g0', 'title': 't0'}, {'id': 'g1', 'title': 't1'}]
+    with pytest.raises(ValueError):
+        parse_fields('id,password')
+    with pytest.raises(ValueError):
+        parse_fields(' , ')
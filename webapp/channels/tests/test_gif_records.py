@@ -0,0 +1,44 @@
+from gif_records import LocalGif, pack, unpack
+
+
+def record(**extra):
+    return {'id': 'a', 'title': '제목', 'url': '/gifs/a.gif', 'thumbnailUrl': '/gifs/a.gif',
+            'tags': ['uploaded', 'custom'], 'userId': 'user', **extra}
+
+
+def test_pack_unpack_round_trip_keeps_fields_and_order():
+    data = record(stillUrl='/gifs/a.png', blob='ab' * 32, variants=[{'format': 'webp'}])
+    gif = pack(data)
+    assert isinstance(gif, LocalGif)
+    assert unpack(gif) == data
+    assert list(gif) == list(data)
+    assert len(gif) == len(data)
+    assert pack(gif) is gif
+    # LocalGif 가 아닌 값은 그대로
+    assert unpack(data) is data
+
+
+def test_mapping_access_matches_dict():
+    gif = pack(record())
+    assert gif['title'] == '제목'
+    assert gif['tags'] == ('uploaded', 'custom')
+    assert gif.get('blob') is None
+    assert 'stillUrl' not in gif
+    assert {**gif, 'title': '새 제목'}['title'] == '새 제목'
+    assert dict(gif)['userId'] == 'user'
+
+
+def test_repeated_values_share_objects():
+    first = pack(record())
+    second = pack({**record(), 'id': 'b', 'userId': ''.join(['us', 'er'])})
+    assert first.tags is second.tags
+    assert first.userId is second.userId
+    assert first.thumbnailUrl is first.url
+
+    other_thumbnail = pack(record(thumbnailUrl='/gifs/a.webp'))
+    assert other_thumbnail.thumbnailUrl == '/gifs/a.webp'
+
+
+def test_missing_fields_get_defaults():
+    gif = pack({'id': 'a'})
+    assert unpack(gif) == {'id': 'a', 'title': '', 'url': '', 'thumbnailUrl': '', 'tags': [], 'userId': ''}
@@ -0,0 +1,73 @@
+from gif_catalog import GifCatalog
+from gif_search import GifSearchIndex, UserSearchIndex
+
+
+def gif(gif_id, title, tags=()):
+    return {'id': gif_id, 'title': title, 'url': f'/gifs/{gif_id}.gif', 'tags': list(tags), 'userId': 'u'}
+
+
+def ids(gifs):
+    return [g['id'] for g in gifs]
+
+
+def make_index(users):
+    catalog = GifCatalog(lambda: users, lambda user_ids: {}, lambda saved: True,
+                         flush_interval=60, flush_threshold=1000)
+    catalog.load()
+    index = GifSearchIndex(catalog)
+    catalog.add_listener(index)
+    return catalog, index
+
+
+def test_ranking_orders_title_before_tags_then_by_insertion():
+    index = UserSearchIndex()
+    for item in [
+        gif('tag_sub', 'x', ['mycat']),
+        gif('title_sub', 'a cat'),
+        gif('tag_prefix', 'x', ['cats']),
+        gif('tag_exact', 'x', ['Cat']),
+        gif('title_prefix', 'catnap'),
+        gif('title_exact', 'CAT'),
+        gif('title_prefix_2', 'cat video'),
+        gif('other', 'dog', ['animal']),
+    ]:
+        index.add(item)
+    assert ids(index.search('cat')) == [
+        'title_exact', 'title_prefix', 'title_prefix_2', 'tag_exact', 'tag_prefix', 'title_sub', 'tag_sub',
+    ]
+
+
+def test_long_query_matches_substrings_only():
+    index = UserSearchIndex()
+    index.add(gif('a', '고양이 점프'))
+    index.add(gif('b', '점프하는 고양이'))
+    index.add(gif('c', '고양 이점'))
+    assert ids(index.search('고양이 점')) == ['a']
+    assert ids(index.search('이 점프')) == ['a']
+    assert index.search('고양이 점프!') == []
+
+
+def test_readding_keeps_position_and_drops_stale_grams():
+    index = UserSearchIndex()
+    index.add(gif('a', 'cat one'))
+    index.add(gif('b', 'cat two'))
+    index.add(gif('a', 'cat three'))
+    assert ids(index.search('cat')) == ['a', 'b']
+    assert index.search('one') == []
+    index.remove('a')
+    assert ids(index.search('cat')) == ['b']
+    assert len(index) == 1
+
+
+def test_index_follows_catalog_changes():
+    catalog, index = make_index({'u': [gif('a', 'cat'), gif('b', 'dog')]})
+    assert ids(index.search('u', 'cat')) == ['a']
+
+    catalog.add_user_gif('u', gif('c', 'cat two'))
+    catalog.update_user_gif('u', 'b', {'tags': ['cat']})
+    catalog.remove_user_gif('u', 'a')
+    assert ids(index.search('u', 'cat')) == ['c', 'b']
+
+    catalog.set_user_gifs('u', [gif('d', 'catalog')])
+    assert ids(index.search('u', 'cat')) == ['d']
+    assert index.search('missing', 'cat') == []
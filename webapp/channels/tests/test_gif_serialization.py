@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from gif_records import pack
+from gif_serialization import FragmentCache, JsonSerializer, create_serializer, encode_payload, serializer
+
+
+def gif(gif_id, title='t'):
+    return pack({'id': gif_id, 'title': title, 'url': f'/gifs/{gif_id}.gif', 'thumbnailUrl': '',
+                 'tags': ['태그'], 'userId': 'u'})
+
+
+@pytest.mark.parametrize('payload', [
+    {'data': [gif('a'), gif('b')], 'count': 2, 'userId': 'u'},
+    {'data': [], 'count': 0},
+    {'data': [gif('a')]},
+    {'success': True},
+])
+def test_encode_payload_matches_plain_dumps(payload):
+    fragments = FragmentCache()
+    assert json.loads(encode_payload(payload, fragments)) == json.loads(serializer.dumps(payload))
+    assert json.loads(encode_payload(payload)) == json.loads(serializer.dumps(payload))
+
+
+def test_encode_payload_uses_custom_list_key():
+    payload = {'results': [gif('a')], 'count': 1}
+    body = encode_payload(payload, FragmentCache(), list_key='results')
+    assert json.loads(body) == json.loads(serializer.dumps(payload))
+
+
+def test_fragment_cache_reuses_only_the_same_record():
+    fragments = FragmentCache()
+    first = gif('a')
+    encoded = fragments.encode(first)
+    assert fragments.encode(first) is encoded
+    assert (fragments.hits, fragments.misses) == (1, 1)
+
+    # 갱신되면 새 객체이므로 다시 인코딩
+    updated = gif('a', title='새 제목')
+    assert json.loads(fragments.encode(updated))['title'] == '새 제목'
+    assert fragments.misses == 2
+    assert len(fragments) == 1
+
+    # LocalGif 가 아니면 캐시하지 않는다
+    fragments.encode({'id': 'plain'})
+    assert len(fragments) == 1
+
+
+def test_fragment_cache_evicts_oldest_entries():
+    fragments = FragmentCache(max_entries=2)
+    records = [gif(str(i)) for i in range(3)]
+    for record in records:
+        fragments.encode(record)
+    assert len(fragments) == 2
+    fragments.encode(records[0])
+    assert fragments.misses == 4
+
+
+def test_serializers_produce_the_same_json():
+    payload = {'data': [gif('a')], '한글': '값'}
+    plain = JsonSerializer().dumps(payload)
+    assert json.loads(create_serializer().dumps(payload)) == json.loads(plain)
+    assert '한글'.encode('utf-8') in plain
+    with pytest.raises(ValueError):
+        create_serializer('unknown')
@@ -0,0 +1,74 @@
+import base64
+import os
+
+import pytest
+
+from gif_blobs import is_blob_file
+from gif_static import IMMUTABLE_CACHE_CONTROL, parse_range, resolve_path
+
+
+@pytest.mark.parametrize('header, expected', [
+    (None, None),
+    ('', None),
+    ('bytes=0-99', (0, 99)),
+    ('bytes=10-', (10, 999)),
+    ('bytes=-100', (900, 999)),
+    ('bytes=-5000', (0, 999)),
+    ('bytes=990-5000', (990, 999)),
+    ('bytes=0-0', (0, 0)),
+    ('bytes=0-1,5-6', None),
+    ('items=0-1', None),
+    ('bytes=5', None),
+    ('bytes=-', None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize('header', ['bytes=1000-', 'bytes=5-1', 'bytes=-0', 'bytes=a-b', 'bytes=1-x'])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+
+def test_resolve_path_rejects_escapes_and_hidden_files(tmp_path):
+    root = str(tmp_path)
+    assert resolve_path(root, 'u/a.gif') == str(tmp_path / 'u' / 'a.gif')
+    assert resolve_path(root, '../secret') is None
+    assert resolve_path(root, 'u/.upload-123.part') is None
+    assert resolve_path(root, 'blobs/ab/x.gif.part') is None
+
+
+DIGEST = 'ab' + 'c' * 62
+
+
+@pytest.mark.parametrize('filename, expected', [
+    (f'blobs/ab/{DIGEST}.gif', True),
+    (f'blobs/cd/{DIGEST}.gif', False),
+    (f'blobs/ab/thumbnails/{DIGEST}.png', False),
+    (f'blobs/ab/variants/{DIGEST}.webp', False),
+    ('blobs/ab/abc.gif', False),
+    (f'user/{DIGEST}.gif', False),
+])
+def test_is_blob_file(filename, expected):
+    assert is_blob_file(filename) is expected
+
+
+def test_only_blob_originals_are_immutable(server):
+    client = server.app.test_client()
+    data = base64.b64encode(b'GIF89a' + b'static' * 10).decode()
+    added = client.post('/users/static_user/gifs', json={'title': 's', 'tags': [], 'base64_data': data})
+    url = added.json['data']['url']
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == IMMUTABLE_CACHE_CONTROL
+
+    path = server.blobs.path_for(url.rsplit('/', 1)[1][:-len('.gif')])
+    thumbnail = server.thumbnail_paths(path)[0]
+    os.makedirs(os.path.dirname(thumbnail), exist_ok=True)
+    with open(thumbnail, 'wb') as f:
+        f.write(b'png')
+    relative = os.path.relpath(thumbnail, server.BASE_GIF_DIRECTORY).replace(os.sep, '/')
+    response = client.get(f'/static/gifs/{relative}')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == f'public, max-age={server.STATIC_MAX_AGE}'
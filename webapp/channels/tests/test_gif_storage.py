@@ -0,0 +1,165 @@
+import json
+import os
+
+import pytest
+
+import gif_storage
+
+from gif_catalog import GifCatalog
+from gif_records import pack, unpack
+from gif_storage import JsonFileStorage, ShardedStorage, SqliteStorage, ensure_initialized, migrate_from_json
+
+
+def gif(user_id, gif_id, title='t', **extra):
+    return {'id': gif_id, 'title': title, 'url': f'/gifs/{gif_id}.gif', 'tags': ['a', '태그'], 'userId': user_id,
+            **extra}
+
+
+def ids(gifs):
+    return [g['id'] for g in gifs]
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return SqliteStorage(str(tmp_path / 'users_gifs.db'))
+
+
+def test_sqlite_round_trip_keeps_order_and_fields(storage):
+    users = {
+        'u': [gif('u', 'c', title='세 번째'), gif('u', 'a', variants=[{'format': 'webp', 'size': 10}]), gif('u', 'b')],
+        'v': [gif('v', 'a')],
+    }
+    storage.save(users)
+    assert storage.load_all() == users
+    assert storage.load_user('u') == users['u']
+    assert storage.load_user('missing') is None
+    assert storage.load_users(['v', 'missing']) == {'v': users['v']}
+    assert sorted(ids(storage.iter_gifs())) == ['a', 'a', 'b', 'c']
+    # 다른 연결(다른 워커)에서도 같은 내용
+    assert SqliteStorage(storage.path).load_all() == users
+
+
+def test_sqlite_save_replaces_only_dirty_users(storage):
+    storage.save({'u': [gif('u', 'a')], 'v': [gif('v', 'b')]})
+    storage.save({'u': [gif('u', 'c')], 'v': []}, dirty_users=['u'])
+    assert storage.load_all() == {'u': [gif('u', 'c')], 'v': [gif('v', 'b')]}
+
+
+def test_sqlite_apply_operations_touch_only_their_rows(storage):
+    storage.save({'u': [gif('u', 'a'), gif('u', 'b'), gif('u', 'c')], 'v': [gif('v', 'a')]})
+    storage.apply_operations([
+        ('u', ('add', gif('u', 'd'))),
+        ('u', ('remove', 'a')),
+        ('u', ('update', 'b', {'title': '바뀜'})),
+        ('u', ('replace_gif', 'c', gif('u', 'c', thumbnailUrl='/thumb.webp'))),
+        ('u', ('add_many', [gif('u', 'e'), gif('u', 'f')])),
+        ('u', ('remove_many', ['e', 'missing'])),
+        ('u', ('init', [gif('u', 'default')])),
+        ('w', ('init', [gif('w', 'default')])),
+    ])
+    loaded = storage.load_all()
+    assert ids(loaded['u']) == ['b', 'c', 'd', 'f']
+    assert loaded['u'][0]['title'] == '바뀜'
+    assert loaded['u'][1]['thumbnailUrl'] == '/thumb.webp'
+    assert loaded['v'] == [gif('v', 'a')]
+    assert ids(loaded['w']) == ['default']
+
+
+def test_sqlite_apply_operations_rolls_back_on_error(storage):
+    storage.save({'u': [gif('u', 'a')]})
+    with pytest.raises(ValueError):
+        storage.apply_operations([('u', ('add', gif('u', 'b'))), ('u', ('unknown',))])
+    assert ids(storage.load_user('u')) == ['a']
+
+
+def test_sqlite_keeps_duplicate_ids_unchanged(storage):
+    storage.save({'u': [gif('u', 'dup', title='first'), gif('u', 'dup', title='second')]})
+    storage.apply_operations([('u', ('add', gif('u', 'dup', title='third')))])
+    gifs = storage.load_user('u')
+    # 다른 저장소와 같은 id 를 그대로 두고, id 로 하는 작업은 첫 번째 항목에만 적용
+    assert ids(gifs) == ['dup', 'dup', 'dup']
+    assert [g['title'] for g in gifs] == ['first', 'second', 'third']
+
+    storage.apply_operations([('u', ('update', 'dup', {'title': '바뀜'})), ('u', ('remove', 'dup'))])
+    assert [g['title'] for g in storage.load_user('u')] == ['second', 'third']
+    storage.apply_operations([('u', ('remove_many', ['dup', 'dup']))])
+    assert [g['title'] for g in storage.load_user('u')] == ['third']
+
+
+def test_migration_reports_duplicate_ids(tmp_path, capsys):
+    json_path = tmp_path / 'users_gifs.json'
+    json_path.write_text(json.dumps({'u': [gif('u', 'dup'), gif('u', 'dup'), gif('u', 'x')]}), encoding='utf-8')
+    target = SqliteStorage(str(tmp_path / 'users_gifs.db'))
+    migrate_from_json(str(json_path), target)
+    assert ids(target.load_user('u')) == ['dup', 'dup', 'x']
+    assert 'dup' in capsys.readouterr().out
+
+
+def test_catalog_writes_operations_through_sqlite(storage):
+    storage.save({'u': [gif('u', 'a'), gif('u', 'b')]})
+
+    def apply(operations):
+        storage.apply_operations(operations)
+        return True
+
+    catalog = GifCatalog(storage.load_all, storage.load_users, storage.save, flush_interval=60,
+                         flush_threshold=1000, pack=pack, unpack=unpack, apply_fn=apply)
+    catalog.load()
+    catalog.add_user_gif('u', gif('u', 'c'))
+    catalog.update_user_gif('u', 'a', {'title': '바뀜'})
+    catalog.remove_user_gif('u', 'b')
+    assert catalog.flush()
+
+    stored = storage.load_user('u')
+    assert ids(stored) == ids(catalog.get_user_gifs('u')) == ['a', 'c']
+    assert stored[0]['title'] == '바뀜'
+
+
+@pytest.mark.parametrize('make_storage', [
+    lambda tmp_path: SqliteStorage(str(tmp_path / 'users_gifs.db')),
+    lambda tmp_path: ShardedStorage(str(tmp_path / 'users_gifs')),
+])
+def test_ensure_initialized_migrates_legacy_json_once(tmp_path, make_storage):
+    json_path = tmp_path / 'users_gifs.json'
+    legacy = {'u': [gif('u', 'a')], 'v': [gif('v', 'b')]}
+    json_path.write_text(json.dumps(legacy), encoding='utf-8')
+    target = make_storage(tmp_path)
+
+    ensure_initialized(target, str(json_path))
+    assert target.load_all() == legacy
+
+    # 이미 있는 저장소는 다시 변환하지 않는다
+    target.save_user('u', [])
+    ensure_initialized(target, str(json_path))
+    assert target.load_user('u') in (None, [])
+
+
+def test_ensure_initialized_creates_empty_json_storage(tmp_path):
+    target = JsonFileStorage(str(tmp_path / 'users_gifs.json'))
+    ensure_initialized(target, target.path)
+    assert target.exists()
+    assert target.load_all() == {}
+
+
+def test_json_save_fsyncs_and_replaces_atomically(tmp_path, monkeypatch):
+    target = JsonFileStorage(str(tmp_path / 'users_gifs.json'))
+    target.save({'u': [gif('u', 'a')]})
+
+    synced = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(gif_storage.os, 'fsync', lambda fd: synced.append(fd) or real_fsync(fd))
+    monkeypatch.setattr(gif_storage, 'FSYNC_WRITES', True)
+    target.save({'u': [gif('u', 'b')]})
+    # 임시 파일과 디렉토리 모두 fsync
+    assert len(synced) >= 2
+    assert ids(target.load_user('u')) == ['b']
+
+    def broken_dumps(data):
+        raise RuntimeError('쓰기 실패')
+    monkeypatch.setattr(gif_storage.serializer, 'dumps', broken_dumps)
+    with pytest.raises(RuntimeError):
+        target.save({'u': [gif('u', 'c')]})
+    monkeypatch.undo()
+    # 실패해도 이전 내용이 남고 임시 파일은 지워진다
+    assert ids(target.load_user('u')) == ['b']
+    assert os.listdir(tmp_path) == ['users_gifs.json']
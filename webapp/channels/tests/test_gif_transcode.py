@@ -0,0 +1,104 @@
+import os
+from concurrent.futures import Future
+
+import pytest
+
+from gif_transcode import TranscodePipeline, variant_paths
+
+
+class ManualExecutor:
+    """submit 한 작업을 실행하지 않고 Future 만 돌려주는 실행기 (테스트가 직접 완료시킴)"""
+
+    def __init__(self):
+        self.futures = []
+
+    def submit(self, fn, *args, **kwargs):
+        future = Future()
+        self.futures.append(future)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        pass
+
+
+@pytest.fixture
+def pipeline():
+    ready = []
+    pipeline = TranscodePipeline(on_ready=lambda *args: ready.append(args), formats=('gif',), max_pending=2)
+    pipeline._executor = ManualExecutor()
+    pipeline.ready = ready
+    return pipeline
+
+
+@pytest.fixture
+def gif_path(tmp_path):
+    path = tmp_path / ('ab' * 32 + '.gif')
+    path.write_bytes(b'GIF89a')
+    return str(path)
+
+
+def write_variants(gif_path):
+    paths = list(variant_paths(gif_path).values())
+    for path in paths:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(b'variant')
+    return paths
+
+
+def finish(future):
+    future.set_running_or_notify_cancel()
+    future.set_result({'variants': {'gif': {'kept': True}}})
+
+
+def test_waiters_share_one_job(pipeline, gif_path):
+    assert pipeline.submit('u', 'a', gif_path, '/a.gif')
+    assert pipeline.submit('v', 'b', gif_path, '/b.gif')
+    [future] = pipeline._executor.futures
+    finish(future)
+    assert [args[:2] for args in pipeline.ready] == [('u', 'a'), ('v', 'b')]
+    assert pipeline.pending_count() == 0
+
+
+def test_cancel_queued_job_frees_its_slot(pipeline, gif_path, tmp_path):
+    other = str(tmp_path / 'other.gif')
+    assert pipeline.submit('u', 'a', gif_path, '/a.gif')
+    assert pipeline.submit('u', 'b', other, '/b.gif')
+    assert not pipeline.submit('u', 'c', str(tmp_path / 'third.gif'), '/c.gif')
+
+    assert pipeline.cancel(gif_path)
+    assert pipeline._executor.futures[0].cancelled()
+    assert not pipeline.cancel(gif_path)
+    assert pipeline.submit('u', 'c', str(tmp_path / 'third.gif'), '/c.gif')
+    assert pipeline.ready == []
+
+
+def test_cancel_running_job_removes_its_output(pipeline, gif_path):
+    assert pipeline.submit('u', 'a', gif_path, '/a.gif')
+    [future] = pipeline._executor.futures
+    future.set_running_or_notify_cancel()
+    assert pipeline.cancel(gif_path)
+
+    paths = write_variants(gif_path)
+    future.set_result({'variants': {'gif': {'kept': True}}})
+    assert not any(os.path.exists(path) for path in paths)
+    assert pipeline.ready == []
+
+
+def test_resubmitted_path_keeps_the_new_jobs_output(pipeline, gif_path):
+    assert pipeline.submit('u', 'a', gif_path, '/a.gif')
+    old = pipeline._executor.futures[0]
+    old.set_running_or_notify_cancel()
+    assert pipeline.cancel(gif_path)
+    assert pipeline.submit('u', 'b', gif_path, '/b.gif')
+    new = pipeline._executor.futures[1]
+
+    # 취소된 작업이 늦게 끝나도 새 작업이 쓸 변형은 지우지 않는다
+    paths = write_variants(gif_path)
+    old.set_result({'variants': {'gif': {'kept': True}}})
+    assert all(os.path.exists(path) for path in paths)
+    assert pipeline.ready == []
+
+    finish(new)
+    assert [args[:2] for args in pipeline.ready] == [('u', 'b')]
+    assert all(os.path.exists(path) for path in paths)
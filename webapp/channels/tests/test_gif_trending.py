@@ -0,0 +1,121 @@
+import random
+
+import pytest
+
+from gif_trending import TrendingIndex
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def gif(gif_id, tags=()):
+    return {'id': gif_id, 'tags': list(tags)}
+
+
+def keys(top):
+    return [key for key, _, _ in top]
+
+
+def test_scores_decay_by_half_life():
+    clock = Clock()
+    index = TrendingIndex(half_life=100, clock=clock)
+    index.record('u', gif('a'))
+    index.record('u', gif('a'))
+    clock.now += 100
+    [(key, score, sends)] = index.top()
+    assert key == ('u', 'a') and sends == 2
+    assert score == pytest.approx(1.0)
+
+    # 최근 전송 1회가 오래전 전송 2회보다 앞선다
+    clock.now += 100
+    index.record('u', gif('b'))
+    assert keys(index.top()) == [('u', 'b'), ('u', 'a')]
+
+
+def test_rescale_keeps_order_and_prunes_faded_items():
+    clock = Clock()
+    index = TrendingIndex(half_life=1, clock=clock)
+    index.record('u', gif('old'))
+    index.flush()
+    clock.now += 100
+    index.record('u', gif('new'))
+    assert keys(index.top()) == [('u', 'new')]
+    assert len(index) == 1
+
+
+def test_top_k_matches_full_ranking_under_removes_and_retags():
+    rng = random.Random(3)
+    clock = Clock()
+    index = TrendingIndex(half_life=50, top_k=5, clock=clock)
+    tags = {}
+    for step in range(2000):
+        clock.now += rng.random()
+        user_id, gif_id = rng.choice('uvw'), str(rng.randrange(40))
+        action = rng.random()
+        if action < 0.8:
+            item_tags = tags.setdefault((user_id, gif_id), tuple(rng.sample('abc', rng.randrange(3))))
+            index.record(user_id, gif(gif_id, item_tags))
+        elif action < 0.9:
+            tags.pop((user_id, gif_id), None)
+            index.on_remove(user_id, gif(gif_id))
+        elif (user_id, gif_id) in tags:
+            tags[(user_id, gif_id)] = tuple(rng.sample('abc', rng.randrange(3)))
+            index.on_update(user_id, gif(gif_id, tags[(user_id, gif_id)]))
+
+        if step % 50 == 0:
+            assert index._members == {tag: {key for key in index._scores if tag in tags[key]}
+                                      for tag in 'abc' if any(tag in tags[key] for key in index._scores)}
+            assert set().union(*index._user_keys.values()) == set(index._scores)
+            for tag in (None, 'a', 'b', 'c'):
+                members = {key for key in index._scores if tag is None or tag in tags[key]}
+                expected = sorted(members, key=index._scores.__getitem__, reverse=True)[:5]
+                assert keys(index.top(tag)) == expected
+
+
+def test_replace_removes_missing_items_and_retags_only_that_user():
+    clock = Clock()
+    index = TrendingIndex(top_k=2, clock=clock)
+    for gif_id, count in (('a', 3), ('b', 2), ('c', 1)):
+        index.record('u', gif(gif_id, ['cat']), count)
+    index.record('v', gif('d', ['cat']))
+    assert keys(index.top('cat')) == [('u', 'a'), ('u', 'b')]
+
+    index.on_replace('u', [gif('b', ['dog']), gif('c', ['cat'])])
+    assert keys(index.top('cat')) == [('u', 'c'), ('v', 'd')]
+    assert keys(index.top('dog')) == [('u', 'b')]
+    assert keys(index.top()) == [('u', 'b'), ('u', 'c')]
+    assert len(index) == 3
+
+
+def test_flush_merges_records_from_other_workers(tmp_path):
+    path = str(tmp_path / 'trending.json')
+    clock = Clock()
+    first = TrendingIndex(path, half_life=100, clock=clock)
+    second = TrendingIndex(path, half_life=100, clock=clock)
+    first.load()
+    second.load()
+    first.record('u', gif('a', ['cat']))
+    second.record('u', gif('a', ['cat']))
+    second.record('v', gif('b'))
+    first.flush()
+    second.flush()
+    first.flush()
+
+    for index in (first, second):
+        top = {key: sends for key, _, sends in index.top()}
+        assert top == {('u', 'a'): 2, ('v', 'b'): 1}
+    assert keys(first.top('cat')) == [('u', 'a')]
+
+    second.on_remove('u', gif('a'))
+    second.flush()
+    first.flush()
+    assert keys(first.top()) == [('v', 'b')]
+
+    reloaded = TrendingIndex(path, half_life=100, clock=clock)
+    reloaded.load()
+    assert keys(reloaded.top()) == [('v', 'b')]
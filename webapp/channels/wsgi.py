@@ -0,0 +1,76 @@
+"""운영용 WSGI 진입점
+
+    gunicorn -w 4 -k gthread --threads 8 -b 0.0.0.0:5000 wsgi:app
+또는
+    python wsgi.py [--workers N] [--threads N] [--bind HOST:PORT]
+
+워커마다 server.py 를 따로 import 하므로 카탈로그, 검색 색인, 응답 캐시는 워커별로 존재한다.
+변경 사항은 저장소 파일 잠금 안에서 합쳐 기록되고, 다른 워커는 다음 flush 주기
+(GIF_CATALOG_FLUSH_INTERVAL) 안에 변경을 다시 읽는다. 카탈로그 flush 스레드가
+마스터가 아닌 각 워커에서 돌아야 하므로 --preload 는 사용하지 않는다.
+/metrics 도 요청을 받은 워커 한 곳의 값이므로 Prometheus 에서는 워커별 합계가 아닌 표본으로 본다.
+요청 수 제한(GIF_RATE_LIMIT_*)과 동시 업로드 제한(GIF_MAX_CONCURRENT_UPLOADS)도 워커별이므로
+서버 전체로는 워커 수만큼 곱한 값이 된다. 동시 업로드 제한은 --threads 보다 작게 두어야
+목록/검색 요청을 처리할 스레드가 남는다.
+변경 long-poll/SSE (GIF_CHANGES_MAX_WAITERS) 도 기다리는 동안 스레드를 잡으므로 같은 이유로 작게 두고,
+연결을 많이 유지해야 하면 server_async.py 로 서비스한다.
+"""
+import argparse
+import os
+import sys
+
+if __name__ != "__main__":
+    # gunicorn wsgi:app 은 각 워커 프로세스에서 이 모듈을 import 한다
+    from server import app  # noqa: F401
+
+DEFAULT_BIND = os.environ.get('GIF_BIND', '0.0.0.0:5000')
+DEFAULT_WORKERS = int(os.environ.get('GIF_WORKERS', str(min(8, (os.cpu_count() or 1) * 2))))
+DEFAULT_THREADS = int(os.environ.get('GIF_THREADS', '8'))
+DEFAULT_TIMEOUT = int(os.environ.get('GIF_WORKER_TIMEOUT', '120'))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="GIF 서버를 gunicorn 멀티 워커로 실행합니다.")
+    parser.add_argument("--bind", default=DEFAULT_BIND, help="HOST:PORT")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="워커 프로세스 수")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS, help="워커당 요청 처리 스레드 수")
+    parser.add_argument("--timeout", type=int, default=DEFAULT_TIMEOUT, help="워커 응답 제한 시간 (초)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("❌ gunicorn 이 설치되어 있지 않습니다: pip install gunicorn")
+        sys.exit(1)
+
+    class GifServerApplication(BaseApplication):
+        def __init__(self, options):
+            self.options = options
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                self.cfg.set(key, value)
+
+        def load(self):
+            # 마스터가 아닌 워커에서 import 해야 카탈로그 flush 스레드가 워커마다 생긴다
+            from server import app
+            return app
+
+    options = {
+        'bind': args.bind,
+        'workers': args.workers,
+        'threads': args.threads,
+        'worker_class': 'gthread',
+        'timeout': args.timeout,
+        'preload_app': False,
+    }
+    print(f"🚀 gunicorn 시작: {args.bind} (워커 {args.workers}개 x 스레드 {args.threads}개)")
+    GifServerApplication(options).run()
+
+
+if __name__ == "__main__":
+    main()